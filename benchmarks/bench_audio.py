@@ -0,0 +1,207 @@
+"""Measure the CPU cost of one caller's audio: VAD, noise suppression, turns.
+
+Replays WAV fixtures (`--wav`, 16-bit PCM) through the stages the agent runs
+on a caller's microphone, as fast as each one goes, one stage at a time. The
+audio is first resampled to the session's 24 kHz, as room IO delivers it.
+
+    vad        the Silero VAD from `prewarm`, on 50 ms frames
+    ns         WebRTC noise suppression, on 10 ms frames
+    turns      the multilingual end-of-turn model, once per end of speech
+
+BVC and NC run inside LiveKit's native audio stream on a subscribed track and
+can't be replayed offline, so `ns` (`rtc.AudioProcessingModule`) stands in
+for them; it is the cheapest noise cancellation a caller can get, what
+`audio_budget.NoiseCancellationPolicy` weighs against none at all. The turn
+detector is skipped unless its model files are downloaded
+(`uv run python src/agent.py download-files`).
+
+Reports, per stage:
+
+    rtf          CPU time per second of audio (0.01 is 1% of one core)
+    frames/s     frames processed per second of CPU time (per core)
+    MiB          resident memory added by loading the stage's model
+
+and how many concurrent callers fit in `--max-cpu` cores with and without
+noise suppression. Without `--wav`, replays a synthetic lobby clip: voiced
+bursts over background noise.
+
+Usage:
+    uv run python benchmarks/bench_audio.py [--wav caller.wav ...] [--max-cpu 0.75]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import wave
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import psutil
+from livekit import rtc
+from livekit.agents import vad
+from livekit.plugins import silero
+from livekit.plugins.turn_detector.multilingual import _EUORunnerMultilingual
+
+from turns import _load_runner
+
+SAMPLE_RATE = 24000
+VAD_FRAME = SAMPLE_RATE // 20
+NS_FRAME = SAMPLE_RATE // 100
+
+# what the turn detector sees at the end of a guest's turn
+CHAT_CTX = (
+    b'{"chat_ctx": [{"role": "assistant", "content": "Hello, welcome in! '
+    b'Who are you here to see?"}, {"role": "user", "content": '
+    b'"Hi, I\'m here to see Sarah Collins"}]}'
+)
+
+
+def _read_wav(path: Path) -> np.ndarray:
+    with wave.open(str(path), "rb") as f:
+        if f.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit PCM is supported")
+        rate, channels = f.getframerate(), f.getnchannels()
+        data = f.readframes(f.getnframes())
+    resampler = rtc.AudioResampler(rate, SAMPLE_RATE, num_channels=channels)
+    frames = resampler.push(
+        rtc.AudioFrame(data, rate, channels, len(data) // (2 * channels))
+    )
+    frames += resampler.flush()
+    pcm = np.concatenate(
+        [np.frombuffer(frame.data, dtype=np.int16) for frame in frames]
+    )
+    # keep the first channel
+    return pcm.reshape(-1, channels)[:, 0].copy()
+
+
+def _synthetic(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    audio = rng.normal(0, 300, t.size)
+    for start in np.arange(0.5, seconds - 2, 3.5):
+        burst = (t >= start) & (t < start + 2)
+        pitch = 120 + 20 * np.sin(2 * np.pi * 3 * t[burst])
+        phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+        voice = sum(np.sin(k * phase) / k for k in range(1, 15))
+        audio[burst] += 6000 * voice * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t[burst]))
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def _frames(pcm: np.ndarray, size: int) -> list[rtc.AudioFrame]:
+    return [
+        rtc.AudioFrame(pcm[i : i + size].tobytes(), SAMPLE_RATE, 1, size)
+        for i in range(0, pcm.size - size + 1, size)
+    ]
+
+
+class _Stage:
+    """Memory added by loading a stage's model; CPU time of the `with` block."""
+
+    def __init__(self, load: Callable[[], Any]) -> None:
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        self.model = load()
+        self.rss = process.memory_info().rss - rss
+
+    def __enter__(self) -> "_Stage":
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.cpu = time.process_time() - self._cpu
+
+
+async def _vad(clips: list[np.ndarray]) -> tuple[_Stage, int, int]:
+    """Return the stage, frames pushed and ends of speech detected."""
+    frames = [_frames(pcm, VAD_FRAME) for pcm in clips]
+    pushed = ends = 0
+    stage = _Stage(silero.VAD.load)
+    with stage:
+        for clip in frames:
+            stream = stage.model.stream()
+            for frame in clip:
+                stream.push_frame(frame)
+            stream.end_input()
+            async for event in stream:
+                ends += event.type == vad.VADEventType.END_OF_SPEECH
+            pushed += len(clip)
+    return stage, pushed, ends
+
+
+def _ns(clips: list[np.ndarray]) -> tuple[_Stage, int]:
+    frames = [_frames(pcm, NS_FRAME) for pcm in clips]
+    stage = _Stage(
+        lambda: rtc.AudioProcessingModule(noise_suppression=True, high_pass_filter=True)
+    )
+    with stage:
+        for clip in frames:
+            for frame in clip:
+                stage.model.process_stream(frame)
+    return stage, sum(len(clip) for clip in frames)
+
+
+def _turns(inferences: int) -> _Stage | None:
+    try:
+        stage = _Stage(lambda: _load_runner(_EUORunnerMultilingual.INFERENCE_METHOD))
+    except RuntimeError as e:
+        print(f"turns: skipped, {e}")
+        return None
+    with stage:
+        for _ in range(inferences):
+            stage.model.run(CHAT_CTX)
+    return stage
+
+
+def _row(name: str, stage: _Stage, seconds: float, frames: int) -> float:
+    rtf = stage.cpu / seconds
+    rate = f"{frames / stage.cpu:.0f}" if frames else "-"
+    print(f"{name:<8} {rtf:>8.4f} {rate:>10} {stage.rss / 2**20:>8.1f}")
+    return rtf
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.wav:
+        clips = [_read_wav(path) for path in args.wav]
+    else:
+        clips = [_synthetic(args.seconds)]
+        print(f"no --wav given, replaying a synthetic {args.seconds:.0f} s clip")
+    seconds = sum(pcm.size for pcm in clips) / SAMPLE_RATE
+
+    ns_stage, ns_frames = _ns(clips)
+    vad_stage, vad_frames, ends = await _vad(clips)
+    turns_stage = _turns(args.inferences)
+
+    print(f"{seconds:.1f} s of audio, {ends} ends of speech")
+    print(f"{'stage':<8} {'rtf':>8} {'frames/s':>10} {'MiB':>8}")
+    rtf = _row("vad", vad_stage, seconds, vad_frames)
+    ns = _row("ns", ns_stage, seconds, ns_frames)
+    if turns_stage is not None:
+        # the turn detector runs once per end of speech, not per frame
+        per_turn = turns_stage.cpu / args.inferences
+        turns_stage.cpu = per_turn * ends
+        rtf += _row("turns", turns_stage, seconds, 0)
+        print(f"turns: {per_turn * 1000:.1f} ms CPU per end of speech")
+
+    print(
+        f"callers in {args.max_cpu:.2f} cores: "
+        f"{args.max_cpu / (rtf + ns):.0f} with noise suppression, "
+        f"{args.max_cpu / rtf:.0f} without"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--wav", type=Path, nargs="*", default=[])
+    parser.add_argument(
+        "--seconds", type=float, default=60.0, help="length of the synthetic clip"
+    )
+    parser.add_argument(
+        "--inferences", type=int, default=20, help="turn detector runs to average"
+    )
+    parser.add_argument("--max-cpu", type=float, default=0.75)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,158 @@
+"""Benchmark group check-ins: one tool call per visitor vs `check_in_group`.
+
+For each group size, an offline session (`offline.ScriptedLLM`, with `--ttft`
+simulating the model's time to first token) checks the whole group in twice:
+once the way a model does with only `check_in`, one tool round trip per
+visitor, and once with a single `check_in_group` call. Check-ins go to a
+SQLite registry and badges to a simulated printer that costs `--job-overhead`
+seconds per print job plus `--per-badge` seconds per badge. Reports:
+
+    turn        time until the agent's reply to the group
+    badges      time until the last badge is printed
+    rounds      LLM requests for the turn
+    jobs        print jobs sent to the printer
+    writes      registry transactions
+
+Without `check_in_group`, a session's default `max_tool_steps` of 3 also stops
+the model after three visitors; the benchmark raises it to the group size.
+
+Usage:
+    uv run python benchmarks/bench_checkin.py [--sizes 1,5,10,20,50,100] [--ttft 0.1]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from livekit.agents import AgentSession, llm
+
+from agent import Assistant
+from badges import BadgeQueue
+from offline import ScriptedLLM, Step, ToolCall
+from timesource import TimeProvider, set_time_provider
+from visitors import VisitorRegistry
+
+
+class SimulatedPrinter:
+    def __init__(self, job_overhead: float, per_badge: float) -> None:
+        self._job_overhead = job_overhead
+        self._per_badge = per_badge
+
+    async def print_badges(self, visits) -> None:
+        await asyncio.sleep(self._job_overhead + self._per_badge * len(visits))
+
+
+class CountingRegistry(VisitorRegistry):
+    writes = 0
+
+    def flush(self) -> int:
+        written = super().flush()
+        self.writes += written > 0
+        return written
+
+
+def _outputs_this_turn(chat_ctx: llm.ChatContext) -> int:
+    count = 0
+    for item in reversed(chat_ctx.items):
+        if item.type == "message" and item.role == "user":
+            break
+        count += item.type == "function_call_output"
+    return count
+
+
+def _per_visitor(names: list[str]):
+    def script(chat_ctx: llm.ChatContext) -> Step:
+        done = _outputs_this_turn(chat_ctx)
+        if done < len(names):
+            return [ToolCall("check_in", {"name": names[done]})]
+        return "You are all checked in."
+
+    return script
+
+
+def _group(names: list[str]):
+    def script(chat_ctx: llm.ChatContext) -> Step:
+        if not _outputs_this_turn(chat_ctx):
+            return [ToolCall("check_in_group", {"names": names})]
+        return "You are all checked in."
+
+    return script
+
+
+async def _check_in(
+    script, size: int, args: argparse.Namespace, db: Path
+) -> dict[str, float]:
+    registry = CountingRegistry(db)
+    registry.start()
+    badges = BadgeQueue(SimulatedPrinter(args.job_overhead, args.per_badge))
+    rounds = 0
+
+    def counted(chat_ctx: llm.ChatContext) -> Step:
+        nonlocal rounds
+        rounds += 1
+        return script(chat_ctx)
+
+    async with (
+        ScriptedLLM(counted, ttft=args.ttft) as scripted,
+        # the default of 3 tool steps per turn would cut the per-visitor path short
+        AgentSession(llm=scripted, max_tool_steps=size + 1) as session,
+    ):
+        await session.start(Assistant(visitors=registry, badges=badges))
+        start = time.perf_counter()
+        await session.run(user_input="We're here for the board meeting")
+        turn = time.perf_counter() - start
+        await badges.aclose()
+        printed = time.perf_counter() - start
+    await registry.aclose()
+    return {
+        "turn": turn,
+        "badges": printed,
+        "rounds": rounds,
+        "jobs": badges.jobs,
+        "writes": registry.writes,
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    set_time_provider(TimeProvider(None))
+    print(
+        f"{'size':>4}  {'path':<10} {'turn':>8} {'badges':>8}"
+        f" {'rounds':>6} {'jobs':>5} {'writes':>6}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            names = [f"Guest {i}" for i in range(size)]
+            for label, script in (
+                ("per-visit", _per_visitor(names)),
+                ("group", _group(names)),
+            ):
+                r = await _check_in(script, size, args, Path(tmp, f"{label}-{size}.db"))
+                print(
+                    f"{size:>4}  {label:<10} {r['turn']:>7.2f}s {r['badges']:>7.2f}s"
+                    f" {r['rounds']:>6} {r['jobs']:>5} {r['writes']:>6}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1, 5, 10, 20, 50, 100],
+    )
+    parser.add_argument(
+        "--ttft", type=float, default=0.1, help="simulated LLM time to first token"
+    )
+    parser.add_argument("--job-overhead", type=float, default=0.5)
+    parser.add_argument("--per-badge", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
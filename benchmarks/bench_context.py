@@ -0,0 +1,130 @@
+"""Measure prompt size and time to first token over a long kiosk session.
+
+Plays one offline session in which `--visitors` guests arrive one after
+another, `--gap` seconds apart, each asking the same few questions. The
+"unbounded" run sends the raw instructions and the whole session's history
+with every request, as the agent did before `ContextBudget`. The "budgeted"
+run compacts the instructions, starts a new visit after each quiet spell
+(keeping a one-line summary of the last few) and caps each request at
+`--max-tokens`.
+
+The scripted LLM's time to first token grows with the prompt
+(`--prefill-per-token`), like a real model's. Reports the prompt tokens and
+TTFT from the session's `LLMMetrics`, for the first and last visitors and
+over the whole session.
+
+Usage:
+    uv run python benchmarks/bench_context.py [--visitors 20] [--max-tokens 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from livekit.agents import AgentSession, MetricsCollectedEvent, metrics
+
+from agent import INSTRUCTIONS, Assistant
+from context_budget import ContextBudget, compact_instructions
+from directory import DEFAULT_PEOPLE
+from offline import ScriptedLLM
+from responses import BUILDING
+from timesource import TimeProvider, set_time_provider
+from visitors import VisitorRegistry
+
+GUESTS = ("Alex Morgan", "Priya Shah", "Tom Baker", "Mia Chen", "Leo Rossi")
+
+
+def _turns(visitor: int) -> tuple[str, ...]:
+    contact = DEFAULT_PEOPLE[visitor % len(DEFAULT_PEOPLE)].name
+    guest = GUESTS[visitor % len(GUESTS)]
+    return (
+        f"Hi, I'm here to see {contact} at 2099-01-01T10:30:00+00:00",
+        "What's the weather in London like?",
+        "Which floor is that, floor 21?",
+        f"My name is {guest}",
+    )
+
+
+async def _session(
+    args: argparse.Namespace, budgeted: bool
+) -> list[list[metrics.LLMMetrics]]:
+    now = 0.0
+    if budgeted:
+        budget = ContextBudget(max_tokens=args.max_tokens, clock=lambda: now)
+    else:
+        budget = ContextBudget(max_tokens=None, idle_gap=None)
+
+    # one list of LLM requests per visitor
+    per_visitor: list[list[metrics.LLMMetrics]] = []
+
+    def on_metrics(ev: MetricsCollectedEvent) -> None:
+        if isinstance(ev.metrics, metrics.LLMMetrics):
+            per_visitor[-1].append(ev.metrics)
+
+    async with (
+        ScriptedLLM(
+            ttft=args.ttft, prefill_per_token=args.prefill_per_token
+        ) as scripted,
+        AgentSession(llm=scripted) as session,
+    ):
+        session.on("metrics_collected", on_metrics)
+        agent = Assistant(visitors=VisitorRegistry(), budget=budget)
+        if not budgeted:
+            await agent.update_instructions(INSTRUCTIONS.format(BUILDING))
+        await session.start(agent)
+        for visitor in range(args.visitors):
+            per_visitor.append([])
+            for text in _turns(visitor):
+                await session.run(user_input=text)
+                now += 10.0
+            now += args.gap
+    return per_visitor
+
+
+def _row(label: str, requests: list[metrics.LLMMetrics]) -> str:
+    tokens = statistics.fmean(m.prompt_tokens for m in requests)
+    ttft = statistics.fmean(m.ttft for m in requests) * 1000
+    return f"  {label:<16} {tokens:>10.0f} {ttft:>10.0f}"
+
+
+async def run(args: argparse.Namespace) -> None:
+    set_time_provider(TimeProvider(None))
+    raw = INSTRUCTIONS.format(BUILDING)
+    print(
+        f"instructions: {len(raw)} chars raw, "
+        f"{len(compact_instructions(raw))} chars compacted"
+    )
+
+    for name, budgeted in (("unbounded", False), ("budgeted", True)):
+        per_visitor = await _session(args, budgeted)
+        everything = [m for requests in per_visitor for m in requests]
+        print(f"{name}: {len(everything)} LLM requests")
+        print(f"  {'mean per request':<16} {'prompt tok':>10} {'ttft ms':>10}")
+        print(_row("first visitor", per_visitor[0]))
+        print(_row("last visitor", per_visitor[-1]))
+        print(_row("whole session", everything))
+        total = sum(m.prompt_tokens for m in everything)
+        print(f"  {'prompt tokens':<16} {total:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--visitors", type=int, default=20)
+    parser.add_argument(
+        "--gap", type=float, default=300.0, help="seconds between visitors"
+    )
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument(
+        "--ttft", type=float, default=0.02, help="simulated fixed time to first token"
+    )
+    parser.add_argument(
+        "--prefill-per-token",
+        type=float,
+        default=0.0001,
+        help="simulated extra time to first token per prompt token",
+    )
+    asyncio.run(run(parser.parse_args()))
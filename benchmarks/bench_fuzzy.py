@@ -0,0 +1,74 @@
+"""Benchmark fuzzy directory search over a large synthetic directory.
+
+Usage:
+    uv run python benchmarks/bench_fuzzy.py [--names 100000] [--queries 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fuzzy import NameMatcher
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+    return "".join(
+        rng.choice("bcdfghjklmnprstvw") + rng.choice("aeiou") for _ in range(syllables)
+    )
+
+
+def _names(rng: random.Random, count: int) -> list[str]:
+    firsts = [_word(rng, rng.randint(2, 3)) for _ in range(max(count // 30, 10))]
+    lasts = [_word(rng, rng.randint(2, 4)) for _ in range(max(count // 5, 10))]
+    names: set[str] = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(firsts)} {rng.choice(lasts)}")
+    return sorted(names)
+
+
+def _misspell(rng: random.Random, name: str) -> str:
+    i = rng.randrange(len(name))
+    return name[:i] + rng.choice("aeiouxk") + name[i + 1 :]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = _names(rng, args.names)
+
+    start = time.perf_counter()
+    matcher = NameMatcher(names)
+    build_s = time.perf_counter() - start
+
+    targets = rng.sample(names, min(args.queries, len(names)))
+    queries = [_misspell(rng, name) for name in targets]
+
+    latencies: list[float] = []
+    hits = 0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        results = matcher.search(query)
+        latencies.append(time.perf_counter() - start)
+        hits += any(names[idx] == target for idx, _ in results)
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"names:        {len(names)}")
+    print(f"build:        {build_s:.2f} s")
+    print(f"search p50:   {p50:.3f} ms")
+    print(f"search p99:   {p99:.3f} ms")
+    print(f"top-3 recall: {hits / len(queries):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Measure sessions per core for one worker job per room versus a kiosk host.
+
+Runs `--sessions` offline lobby sessions (`offline.ScriptedLLM`, text turns)
+on one event loop, each playing a visit with a turn every `--pace` seconds,
+as a lobby that is quiet most of the time does. Before each turn a session
+asks its turn detector whether the visitor has finished (the NumPy stand-in
+from `bench_turns.py`, `--layers` deep), and after it posts the reply to a
+stand-in speech endpoint served on localhost, as TTS would.
+
+In "per job" mode each session brings what a worker job creates for itself:
+its own resources (directory, intent router, response table, presence,
+visitor registry), LLM client, loop watchdog, turn detector model with its
+inference thread, and HTTP connection pool. In "kiosk" mode sessions share
+one set, as under `kiosk.KioskHost`: one `turns.TurnDetectionService` and the
+pooled `http_pool.http_session`. The speech endpoint runs in this process, so
+its CPU is counted in both modes alike. Reports, per mode and count:
+
+    cpu cores      CPU time used per second of wall time
+    per core       sessions that fit in `--max-cpu` of one core
+    lag p99 ms     99th percentile event-loop lag
+    MiB/session    resident memory added per session
+    admits         whether `kiosk.AdmissionControl` would take one more
+
+A job process also loads the agent and its resources before its first
+session; that baseline is measured in a child process and reported apart.
+
+Usage:
+    uv run python benchmarks/bench_kiosk.py [--sessions 25,50,100] [--pace 10]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import aiohttp
+import psutil
+from aiohttp import web
+from bench_turns import METHOD, _StandInRunner
+from livekit.agents import AgentSession
+from livekit.plugins.turn_detector.base import MAX_HISTORY_TURNS
+
+from agent import Assistant
+from directory import load_directory
+from http_pool import close_http_session, http_session
+from kiosk import AdmissionControl
+from loopwatch import StallWatchdog
+from offline import ScriptedLLM
+from presence import PresenceStore
+from responses import ResponseTable
+from router import IntentRouter
+from timesource import TimeProvider, set_time_provider
+from turns import TurnDetectionService
+from visitors import VisitorRegistry
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+TURNS = (
+    "Hi, I'm here to see Sarah Collins at 2099-01-01T10:30:00+00:00",
+    "Where are the toilets?",
+    "Which floor is that, floor 34?",
+    "My name is Alex Morgan",
+)
+
+JOB_BASELINE = """
+import resource, agent
+agent.load_resources()
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+# a second of 24 kHz 16-bit mono audio, about what a short reply synthesizes to
+SPEECH = bytes(48_000)
+
+
+def _resources() -> dict[str, Any]:
+    directory = load_directory()
+    return {
+        "directory": directory,
+        "router": IntentRouter(),
+        "responses": ResponseTable(),
+        "presence": PresenceStore.from_directory(directory),
+        "visitors": VisitorRegistry(),
+    }
+
+
+async def _speech_server() -> tuple[web.AppRunner, str]:
+    """Serve `SPEECH` for every POST, on a free localhost port."""
+
+    async def synthesize(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(body=SPEECH, content_type="audio/pcm")
+
+    app = web.Application()
+    app.router.add_post("/synthesize", synthesize)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    await web.SockSite(runner, sock).start()
+    return runner, f"http://127.0.0.1:{sock.getsockname()[1]}/synthesize"
+
+
+def _eou_request(session: AgentSession, text: str) -> bytes:
+    # what `MultilingualModel.predict_end_of_turn` sends its executor; the model
+    # itself needs its files from the Hugging Face hub
+    chat_ctx = [
+        {"role": item.role, "content": item.text_content}
+        for item in session.history.items
+        if item.type == "message" and item.text_content
+    ]
+    chat_ctx.append({"role": "user", "content": text})
+    return json.dumps({"chat_ctx": chat_ctx[-MAX_HISTORY_TURNS:]}).encode()
+
+
+async def _visits(
+    resources: dict[str, Any],
+    llm: ScriptedLLM,
+    turns: TurnDetectionService,
+    http: aiohttp.ClientSession,
+    url: str,
+    pace: float,
+) -> None:
+    async with AgentSession(llm=llm) as session:
+        await session.start(Assistant(**resources))
+        # lobbies don't all talk in step
+        await asyncio.sleep(random.uniform(0, pace))
+        while True:
+            for text in TURNS:
+                await turns.do_inference(METHOD, _eou_request(session, text))
+                result = await session.run(user_input=text)
+                reply = " ".join(
+                    ev.item.text_content or ""
+                    for ev in result.events
+                    if ev.type == "message"
+                )
+                async with http.post(url, data=reply) as response:
+                    await response.read()
+                await asyncio.sleep(pace)
+
+
+async def _run(args: argparse.Namespace, sessions: int, shared: bool) -> list[str]:
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    shared_resources = _resources() if shared else None
+    shared_llm = ScriptedLLM(ttft=args.ttft) if shared else None
+    tasks: list[asyncio.Task[None]] = []
+    watchdogs: list[StallWatchdog] = []
+    services: list[TurnDetectionService] = []
+    clients: list[aiohttp.ClientSession] = []
+    for _ in range(sessions):
+        if shared:
+            resources, llm, http = shared_resources, shared_llm, http_session()
+        else:
+            # a job process builds these in its prewarm, off this loop
+            resources = await asyncio.to_thread(_resources)
+            llm = ScriptedLLM(ttft=args.ttft)
+            http = aiohttp.ClientSession()
+            clients.append(http)
+        if not shared or not watchdogs:
+            # every job watches its own loop and loads its own turn detector,
+            # the host has one of each
+            watchdog = StallWatchdog()
+            watchdog.start()
+            watchdogs.append(watchdog)
+            services.append(TurnDetectionService(lambda _: _StandInRunner(args.layers)))
+        tasks.append(
+            asyncio.create_task(
+                _visits(resources, llm, services[-1], http, args.url, args.pace)
+            )
+        )
+
+    admission = AdmissionControl(max_cpu=args.max_cpu, max_lag=args.max_lag)
+    admission.start()
+    await asyncio.sleep(args.pace)  # let every session start talking
+    rss = process.memory_info().rss - rss_before
+
+    loop = asyncio.get_running_loop()
+    lags = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    end = loop.time() + args.duration
+    while (before := loop.time()) < end:
+        await asyncio.sleep(0.02)
+        lags.append(loop.time() - before - 0.02)
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    admits = admission.admits()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for watchdog in watchdogs:
+        await watchdog.aclose()
+    for service in services:
+        await service.aclose()
+    for client in clients:
+        await client.close()
+    await close_http_session()
+    await admission.aclose()
+
+    return [
+        f"{cpu:.3f}",
+        f"{sessions * args.max_cpu / cpu:.0f}",
+        f"{statistics.quantiles(lags, n=100)[98] * 1000:.1f}",
+        f"{rss / sessions / 2**20:.2f}",
+        "yes" if admits else "no",
+    ]
+
+
+def _job_baseline() -> float:
+    """Peak resident memory of a process that loaded the agent, in MiB."""
+    out = subprocess.run(
+        [sys.executable, "-c", JOB_BASELINE],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return int(out.stdout.split()[-1]) / 1024
+
+
+async def run(args: argparse.Namespace) -> None:
+    set_time_provider(TimeProvider(None))
+    server, args.url = await _speech_server()
+    columns = ("cpu cores", "per core", "lag p99 ms", "MiB/session", "admits")
+    print(
+        f"one turn per session every {args.pace:.0f} s; budget "
+        f"{args.max_cpu:.2f} cores, {args.max_lag * 1000:.0f} ms loop lag"
+    )
+    print(f"{'mode':<8} {'sessions':>8}" + "".join(f" {c:>11}" for c in columns))
+    for sessions in args.sessions:
+        for mode, shared in (("per job", False), ("kiosk", True)):
+            row = await _run(args, sessions, shared)
+            print(f"{mode:<8} {sessions:>8}" + "".join(f" {v:>11}" for v in row))
+    await server.cleanup()
+    print(f"per job, before its session: {_job_baseline():.0f} MiB per process")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sessions",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[25, 50, 100],
+    )
+    parser.add_argument(
+        "--pace", type=float, default=10.0, help="seconds between a session's turns"
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--max-cpu", type=float, default=0.75)
+    parser.add_argument("--max-lag", type=float, default=0.05)
+    parser.add_argument(
+        "--ttft", type=float, default=0.05, help="simulated LLM time to first token"
+    )
+    parser.add_argument(
+        "--layers", type=int, default=2, help="depth of the turn detector stand-in"
+    )
+    asyncio.run(run(parser.parse_args()))
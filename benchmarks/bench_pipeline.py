@@ -0,0 +1,210 @@
+"""Measure the voice pipeline's latency end to end, replaying recorded providers.
+
+`record` runs one visit against the live providers (LiveKit Cloud
+credentials needed): each `--wav` file (16-bit PCM) is one thing the caller
+says, followed by `--gap` seconds of silence for the agent to answer. What the
+STT, LLM and TTS send back, and when, is saved to a tape (see `replay.Tape`).
+
+`replay` plays the tape's visit `--runs` times through an `Assistant` session
+with no network: the caller's audio in real time, into the Silero VAD and
+`replay.ReplaySTT`, `ReplayLLM` and `ReplayTTS`, which answer with the recorded
+timing. Everything else (VAD, endpointing, the agent's nodes and tools, the
+session's scheduling) runs for real, so a change to any of it shows up here,
+the same from one run to the next. Turns end on the VAD alone, since the
+turn detector needs the worker's inference process. Reports, per stage, the
+p50 and p99 over all turns and the spread of the p50 across runs:
+
+    eou          end of speech to end of turn (the session's EOU metrics)
+    stt          end of speech to final transcript
+    llm ttft     request to first LLM token
+    tts ttfb     request to first TTS audio
+    reply        the VAD's end of speech to the reply starting to play
+
+Usage:
+    uv run python benchmarks/bench_pipeline.py record --tape visit.tape --wav hi.wav
+    uv run python benchmarks/bench_pipeline.py replay --tape visit.tape [--runs 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import wave
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from livekit import rtc
+from livekit.agents import AgentSession, UserStateChangedEvent
+from livekit.plugins import silero
+
+from agent import Assistant, create_models
+from latency import LatencyRecorder
+from replay import (
+    PacedAudioInput,
+    PlayoutAudioOutput,
+    RecordingLLM,
+    RecordingSTT,
+    RecordingTTS,
+    ReplayLLM,
+    ReplaySTT,
+    ReplayTTS,
+    Tape,
+)
+from timesource import TimeProvider, set_time_provider
+from visitors import VisitorRegistry
+
+SAMPLE_RATE = 24000
+FRAME = SAMPLE_RATE // 50
+
+STAGES = {
+    "eou": "end_of_utterance",
+    "stt": "stt_final",
+    "llm ttft": "llm_ttft",
+    "tts ttfb": "tts_ttfb",
+    "reply": "reply",
+}
+
+
+class _Samples(LatencyRecorder):
+    """Keeps every sample, for exact quantiles, instead of histograms."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.samples: defaultdict[str, list[float]] = defaultdict(list)
+
+    def observe(self, stage: str, seconds: float, **labels: str) -> None:
+        self.samples[stage].append(seconds)
+
+
+def _read_wav(path: Path) -> list[rtc.AudioFrame]:
+    with wave.open(str(path), "rb") as f:
+        if f.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit PCM is supported")
+        rate, channels = f.getframerate(), f.getnchannels()
+        data = f.readframes(f.getnframes())
+    resampler = rtc.AudioResampler(rate, SAMPLE_RATE, num_channels=channels)
+    frames = resampler.push(
+        rtc.AudioFrame(data, rate, channels, len(data) // (2 * channels))
+    )
+    return [*frames, *resampler.flush()]
+
+
+def _caller(paths: list[Path], gap: float) -> list[rtc.AudioFrame]:
+    frames: list[rtc.AudioFrame] = []
+    for path in paths:
+        frames += _read_wav(path)
+        silence = rtc.AudioFrame.create(SAMPLE_RATE, frames[-1].num_channels, FRAME)
+        frames += [silence] * int(gap * SAMPLE_RATE / FRAME)
+    return frames
+
+
+async def _visit(
+    session: AgentSession, frames: list[rtc.AudioFrame], tail: float
+) -> _Samples:
+    """Play the caller's audio through `session`, and time each reply."""
+    recorder = _Samples()
+    recorder.attach(session)
+    ends: list[float] = []
+
+    def on_user_state(ev: UserStateChangedEvent) -> None:
+        if ev.old_state == "speaking":
+            ends.append(time.perf_counter())
+
+    session.on("user_state_changed", on_user_state)
+    audio_input = PacedAudioInput(frames)
+    audio_output = PlayoutAudioOutput()
+    session.input.audio = audio_input
+    session.output.audio = audio_output
+    async with session:
+        await session.start(Assistant(visitors=VisitorRegistry()))
+        await audio_input.done.wait()
+        await asyncio.sleep(tail)
+
+    # each reply answers the last end of speech before it
+    for i, end in enumerate(ends):
+        following = ends[i + 1] if i + 1 < len(ends) else float("inf")
+        started = [t for t in audio_output.started if end <= t < following]
+        if started:
+            recorder.observe("reply", started[0] - end)
+    return recorder
+
+
+async def record(args: argparse.Namespace) -> None:
+    tape = Tape()
+    models = create_models(silero.VAD.load())
+    session = AgentSession(
+        stt=RecordingSTT(models.stt, tape),
+        llm=RecordingLLM(models.llm, tape),
+        tts=RecordingTTS(models.tts, tape),
+        vad=models.vad,
+        turn_detection="vad",
+        preemptive_generation=True,
+    )
+    await _visit(session, _caller(args.wav, args.gap), args.tail)
+    tape.save(args.tape)
+    kinds = ", ".join(f"{len(tape.of(k))} {k}" for k in ("stt", "llm", "tts"))
+    print(f"recorded {kinds} takes to {args.tape}")
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}"
+
+
+async def replay(args: argparse.Namespace) -> None:
+    tape = Tape.load(args.tape)
+    frames = list(tape.caller_audio())
+    vad = silero.VAD.load()
+    runs: list[_Samples] = []
+    for _ in range(args.runs):
+        session = AgentSession(
+            stt=ReplaySTT(tape),
+            llm=ReplayLLM(tape),
+            tts=ReplayTTS(tape),
+            vad=vad,
+            turn_detection="vad",
+            preemptive_generation=True,
+        )
+        runs.append(await _visit(session, frames, args.tail))
+
+    seconds = sum(frame.duration for frame in frames)
+    print(f"{seconds:.1f} s of caller audio, {args.runs} runs")
+    columns = ("turns", "p50 ms", "p99 ms", "p50 spread")
+    print(f"{'stage':<10}" + "".join(f" {c:>11}" for c in columns))
+    for name, stage in STAGES.items():
+        samples = [s for run in runs for s in run.samples[stage]]
+        if len(samples) < 2:
+            print(f"{name:<10} {len(samples):>11}")
+            continue
+        quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+        medians = [statistics.median(run.samples[stage] or [0.0]) for run in runs]
+        row = (
+            str(len(samples) // args.runs),
+            _ms(quantiles[49]),
+            _ms(quantiles[98]),
+            _ms(max(medians) - min(medians)),
+        )
+        print(f"{name:<10}" + "".join(f" {v:>11}" for v in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record a visit to a tape")
+    record_parser.add_argument("--wav", type=Path, nargs="+", required=True)
+    record_parser.add_argument(
+        "--gap", type=float, default=6.0, help="seconds of silence after each file"
+    )
+    replay_parser = commands.add_parser("replay", help="replay a tape's visit")
+    replay_parser.add_argument("--runs", type=int, default=5)
+    for command in (record_parser, replay_parser):
+        command.add_argument("--tape", type=Path, required=True)
+        command.add_argument(
+            "--tail", type=float, default=3.0, help="seconds to wait after the audio"
+        )
+    args = parser.parse_args()
+    # the lobby's local time, without asking a remote clock
+    set_time_provider(TimeProvider(None))
+    asyncio.run(record(args) if args.command == "record" else replay(args))
@@ -0,0 +1,156 @@
+"""Benchmark the intent router: hit rate, accuracy and latency saved.
+
+Classifies a labelled corpus of lobby utterances and reports how many of the
+routable ones are answered without the LLM (hit rate), how many utterances
+are routed to the wrong answer (false routes), and how long routing takes.
+
+Latency saved is measured, not assumed: every routed utterance is also run
+through the normal LLM path of an offline session (`offline.ScriptedLLM`, with
+`--ttft` simulating the model's time to first token), and the difference is
+reported per hit.
+
+Usage:
+    uv run python benchmarks/bench_router.py [--ttft 0.35] [--repeat 1000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from livekit.agents import AgentSession
+
+from agent import Assistant
+from offline import ScriptedLLM
+from router import IntentRouter
+from timesource import TimeProvider, set_time_provider
+
+# (utterance, expected route or None when the LLM should answer)
+CORPUS: tuple[tuple[str, str | None], ...] = (
+    ("Hello", "greeting"),
+    ("Hi there", "greeting"),
+    ("Good morning!", "greeting"),
+    ("Good afternoon", "greeting"),
+    ("Hey", "greeting"),
+    ("Where are the bathrooms?", "building_info:bathroom"),
+    ("Where's the toilet?", "building_info:bathroom"),
+    ("Is there a loo nearby?", "building_info:bathroom"),
+    ("Can you tell me where the restroom is?", "building_info:bathroom"),
+    ("I need the gents", "building_info:bathroom"),
+    ("Which way to the ladies?", "building_info:bathroom"),
+    ("Where are the lifts?", "building_info:lifts"),
+    ("Where is the elevator?", "building_info:lifts"),
+    ("Which way to the lift?", "building_info:lifts"),
+    ("Where can I wait?", "building_info:waiting area"),
+    ("Is there a waiting room?", "building_info:waiting area"),
+    ("Where can I find somewhere to sit?", "building_info:waiting area"),
+    ("How do I get to floor 34?", "directions:34"),
+    ("Which lift do I take for floor 21?", "directions:21"),
+    ("I need to go to the 42nd floor", "directions:42"),
+    ("Floor 7 please", "directions:7"),
+    ("Where is floor sixty?", "directions:60"),
+    ("How do I get to the thirty-fourth floor?", "directions:34"),
+    ("Which lifts go to floor 70?", "directions:70"),
+    ("I'm here to see Sarah Collins", None),
+    ("Hi, I'm here to meet James Patel at 10:30", None),
+    ("Good morning, I have a meeting with Emily Wong", None),
+    ("I have a meeting on floor 34 with Sarah", None),
+    ("Is James in the building today?", None),
+    ("What's the weather like in London?", None),
+    ("Can you check me in? My name is Alex Morgan", None),
+    ("Has my guest arrived yet?", None),
+    ("How long will I have to wait?", None),
+    ("Where's the nearest tube station?", None),
+    ("Where can I get a coffee?", None),
+    ("Can I leave my bag with you?", None),
+    ("Thank you so much", None),
+    ("Sorry, could you say that again?", None),
+    ("Is there wifi I can use?", None),
+    ("I'm here for a job interview", None),
+)
+
+
+def _label(route) -> str | None:
+    if route is None:
+        return None
+    if route.intent == "building_info":
+        return f"building_info:{route.topic}"
+    if route.intent == "directions":
+        return f"directions:{route.floor}"
+    return route.intent
+
+
+async def _llm_turn_seconds(texts: list[str], ttft: float) -> dict[str, float]:
+    set_time_provider(TimeProvider(None))
+    seconds = {}
+    async with (
+        ScriptedLLM(ttft=ttft) as scripted,
+        AgentSession(llm=scripted) as session,
+    ):
+        await session.start(Assistant())
+        for text in texts:
+            start = time.perf_counter()
+            await session.run(user_input=text)
+            seconds[text] = time.perf_counter() - start
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--ttft", type=float, default=0.35, help="simulated LLM time to first token"
+    )
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--margin", type=float, default=0.1)
+    args = parser.parse_args()
+
+    router = IntentRouter(threshold=args.threshold, margin=args.margin)
+
+    hits, false_routes, routable = [], [], 0
+    for text, expected in CORPUS:
+        got = _label(router.route(text))
+        routable += expected is not None
+        if got is not None and got == expected:
+            hits.append(text)
+        elif got is not None:
+            false_routes.append((text, expected, got))
+
+    timings = []
+    for _ in range(args.repeat):
+        for text, _ in CORPUS:
+            start = time.perf_counter()
+            router.route(text)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    llm_seconds = asyncio.run(_llm_turn_seconds(hits, args.ttft))
+    route_mean = statistics.fmean(timings)
+    saved = [llm_seconds[text] - route_mean for text in hits]
+
+    print(f"corpus: {len(CORPUS)} utterances, {routable} routable")
+    print(f"  hit rate        {len(hits) / routable:.0%} ({len(hits)}/{routable})")
+    print(f"  false routes    {len(false_routes)}")
+    for text, expected, got in false_routes:
+        print(f"    {text!r}: expected {expected}, got {got}")
+    print(
+        f"  route latency   mean {route_mean * 1e6:.0f} us,"
+        f" p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us"
+    )
+    if saved:
+        print(
+            f"  saved per hit   mean {statistics.fmean(saved) * 1000:.0f} ms"
+            f" (LLM path with {args.ttft * 1000:.0f} ms TTFT)"
+        )
+        print(
+            f"  saved per turn  {sum(saved) / len(CORPUS) * 1000:.0f} ms"
+            " averaged over the whole corpus"
+        )
+
+
+if __name__ == "__main__":
+    main()
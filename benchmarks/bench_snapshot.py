@@ -0,0 +1,128 @@
+"""Benchmark cold loads of a large directory: parsing JSON vs opening a snapshot.
+
+Generates a directory of `--people` people, writes it as JSON and compiles it
+into a snapshot (`src/snapshot.py`), then starts `--jobs` fresh processes per
+format, as job processes load the directory in `prewarm`. Each one loads the
+directory, then times exact lookups and misheard-name searches. Reports, per
+process:
+
+    load ms      loading the directory, ready for lookups
+    lookup us    one exact `lookup` (mean)
+    resolve ms   one `resolve` of a misheard name (mean)
+    rss MiB      resident memory added by the load and the queries
+    uss MiB      of which not shared with any other process
+
+Usage:
+    uv run python benchmarks/bench_snapshot.py [--people 100000] [--jobs 4]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from directory import Person, load_directory
+from snapshot import build_snapshot
+
+FIRST = (
+    "Sarah", "James", "Emily", "Priya", "Tomasz", "Aoife", "Kwame", "Li", "Maria",
+    "Yusuf", "Hannah", "Oliver", "Chloe", "Arjun", "Sofia", "Ewan",
+)  # fmt: skip
+LAST = (
+    "Collins", "Patel", "Wong", "Nowak", "O'Brien", "Mensah", "Zhang", "Smith",
+    "Garcia", "Khan", "Murphy", "Rossi", "Kowalski", "Okafor", "Lindqvist", "Reyes",
+)  # fmt: skip
+
+
+def _people(count: int) -> list[Person]:
+    rng = random.Random(0)
+    return [
+        Person(
+            f"{rng.choice(FIRST)} {rng.choice(LAST)}-{i:x}",
+            f"Company {i % 997}",
+            rng.randint(1, 72),
+            rng.random() < 0.5,
+        )
+        for i in range(count)
+    ]
+
+
+def _misheard(name: str) -> str:
+    # what the STT makes of it: a dropped letter and no punctuation
+    return name.replace("-", " ").replace("h", "", 1)
+
+
+def _job(path: str, names: list[str], queue: mp.Queue) -> None:
+    process = psutil.Process()
+    before = process.memory_full_info()
+    start = time.perf_counter()
+    directory = load_directory(path)
+    loaded = time.perf_counter()
+    for name in names:
+        directory.lookup(name)
+    looked_up = time.perf_counter()
+    for name in names[:50]:
+        directory.resolve(_misheard(name))
+    resolved = time.perf_counter()
+    after = process.memory_full_info()
+    queue.put(
+        [
+            (loaded - start) * 1000,
+            (looked_up - loaded) / len(names) * 1e6,
+            (resolved - looked_up) / 50 * 1000,
+            (after.rss - before.rss) / 2**20,
+            (after.uss - before.uss) / 2**20,
+        ]
+    )
+
+
+def _run(path: Path, names: list[str], jobs: int) -> list[list[float]]:
+    # spawned, so they don't inherit the generated directory from this process
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    procs = [
+        ctx.Process(target=_job, args=(str(path), names, queue)) for _ in range(jobs)
+    ]
+    for proc in procs:
+        proc.start()
+    rows = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return rows
+
+
+def run(args: argparse.Namespace) -> None:
+    people = _people(args.people)
+    names = [person.name for person in random.Random(1).sample(people, 1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp, "directory.json")
+        source.write_text(json.dumps([person._asdict() for person in people]))
+        start = time.perf_counter()
+        compiled = Path(tmp, "directory.snap")
+        build_snapshot(people, compiled)
+        print(
+            f"{args.people} people: JSON {source.stat().st_size / 2**20:.1f} MiB, "
+            f"snapshot {compiled.stat().st_size / 2**20:.1f} MiB, "
+            f"built in {time.perf_counter() - start:.1f} s"
+        )
+
+        columns = ("load ms", "lookup us", "resolve ms", "rss MiB", "uss MiB")
+        print(f"{'format':<9}" + "".join(f" {c:>11}" for c in columns))
+        for label, path in (("json", source), ("snapshot", compiled)):
+            for row in _run(path, names, args.jobs):
+                print(f"{label:<9}" + "".join(f" {v:>11.2f}" for v in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--people", type=int, default=100_000)
+    parser.add_argument("--jobs", type=int, default=4)
+    run(parser.parse_args())
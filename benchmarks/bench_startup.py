@@ -0,0 +1,141 @@
+"""Benchmark worker startup: import time, prewarm time and memory per job process.
+
+Starts `--jobs` processes the way LiveKit starts job processes and reports, for
+each one, how long importing `agent` and running `prewarm` took, plus its RSS
+and USS (memory not shared with any other process).
+
+Modes:
+    spawn       every process imports and loads everything itself
+    forkserver  shared resources are preloaded once in the forkserver and
+                inherited copy-on-write (what `enable_forkserver_preload` does)
+
+Usage:
+    uv run python benchmarks/bench_startup.py [--jobs 4] [--mode both] [--lazy]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+sys.path.insert(0, SRC)
+
+
+class _Proc:
+    def __init__(self) -> None:
+        self.userdata: dict = {}
+
+
+def _job(queue: mp.Queue) -> None:
+    start = time.perf_counter()
+    import agent
+
+    imported = time.perf_counter()
+    agent.prewarm(_Proc())
+    prewarmed = time.perf_counter()
+
+    mem = psutil.Process().memory_full_info()
+    queue.put(
+        {
+            "pid": os.getpid(),
+            "import_ms": (imported - start) * 1000,
+            "prewarm_ms": (prewarmed - imported) * 1000,
+            "rss_mb": mem.rss / 2**20,
+            "uss_mb": mem.uss / 2**20,
+        }
+    )
+
+
+def _main_import_ms(lazy: bool) -> float:
+    env = {**os.environ, "AGENT_LAZY_IMPORTS": "1" if lazy else "0"}
+    code = (
+        "import time; s = time.perf_counter(); import agent; "
+        "print((time.perf_counter() - s) * 1000)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SRC,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _run(mode: str, jobs: int) -> list[dict]:
+    ctx = mp.get_context(mode)
+    if mode == "forkserver":
+        os.environ["AGENT_FORKSERVER_PRELOAD"] = "1"
+        ctx.set_forkserver_preload(
+            [
+                "livekit.agents",
+                "livekit.plugins.silero",
+                "livekit.plugins.turn_detector",
+                "livekit.plugins.noise_cancellation",
+                "startup",
+            ]
+        )
+    else:
+        os.environ.pop("AGENT_FORKSERVER_PRELOAD", None)
+
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_job, args=(queue,)) for _ in range(jobs)]
+    # start one job first so the forkserver's preload isn't counted against the rest
+    procs[0].start()
+    results = [queue.get()]
+    for proc in procs[1:]:
+        proc.start()
+    results += [queue.get() for _ in procs[1:]]
+    for proc in procs:
+        proc.join()
+    return results
+
+
+def _report(mode: str, results: list[dict]) -> None:
+    print(f"\n{mode}:")
+    print(
+        f"  {'pid':>8} {'import ms':>10} {'prewarm ms':>11} {'rss MB':>8} {'uss MB':>8}"
+    )
+    for r in results:
+        print(
+            f"  {r['pid']:>8} {r['import_ms']:>10.1f} {r['prewarm_ms']:>11.1f}"
+            f" {r['rss_mb']:>8.1f} {r['uss_mb']:>8.1f}"
+        )
+    rest = results[1:] or results
+    print(
+        f"  steady state: import {sum(r['import_ms'] for r in rest) / len(rest):.1f} ms,"
+        f" prewarm {sum(r['prewarm_ms'] for r in rest) / len(rest):.1f} ms,"
+        f" uss {sum(r['uss_mb'] for r in rest) / len(rest):.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument(
+        "--mode", choices=["spawn", "forkserver", "both"], default="both"
+    )
+    parser.add_argument(
+        "--lazy", action="store_true", help="run the jobs with AGENT_LAZY_IMPORTS=1"
+    )
+    args = parser.parse_args()
+
+    print(f"main process import: {_main_import_ms(lazy=False):.1f} ms")
+    print(f"main process import (lazy): {_main_import_ms(lazy=True):.1f} ms")
+
+    if args.lazy:
+        os.environ["AGENT_LAZY_IMPORTS"] = "1"
+    modes = ["spawn", "forkserver"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        _report(mode, _run(mode, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Measure end-of-turn decisions per second and their p99 latency under load.
+
+Runs `--sessions` sessions on one event loop, each asking for an end-of-turn
+decision at random (Poisson) intervals, `--rate` times a second on average,
+as a caller's pauses do. Compares three ways of serving them:
+
+    per session   every session has its own model and runs each request on
+                  its own thread as it comes, as `MultilingualModel()` per
+                  session does without a shared executor
+    serial        one `turns.TurnDetectionService` without batching: one
+                  queue, one request at a time
+    batched       one `TurnDetectionService` running the requests waiting
+                  together as one batch (`--max-batch`, `--max-wait`)
+
+Reports decisions per second, p50 and p99 decision latency, CPU used (in
+cores) and the mean batch size. Batching can only gain as much as a request
+is cheaper in a batch than alone, which is measured first.
+
+The multilingual turn detector is used if its model files are downloaded
+(`uv run python src/agent.py download-files`). Otherwise a NumPy stand-in
+runs instead: `--layers` of the model's MLP blocks (576 wide, 1536 hidden)
+over the chat context's bytes as tokens, truncated to the model's 128.
+
+Usage:
+    uv run python benchmarks/bench_turns.py [--sessions 10,50,100] [--rate 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+from livekit.plugins.turn_detector.base import MAX_HISTORY_TOKENS
+from livekit.plugins.turn_detector.multilingual import _EUORunnerMultilingual
+
+from turns import BatchRunner, Runner, TurnDetectionService, _load_runner
+
+METHOD = _EUORunnerMultilingual.INFERENCE_METHOD
+WIDTH = 576
+HIDDEN = 1536
+
+UTTERANCES = (
+    "Hi, I'm here to see Sarah Collins",
+    "I have a meeting at half ten",
+    "Where are the toilets?",
+    "Which floor is that",
+    "My name is Alex Morgan and I'm",
+    "Thanks, is there somewhere I can wait",
+)
+
+
+def _request(session: int, turn: int) -> bytes:
+    text = UTTERANCES[(session + turn) % len(UTTERANCES)]
+    chat_ctx = [
+        {"role": "assistant", "content": "Hello, welcome in! How can I help?"},
+        {"role": "user", "content": text},
+    ]
+    return json.dumps({"chat_ctx": chat_ctx}).encode()
+
+
+class _StandInRunner:
+    """MLP blocks over byte tokens: the cost shape of a small causal LM."""
+
+    def __init__(self, layers: int) -> None:
+        rng = np.random.default_rng(0)
+        self._embedding = rng.standard_normal((256, WIDTH), np.float32)
+        self._layers = [
+            (
+                rng.standard_normal((WIDTH, HIDDEN), np.float32) / WIDTH**0.5,
+                rng.standard_normal((HIDDEN, WIDTH), np.float32) / HIDDEN**0.5,
+            )
+            for _ in range(layers)
+        ]
+
+    def _tokens(self, data: bytes) -> np.ndarray:
+        chat_ctx = json.loads(data)["chat_ctx"]
+        text = " ".join(message["content"] for message in chat_ctx)
+        return np.frombuffer(text.encode()[-MAX_HISTORY_TOKENS:], np.uint8)
+
+    def _probabilities(self, ids: list[np.ndarray]) -> list[float]:
+        width = max(len(seq) for seq in ids)
+        tokens = np.zeros((len(ids), width), np.uint8)
+        for row, seq in enumerate(ids):
+            tokens[row, : len(seq)] = seq
+        x = self._embedding[tokens]
+        for up, down in self._layers:
+            x = x + np.maximum(x @ up, 0) @ down
+        last = x[np.arange(len(ids)), [len(seq) - 1 for seq in ids]]
+        return (1 / (1 + np.exp(-np.tanh(last).mean(axis=-1)))).tolist()
+
+    def run(self, data: bytes) -> bytes | None:
+        return self.run_batch([data])[0]
+
+    def run_batch(self, batch: Sequence[bytes]) -> list[bytes | None]:
+        probabilities = self._probabilities([self._tokens(data) for data in batch])
+        return [json.dumps({"eou_probability": p}).encode() for p in probabilities]
+
+
+def _new_runner(args: argparse.Namespace, real: bool) -> Runner:
+    return _load_runner(METHOD) if real else _StandInRunner(args.layers)
+
+
+def _cpu_per_request(runner: Runner, requests: list[bytes], size: int) -> float:
+    start = time.process_time()
+    for _ in range(3):
+        for i in range(0, len(requests), size):
+            if isinstance(runner, BatchRunner):
+                runner.run_batch(requests[i : i + size])
+            else:
+                for data in requests[i : i + size]:
+                    runner.run(data)
+    return (time.process_time() - start) / (3 * len(requests))
+
+
+async def _load(
+    args: argparse.Namespace, sessions: int, ask
+) -> tuple[list[float], float, float]:
+    """Return each decision's latency, the wall time and the CPU time."""
+    latencies: list[float] = []
+    loop = asyncio.get_running_loop()
+    end = loop.time() + args.duration
+
+    async def session(index: int) -> None:
+        turn = 0
+        while True:
+            pause = random.expovariate(args.rate)
+            if loop.time() + pause >= end:
+                return
+            await asyncio.sleep(pause)
+            start = time.perf_counter()
+            await ask(index, _request(index, turn))
+            latencies.append(time.perf_counter() - start)
+            turn += 1
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return latencies, time.perf_counter() - wall, time.process_time() - cpu
+
+
+async def _run(
+    args: argparse.Namespace, sessions: int, mode: str, real: bool
+) -> list[str]:
+    random.seed(sessions)
+    batches = None
+    if mode == "per session":
+        runners = [_new_runner(args, real) for _ in range(sessions)]
+
+        async def ask(index: int, data: bytes) -> None:
+            await asyncio.to_thread(runners[index].run, data)
+
+        latencies, wall, cpu = await _load(args, sessions, ask)
+    else:
+        runner = _new_runner(args, real)
+        service = TurnDetectionService(
+            lambda _: runner,
+            max_batch=args.max_batch if mode == "batched" else 1,
+            max_wait=args.max_wait,
+        )
+
+        async def ask(index: int, data: bytes) -> None:
+            await service.do_inference(METHOD, data)
+
+        try:
+            latencies, wall, cpu = await _load(args, sessions, ask)
+        finally:
+            await service.aclose()
+        batches = service.requests / max(service.batches, 1)
+
+    p50, p99 = (statistics.quantiles(latencies, n=100)[i] * 1000 for i in (49, 98))
+    return [
+        f"{len(latencies) / wall:.1f}",
+        f"{p50:.1f}",
+        f"{p99:.1f}",
+        f"{cpu / wall:.2f}",
+        f"{batches:.1f}" if batches is not None else "-",
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        _load_runner(METHOD)
+    except RuntimeError:
+        real = False
+        print(f"no model files, using the NumPy stand-in ({args.layers} layers)")
+    else:
+        real = True
+
+    # how much cheaper a request is in a batch bounds what batching can gain
+    runner = _new_runner(args, real)
+    requests = [_request(i, 0) for i in range(args.max_batch)]
+    alone = _cpu_per_request(runner, requests, 1)
+    batched = _cpu_per_request(runner, requests, args.max_batch)
+    print(
+        f"CPU per request: {alone * 1000:.1f} ms alone, "
+        f"{batched * 1000:.1f} ms in batches of {args.max_batch}"
+    )
+
+    columns = ("decisions/s", "p50 ms", "p99 ms", "cpu cores", "batch")
+    print(
+        f"{args.rate} requests/s per session for {args.duration:.0f} s; "
+        f"batches of up to {args.max_batch}, waiting {args.max_wait * 1000:.0f} ms"
+    )
+    print(f"{'mode':<12} {'sessions':>8}" + "".join(f" {c:>11}" for c in columns))
+    for sessions in args.sessions:
+        for mode in ("per session", "serial", "batched"):
+            row = await _run(args, sessions, mode, real)
+            print(f"{mode:<12} {sessions:>8}" + "".join(f" {v:>11}" for v in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sessions",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[10, 50, 100],
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0.5, help="requests per second per session"
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.002)
+    parser.add_argument(
+        "--layers", type=int, default=8, help="depth of the NumPy stand-in"
+    )
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,112 @@
+"""Measure prompt size and tool calls for one visit, with and without visit state.
+
+Plays the same five-turn visit through an offline session twice. The
+"restated" model passes every argument again on every call and looks the
+contact up again to learn their floor, as it must when tools are stateless.
+The "stateful" model relies on the session's `VisitState`: it leaves out the
+contact, meeting time and floor once a tool has resolved them. Reports, per
+visit:
+
+    requests      LLM requests
+    tool calls    function tool calls
+    prompt chars  characters of chat context sent, summed over all requests
+    arg chars     characters of tool call arguments the model generated
+
+Usage:
+    uv run python benchmarks/bench_visit.py
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from livekit.agents import AgentSession, llm
+
+from agent import Assistant
+from offline import ScriptedLLM, Step, ToolCall
+from timesource import TimeProvider, set_time_provider
+from visitors import VisitorRegistry
+
+MEETING = "2099-01-01T10:30:00+00:00"
+
+TURNS = (
+    "Hi, I'm here to see Sarah Collins",
+    f"My meeting is at {MEETING}, how long will I wait?",
+    "Is she actually in yet?",
+    "Which floor do I go to?",
+    "My name is Alex Morgan",
+)
+
+RESTATED: tuple[tuple[ToolCall, ...], ...] = (
+    (ToolCall("lookup_directory", {"name": "Sarah Collins"}),),
+    (ToolCall("get_wait_time", {"contact": "Sarah Collins", "time": MEETING}),),
+    (ToolCall("check_available", {"name": "Sarah Collins"}),),
+    (
+        ToolCall("lookup_directory", {"name": "Sarah Collins"}),
+        ToolCall("get_directions", {"floor": 34}),
+    ),
+    (ToolCall("check_in", {"name": "Alex Morgan"}),),
+)
+
+STATEFUL: tuple[tuple[ToolCall, ...], ...] = (
+    (ToolCall("lookup_directory", {"name": "Sarah Collins"}),),
+    (ToolCall("get_wait_time", {"time": MEETING}),),
+    (ToolCall("check_available", {}),),
+    (ToolCall("get_directions", {}),),
+    (ToolCall("check_in", {"name": "Alex Morgan"}),),
+)
+
+
+def _chars(chat_ctx: llm.ChatContext) -> int:
+    chars = 0
+    for item in chat_ctx.items:
+        if item.type == "message":
+            chars += len(item.text_content or "")
+        elif item.type == "function_call":
+            chars += len(item.name) + len(item.arguments)
+        elif item.type == "function_call_output":
+            chars += len(item.output)
+    return chars
+
+
+async def _visit(plan: tuple[tuple[ToolCall, ...], ...]) -> dict[str, int]:
+    stats = {"requests": 0, "tool calls": 0, "prompt chars": 0, "arg chars": 0}
+    pending: list[ToolCall] = []
+
+    def script(chat_ctx: llm.ChatContext) -> Step:
+        stats["requests"] += 1
+        stats["prompt chars"] += _chars(chat_ctx)
+        if pending:
+            call = pending.pop(0)
+            stats["tool calls"] += 1
+            stats["arg chars"] += len(json.dumps(call.arguments))
+            return [call]
+        output = chat_ctx.items[-1]
+        return output.output if output.type == "function_call_output" else "Sure."
+
+    async with (
+        ScriptedLLM(script) as scripted,
+        AgentSession(llm=scripted) as session,
+    ):
+        await session.start(Assistant(visitors=VisitorRegistry()))
+        for calls, text in zip(plan, TURNS):
+            pending[:] = calls
+            await session.run(user_input=text)
+    return stats
+
+
+async def run() -> None:
+    set_time_provider(TimeProvider(None))
+    before = await _visit(RESTATED)
+    after = await _visit(STATEFUL)
+    print(f"{'per visit':<14} {'restated':>9} {'stateful':>9} {'change':>8}")
+    for key in before:
+        change = (after[key] - before[key]) / before[key]
+        print(f"{key:<14} {before[key]:>9} {after[key]:>9} {change:>+8.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,234 @@
+"""Offline load test of the Assistant's session loop and tools.
+
+Runs `--sessions` concurrent `AgentSession`s in one process, each driving the
+`Assistant` through `--turns` text turns answered by the scripted LLM in
+`offline.py`, so nothing touches the network and no model is billed. Reports:
+
+    tool calls/s        function tool calls completed per second, all sessions
+    turn p50/p99        time from user input to the end of the agent's reply
+    loop lag p99/max    how late a 10 ms timer fires; a blocking call in an
+                        async tool shows up here first
+    memory/session      RSS growth after starting the sessions, per session
+    tool p99            per tool, from the latency histograms
+    stalls              loop stalls over `--stall-ms`, by the tool or line
+                        that caused them
+
+Arrivals go through the composite `prepare_visit` tool, one LLM round; pass
+`--serial` to script the three-round `lookup_directory`, `check_available`,
+`get_wait_time` chain instead and compare turn latencies.
+
+Pass `--max-lag-ms` to exit non-zero when the loop lag p99 exceeds it (e.g. in
+CI, to catch blocking calls before they are deployed).
+
+Usage:
+    uv run python benchmarks/load_test.py [--sessions 50] [--turns 20] [--ttft 0.05]
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from livekit.agents import AgentSession
+
+from agent import Assistant
+from directory import load_directory
+from latency import get_recorder
+from loopwatch import StallWatchdog
+from offline import ScriptedLLM, receptionist_script, serial_receptionist_script
+from timesource import TimeProvider, set_time_provider
+from visitors import VisitorRegistry
+from weather import StaticWeatherBackend
+
+UTTERANCES = (
+    "Hello",
+    "Hi, I'm here to see {name} at 23:59",
+    "What's the weather in London?",
+    "Where is the bathroom?",
+    "How do I get to floor 34?",
+    "Thanks, my name is Guest {session}",
+)
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _sample_loop_lag(interval: float, lags: list[float]) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+class _StartGate:
+    """Releases every waiter once `parties` have arrived.
+
+    Like `asyncio.Barrier`, which needs Python 3.11.
+    """
+
+    def __init__(self, parties: int) -> None:
+        self._missing = parties
+        self._open = asyncio.Event()
+
+    async def wait(self) -> None:
+        self._missing -= 1
+        if self._missing <= 0:
+            self._open.set()
+        await self._open.wait()
+
+
+async def _session(
+    index: int,
+    started: _StartGate,
+    assistant_kwargs: dict,
+    args: argparse.Namespace,
+    turn_latencies: list[float],
+) -> int:
+    names = [person.name for person in assistant_kwargs["directory"]]
+    tool_calls = 0
+    # one LLM per session, as in production: every session subscribes to its
+    # LLM's metrics, so a shared instance would fan each event out to all of them
+    script = serial_receptionist_script if args.serial else receptionist_script
+    llm = ScriptedLLM(script, ttft=args.ttft, token_interval=args.token_interval)
+    async with llm, AgentSession(llm=llm) as session:
+        await session.start(Assistant(**assistant_kwargs))
+        await started.wait()
+        for turn, template in zip(range(args.turns), itertools.cycle(UTTERANCES)):
+            text = template.format(
+                name=names[(index + turn) % len(names)], session=index
+            )
+            start = time.perf_counter()
+            result = await session.run(user_input=text)
+            turn_latencies.append(time.perf_counter() - start)
+            tool_calls += sum(1 for ev in result.events if ev.type == "function_call")
+    return tool_calls
+
+
+async def run(args: argparse.Namespace) -> dict:
+    # answer wait-time questions from the local clock instead of WorldTimeAPI
+    set_time_provider(TimeProvider(None))
+    assistant_kwargs = {
+        "directory": load_directory(),
+        "weather": StaticWeatherBackend(),
+        "visitors": VisitorRegistry(),
+    }
+    lags: list[float] = []
+    turn_latencies: list[float] = []
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+
+    started = _StartGate(args.sessions + 1)
+    sessions = [
+        asyncio.create_task(
+            _session(i, started, assistant_kwargs, args, turn_latencies)
+        )
+        for i in range(args.sessions)
+    ]
+    await started.wait()
+    rss_started = process.memory_info().rss
+
+    # sample the steady state only: starting the sessions is measured separately
+    sampler = asyncio.create_task(_sample_loop_lag(args.lag_interval, lags))
+    watchdog = StallWatchdog(threshold=args.stall_ms / 1000)
+    watchdog.start()
+    start = time.perf_counter()
+    tool_calls = sum(await asyncio.gather(*sessions))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    await asyncio.gather(sampler, return_exceptions=True)
+    await watchdog.aclose()
+
+    return {
+        "elapsed": elapsed,
+        "turns": len(turn_latencies),
+        "tool_calls": tool_calls,
+        "turn_latencies": turn_latencies,
+        "lags": lags,
+        "rss_per_session": (rss_started - rss_before) / args.sessions,
+        "stalls": watchdog.counts,
+    }
+
+
+def _report(args: argparse.Namespace, r: dict) -> None:
+    lat, lags = r["turn_latencies"], r["lags"]
+    print(
+        f"{args.sessions} sessions x {args.turns} turns, ttft {args.ttft * 1000:.0f} ms"
+    )
+    print(f"  elapsed         {r['elapsed']:.2f} s")
+    print(f"  turns/s         {r['turns'] / r['elapsed']:.1f}")
+    print(f"  tool calls/s    {r['tool_calls'] / r['elapsed']:.1f}")
+    print(
+        f"  turn p50/p99    {statistics.median(lat) * 1000:.1f}"
+        f" / {_percentile(lat, 0.99) * 1000:.1f} ms"
+    )
+    print(
+        f"  loop lag p99/max {_percentile(lags, 0.99) * 1000:.1f}"
+        f" / {max(lags, default=0.0) * 1000:.1f} ms"
+    )
+    print(f"  memory/session  {r['rss_per_session'] / 2**10:.0f} KiB")
+    for series in get_recorder().snapshot():
+        if series["stage"] == "tool":
+            print(
+                f"  tool {series['labels']['tool']:<18}"
+                f" p99 {series['p99'] * 1000:.1f} ms ({series['count']} calls)"
+            )
+    for culprit, count in r["stalls"].most_common(10):
+        print(f"  stalls {count:>5}  {culprit}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument(
+        "--ttft", type=float, default=0.05, help="simulated LLM time to first token"
+    )
+    parser.add_argument(
+        "--token-interval",
+        type=float,
+        default=0.0,
+        help="simulated delay between streamed words",
+    )
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="look visitors up in three LLM rounds instead of with prepare_visit",
+    )
+    parser.add_argument("--lag-interval", type=float, default=0.01)
+    parser.add_argument(
+        "--stall-ms",
+        type=float,
+        default=50.0,
+        help="report loop stalls longer than this, with their cause",
+    )
+    parser.add_argument(
+        "--max-lag-ms",
+        type=float,
+        default=None,
+        help="exit with status 1 if the loop lag p99 exceeds this",
+    )
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    _report(args, result)
+
+    if args.max_lag_ms is not None:
+        lag_p99 = _percentile(result["lags"], 0.99) * 1000
+        if lag_p99 > args.max_lag_ms:
+            print(f"loop lag p99 {lag_p99:.1f} ms exceeds {args.max_lag_ms} ms")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,15 @@
+import asyncio
+import contextlib
 import logging
-from livekit.agents import function_tool, Agent, RunContext
-from typing import Any
-import aiohttp
-import requests
+from livekit.agents import function_tool, RunContext, StopResponse, llm
+from typing import Any, NamedTuple
+from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import datetime
-list_of_visitors: list[str] = []
-
-
-class MyAgent(Agent):
-    @function_tool()
-    async def lookup_weather(
-        self,
-        context: RunContext,
-        location: str,
-    ) -> dict[str, Any]:
-        """Look up weather information for a given location.
-        
-        Args:
-            location: The location to look up weather information for.
-        """
-
-        return {"weather": "sunny", "temperature_f": 70}
+import os
 
+import aiohttp
 from dotenv import load_dotenv
+from livekit.agents.types import NOT_GIVEN
 from livekit import rtc
 from livekit.agents import (
     Agent,
@@ -30,25 +17,61 @@ from livekit.agents import (
     AgentSession,
     JobContext,
     JobProcess,
+    ModelSettings,
     cli,
     inference,
     room_io,
 )
-from livekit.plugins import noise_cancellation, silero
+# silero and the turn detector are imported eagerly: they register plugins (and the
+# turn detector's inference runner) that the main worker process needs
+import livekit.plugins.silero  # noqa: F401
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from audio_budget import MachineLoad, NoiseCancellationPolicy
+from badges import BadgeQueue
+from context_budget import ContextBudget, compact_instructions
+from directory import Directory, Person, load_directory, normalize_name
+from http_pool import close_http_session
+from latency import get_recorder, start_exporters, timed_tool
+from loopwatch import StallWatchdog
+from offload import get_offloader, offload
+from prefetch import Prefetcher
+from presence import PresenceEvent, PresenceStore, open_feed
+from responses import BUILDING, ResponseTable, SpeechCache
+from router import IntentRouter
+from speech_store import SpeechStore
+from startup import enable_forkserver_preload, shared
+from state import VisitState
+from streaming import streaming_tool
+from tenants import DEFAULT_TENANT, DEFAULT_TIMEZONE, TenantStore, UnknownTenantError, default_tenant, tenant_from_metadata
+from timesource import get_time_provider
+from visitors import VisitorRegistry
+from weather import (
+    CachedWeatherBackend,
+    OpenMeteoBackend,
+    StaticWeatherBackend,
+    WeatherBackend,
+    WeatherError,
+)
+
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+# a contact who swiped in this recently "has just arrived"
+RECENT_ARRIVAL = 300.0
+# how long a waiting guest is told when their contact arrives
+ARRIVAL_WATCH = 1800.0
 
-class Assistant(Agent):
-    def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are a professional but friendly receptionist working at the main reception desk of The Shard in London.
+TTS_MODEL = "cartesia/sonic-3"
+TTS_VOICE = "9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"
+
+# sent with every LLM request, compacted first (see `compact_instructions`)
+INSTRUCTIONS = """You are a professional but friendly receptionist working at the main reception desk of {}.
 
                             You are speaking to guests who have just walked into the building.
                             You greet visitors naturally, ask who they are visiting, and help them find the correct floor using an internal directory.
+                            When a guest tells you who they are here to see, use prepare_visit: it looks the person up, checks they are in the building and estimates the wait in one step.
 
                             If the person is not in the building, explain politely and suggest next steps.
                             If the visitor needs to wait, explain where and how long.
@@ -57,12 +80,121 @@ class Assistant(Agent):
                             Speak like a real human receptionist:
                             polite, calm, efficient, and welcoming.
                             Keep responses concise and conversational.
-                            """,
+                            """
+
+
+class Assistant(Agent):
+    def __init__(
+        self,
+        directory: Directory | None = None,
+        weather: WeatherBackend | None = None,
+        visitors: VisitorRegistry | None = None,
+        responses: ResponseTable | None = None,
+        speech: SpeechCache | None = None,
+        router: IntentRouter | None = None,
+        building: str = BUILDING,
+        timezone: str = DEFAULT_TIMEZONE,
+        presence: PresenceStore | None = None,
+        badges: BadgeQueue | None = None,
+        budget: ContextBudget | None = None,
+    ) -> None:
+        self.directory = directory if directory is not None else load_directory()
+        self.weather = weather if weather is not None else StaticWeatherBackend()
+        self.visitors = visitors if visitors is not None else VisitorRegistry()
+        self.responses = responses if responses is not None else ResponseTable(building=building)
+        self.speech = speech
+        self.router = router if router is not None else IntentRouter()
+        self.presence = presence if presence is not None else PresenceStore.from_directory(self.directory)
+        self.badges = badges if badges is not None else BadgeQueue()
+        self.budget = budget if budget is not None else ContextBudget()
+        self.prefetch = Prefetcher()
+        self._arrival_watches: dict[str, asyncio.Task[None]] = {}
+        self.building = building
+        self.timezone = timezone
+        super().__init__(
+            instructions=compact_instructions(INSTRUCTIONS.format(building)),
         )
 
     
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage) -> None:
+        # a turn after a quiet spell is the next visitor, see `ContextBudget`
+        new_visit = self._next_turn(new_message)
+
+        # Answer greetings, facility and floor questions from the response table
+        # instead of waiting on the LLM. Anything the router isn't sure about
+        # goes to the LLM as usual, and so does everything said mid-visit or in
+        # answer to a question: "ten" is then a meeting time or a head count.
+        if not new_visit and (self.session.userdata.in_progress or _asked_question(turn_ctx)):
+            return
+        route = self.router.route(new_message.text_content or "")
+        if route is None:
+            return
+
+        if route.intent == "building_info":
+            answer = self.responses.building_info(route.topic)
+        elif route.intent == "directions":
+            answer = self.responses.directions(route.floor)
+        else:
+            answer = self.responses.greeting
+        logger.info("answered without the LLM", extra={"intent": route.intent, "score": round(route.score, 2)})
+
+        # a stopped turn isn't added to the chat context, so keep it for the LLM's next turns
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.items.append(new_message)
+        await self.update_chat_ctx(chat_ctx)
+        self._say(answer)
+        raise StopResponse()
+
+    async def llm_node(self, chat_ctx: llm.ChatContext, tools: list[llm.Tool], model_settings: ModelSettings) -> AsyncIterator[llm.ChatChunk]:
+        # text input skips `on_user_turn_completed`, so new turns are noted here too
+        last = chat_ctx.items[-1] if chat_ctx.items else None
+        if last is not None and last.type == "message" and last.role == "user":
+            self._next_turn(last)
+        # only the current visit is sent, within the token budget
+        chat_ctx = self.budget.trim(chat_ctx)
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            yield chunk
+
+    def _next_turn(self, message: llm.ChatMessage) -> bool:
+        """Note a user turn, starting a new visit after a quiet spell.
+
+        The spell is longer while the guest may be waiting for their contact.
+        The last visit is then only sent to the LLM as a one-line summary, and
+        the tools start from a fresh `VisitState`. Returns True if a new visit
+        started.
+        """
+        if not self.budget.next_turn(waiting=self.session.userdata.in_progress):
+            return False
+        summary = self.session.userdata.summary()
+        self.session.userdata = VisitState()
+        self.budget.start_visit(summary, at=message.created_at)
+        logger.info("new visit", extra={"visits": self.budget.visits, "summary": summary})
+        return True
+
+    async def on_enter(self) -> None:
+        self.presence.add_listener(self._on_presence)
+        # sessions started without a VisitState (e.g. in tests) get a fresh one
+        userdata = None
+        with contextlib.suppress(ValueError):
+            userdata = self.session.userdata
+        if userdata is None:
+            self.session.userdata = VisitState()
+
+    async def on_exit(self) -> None:
+        # speculative lookups and arrival announcements are only useful to this agent
+        self.presence.remove_listener(self._on_presence)
+        for task in list(self._arrival_watches.values()):
+            task.cancel()
+        await self.prefetch.aclose()
+
+    def _on_presence(self, event: PresenceEvent) -> None:
+        # a badge swipe makes a speculative availability answer stale
+        self.prefetch.discard(("available", normalize_name(event.name)))
+
     @function_tool
-    async def lookup_weather(self, context: RunContext, location: str, units: str = "imperial") -> str:
+    @timed_tool
+    @streaming_tool()
+    async def lookup_weather(self, context: RunContext, location: str, units: str = "imperial") -> AsyncIterator[str]:
         """Use this tool to look up current weather information in the given location.
     
         If the location is not supported by the weather service, the tool will indicate this. You must tell the user the location's weather is unavailable.
@@ -73,103 +205,202 @@ class Assistant(Agent):
         """
     
         logger.info(f"Looking up weather for {location}")
-    
-        temp = 0 
-
-        if location == "London":
-            temp = 60
-            if units == "imperial":
-                temp_f = temp
-            else:
-                temp_f = imperial_to_metric(temp)
-            return "The weather in London is sunny with a temperature of {:.1f} degrees {}.".format(temp_f, "F" if units == "imperial" else "C")
+
+        # spoken only if the weather service is slow to answer
+        yield "Let me check the weather in {} for you.".format(location)
+
+        try:
+            weather = await self.weather.current(location)
+        except WeatherError as e:
+            logger.warning(f"Weather lookup for {location} failed: {e}")
+            weather = None
+
+        if weather is None:
+            yield "Sorry, I couldn't find the weather for {}.".format(location)
+            return
+
+        if units == "imperial":
+            temp = weather.temperature_f
         else:
-            return "Sorry, I couldn't find the weather for {}.".format(location)
+            temp = imperial_to_metric(weather.temperature_f)
+        yield "The weather in {} is {} with a temperature of {:.1f} degrees {}.".format(location, weather.description, temp, "F" if units == "imperial" else "C")
         
     
     
     @function_tool
+    @timed_tool
     async def lookup_directory(self, context: RunContext, name: str,) -> dict[str, Any]:
         """
-        Use this tool to look up a person in the Shard building directory, when a user says they are here to meet someone. 
+        Use this tool to look up a person in the building directory, when a user says they are here to meet someone. 
+
+        If the exact name is not listed, the result includes the closest matching `candidates`. Confirm the most likely candidate with the guest in a single question instead of asking them to repeat the name.
 
         Args:
             name: Full name of the person the guest is visiting
         """
 
-        directory = {
-            "Sarah Collins": {
-                "company": "Shard Capital",
-                "floor": 34,
-            },
-            "James Patel": {
-                "company": "Shard Capital",
-                "floor": 21,
-            },
-            "Emily Wong": {
-                "company": "Shard capital",
-                "floor": 42,
-            },
-        }
-
-        if name not in directory:
-            return {
-                "found": False
-            }
-
-        person = directory[name]
-        return {
-            "found": True,
-            "company": person["company"],
-            "floor": person["floor"],
-        }
-    
+        person, result = await self._resolve(name)
+        if person is not None:
+            context.userdata.meet(person)
+            self._prefetch_visit(person)
+        return result
+
+    @function_tool
+    @timed_tool
+    async def prepare_visit(self, context: RunContext, name: str, time: str | None = None) -> dict[str, Any]:
+        """
+        Use this tool when a guest says who they are here to meet. It looks the person up in the building directory, checks whether they are in the building and estimates how long the guest will wait, all in one step.
+
+        If the exact name is not listed, the result only includes the closest matching `candidates`. Confirm the most likely candidate with the guest in a single question instead of asking them to repeat the name.
+
+        Args:
+            name: Full name of the person the guest is visiting
+            time: The time of the meeting in ISO format, if the guest gave one
+        """
 
+        visit = context.userdata
+        visit.meeting_time = time or visit.meeting_time
+        person, result = await self._resolve(name)
+        if person is None:
+            return result
+        visit.meet(person)
+        time = visit.meeting_time
+
+        # the availability check and the clock don't depend on each other
+        available, wait = await asyncio.gather(self._available(person), self._estimate_wait(time, person))
+        return {**result, "name": person.name, "available": available, "wait": wait}
+
+    async def _resolve(self, name: str) -> tuple[Person | None, dict[str, Any]]:
+        """Resolve a name in the directory, off the event loop.
+
+        Returns the person, if the name was an exact match, and the
+        `lookup_directory` response.
+        """
+        result = await get_offloader().run("lookup_directory", self.directory.resolve, name, limit=4, timeout=2.0)
+        person = self.directory.get(name) if result["found"] else None
+        return person, result
+
+    def _prefetch_visit(self, person: Person) -> None:
+        """Start the calls that usually follow a successful directory lookup.
+
+        The LLM's next round is almost always `check_available` and then
+        `get_wait_time`, so their answers are ready by the time it asks.
+        """
+        self.prefetch.warm(("available", normalize_name(person.name)), lambda: self._check_presence(person))
+        get_time_provider().prefetch(self.timezone)
+
+    async def _available(self, person: Person) -> str:
+        return await self.prefetch.get(("available", normalize_name(person.name)), lambda: self._check_presence(person))
+
+    async def _check_presence(self, person: Person) -> str:
+        if self._in_building(person):
+            return "{} is currently in the building and I will notify them of your arrival.".format(person.name)
+        else:
+            return self.responses.not_in_building(person.name)
+
+    def _in_building(self, person: Person) -> bool:
+        present = self.presence.is_present(person.name)
+        return person.in_building if present is None else present
+
+    async def _estimate_wait(self, time: str | None, person: Person | None = None) -> str:
+        note = ""
+        if person is not None:
+            if not self._in_building(person):
+                self._watch_arrival(person)
+            elif self.presence.arrived_within(person.name, RECENT_ARRIVAL):
+                note = "{} has just swiped in, so they should be with you shortly. ".format(person.name)
+
+        if time is None:
+            return note + "I don't have the time of your meeting, but I will let your contact know you have arrived and they can come down to meet you when they're ready. In the meantime, please take a seat in the lobby."
+
+        current_time = (await fetch_time(self.timezone))["datetime"]
+        wait_time = calculate_wait_time(current_time, time)
+
+        return note + "The time now is {}, so the estimated wait time is {} minutes. Please take a seat in the lobby and I will let your contact know you have arrived.".format(current_time, wait_time)
+
+    def _watch_arrival(self, person: Person) -> None:
+        """Tell the waiting guest as soon as `person` swipes in."""
+        if person.name in self._arrival_watches:
+            return
+        task = asyncio.create_task(self._announce_arrival(person))
+        self._arrival_watches[person.name] = task
+        task.add_done_callback(lambda _: self._arrival_watches.pop(person.name, None))
+
+    async def _announce_arrival(self, person: Person) -> None:
+        try:
+            await self.presence.wait_for_arrival(person.name, timeout=ARRIVAL_WATCH)
+        except asyncio.TimeoutError:
+            return
+        self._say("Good news, {} has just arrived in the building and will be with you shortly.".format(person.name))
 
     @function_tool
+    @timed_tool
     async def get_building_info(
         self,
         context: RunContext,
         topic: str,
-    ) -> str:
+    ) -> str | None:
         """
-        rovide information about facilities in The Shard.
+        rovide information about facilities in the building.
 
         Args:
             topic: The topic requested, e.g. bathroom, lifts, waiting area
         """
 
-        info = {
-            "bathroom": "The nearest restrooms are just past the security gates on the left.",
-            "waiting area": "You’re welcome to take a seat in the main lobby just behind reception.",
-            "lifts": "The lifts are directly behind you. Security will direct you to the correct lift bank.",
-        }
+        return self._answer(context, self.responses.building_info(topic))
 
-        return info.get(topic.lower(), "I can help with that, could you be a bit more specific?")
 
-
-    @function_tool 
-    async def get_directions(self, context: RunContext, floor: int) -> str:
+    @function_tool
+    @timed_tool
+    async def get_directions(self, context: RunContext, floor: int | None = None) -> str | None:
         """
         Provide directions to the lifts and the correct lift bank for a given floor.
 
         Args:
-            floor: The floor the guest is trying to reach
+            floor: The floor the guest is trying to reach. Leave it out for the floor of the person they are visiting.
         """
 
-        if floor < 1 or floor > 72:
-            return "I'm sorry, but {} is not a valid floor in The Shard. Please check the directory for valid floors.".format(floor)
-        
-        if floor <= 10:
-            return "To get to floor {}, take the lifts on the left and select the first lift bank.".format(floor)
-        elif floor <= 40:
-            return "To get to floor {}, take the lifts on the left and select the second lift bank.".format(floor)
-        else:
-            return "To get to floor {}, take the lifts on the left and select the third lift bank.".format(floor)
+        visit = context.userdata
+        if floor is None:
+            floor = visit.floor
+            if floor is None:
+                return "I don't know which floor the guest needs yet. Ask who they are visiting or which floor they are going to."
+        visit.floor = floor
+
+        return self._answer(context, self.responses.directions(floor))
+
+    def _answer(self, context: RunContext, answer: str) -> str | None:
+        """Speak a fixed answer straight from the speech cache, if it is there.
+
+        Returning None tells the session no LLM reply is needed, so a cached
+        answer plays without another LLM or TTS round trip. A templated answer
+        plays its fixed sentences from the cache and synthesizes only the ones
+        with a name in them.
+        """
+        audio = self._cached_audio(answer)
+        if audio is None:
+            return answer
+
+        self.session.say(answer, audio=audio)
+        return None
+
+    def _say(self, answer: str) -> None:
+        """Speak a fixed answer, from the speech cache if it is there."""
+        audio = self._cached_audio(answer)
+        self.session.say(answer, audio=audio if audio is not None else NOT_GIVEN)
+
+    def _cached_audio(self, answer: str) -> AsyncIterator[rtc.AudioFrame] | None:
+        if self.speech is None:
+            return None
+        audio = self.speech.audio(answer)
+        if audio is None and self.session.tts is not None:
+            audio = self.speech.compose(self.session.tts, answer)
+        return audio
 
 
     @function_tool
-    async def check_in(self, context: RunContext, name: str) -> str:
+    @timed_tool
+    async def check_in(self, context: RunContext, name: str) -> str | None:
         """
         Check a visitor in when they arrive, and provide them with a visitor badge.
 
@@ -177,56 +408,93 @@ class Assistant(Agent):
             name: The name of the visitor checking in
         """
 
-        list_of_visitors.append(name)
-        
-        return "Welcome to The Shard, {}! I have checked you in and printed a visitor badge for you. Please take a seat in the lobby while I notify your contact.".format(name)
+        visit = self.visitors.add(name)
+        context.userdata.visitor = visit
+        self.badges.submit(visit)
+
+        return self._answer(context, self.responses.checked_in(name))
 
     @function_tool
-    async def check_available(self, context: RunContext, name: str) -> str:
+    @timed_tool
+    async def check_in_group(self, context: RunContext, names: list[str]) -> str | None:
+        """
+        Check in a group of visitors who arrived together, e.g. for a meeting, and print all their visitor badges. Use this instead of calling check_in once per person.
+
+        Args:
+            names: The names of all the visitors checking in
+        """
+
+        visits = self.visitors.add_many(names)
+        if visits:
+            context.userdata.visitor = visits[0]
+            context.userdata.group = tuple(visits)
+        self.badges.submit_many(visits)
+
+        return self._answer(context, self.responses.checked_in_group(len(visits)))
+
+    @function_tool
+    @timed_tool
+    @offload(timeout=2.0)
+    def is_checked_in(self, context: RunContext, name: str) -> str:
+        """
+        Check whether a visitor has already checked in today, e.g. when someone asks if their guest has arrived.
+
+        Args:
+            name: The name of the visitor
+        """
+
+        visit = self.visitors.get(name)
+        if visit is None:
+            return "{} has not checked in yet.".format(name)
+
+        return "{} checked in at {}.".format(visit.name, datetime.fromtimestamp(visit.checked_in_at).strftime("%H:%M"))
+
+    @function_tool
+    @timed_tool
+    async def check_available(self, context: RunContext, name: str | None = None) -> str | None:
         """
         Check if the person the visitor is meeting is currently in the building or not.
 
         Args:
-            name: The name of the person the visitor is trying to meet
+            name: The name of the person the visitor is trying to meet. Leave it out for the person already looked up.
         """
 
-        directory = {
-            "Sarah Collins": {
-                "in_building": True,
-            },
-            "James Patel": {
-                "in_building": False,
-            },
-            "Emily Wong": {
-                "in_building": True,
-            },
-        }
-
-        if name not in directory:
-            return "I'm sorry, but I couldn't find {} in the directory. Please check the spelling and try again.".format(name)
-
-        if directory[name]["in_building"]:
-            return "{} is currently in the building and I will notify them of your arrival.".format(name)
-        else:
-            return "I'm sorry, but {} is not currently in the building. Would you like me to let them know you stopped by, or would you like to wait for them to arrive?".format(name)
+        person = self._contact(context, name)
+        if person is None:
+            return "I'm sorry, but I couldn't find {} in the directory. Please check the spelling and try again.".format(name or "them")
+
+        return self._answer(context, await self._available(person))
+
+    def _contact(self, context: RunContext, name: str | None) -> Person | None:
+        """Return the person `name` refers to, reusing the visit's contact if it is them."""
+        visit = context.userdata
+        if visit.is_contact(name):
+            return visit.contact
+        person = self.directory.get(name) if name else None
+        if person is not None:
+            visit.meet(person)
+        return person
 
 
     @function_tool
-    async def get_wait_time(self, context: RunContext, contact: str, time: str | None) -> str:
+    @timed_tool
+    @streaming_tool()
+    async def get_wait_time(self, context: RunContext, contact: str | None = None, time: str | None = None) -> AsyncIterator[str]:
         """
         If the visitor needs to wait, provide an estimated wait time based on the time they arrived and the time of their meeting, if available.
 
         Args:
-            contact: The person the visitor is meeting
-            time: The time of the meeting, if available
+            contact: The person the visitor is meeting. Leave it out for the person already looked up.
+            time: The time of the meeting, if it wasn't given before
         """
-        if time is None:
-            return "I don't have the time of your meeting, but I will let your contact know you have arrived and they can come down to meet you when they're ready. In the meantime, please take a seat in the lobby."
+        visit = context.userdata
+        visit.meeting_time = time or visit.meeting_time
+        person = self._contact(context, contact)
 
-        current_time = fetch_time("Europe/London")["datetime"]
-        wait_time = calculate_wait_time(current_time, time)
+        if visit.meeting_time is not None:
+            yield "One moment while I check how long {} will be.".format(person.name if person is not None else contact or "your contact")
 
-        return "The time now is {}, so the estimated wait time is {} minutes. Please take a seat in the lobby and I will let your contact know you have arrived.".format(current_time, wait_time)
+        yield await self._estimate_wait(visit.meeting_time, person)
 
 
 def calculate_wait_time(current_time: str, meeting_time: str) -> int:
@@ -250,19 +518,27 @@ def calculate_wait_time(current_time: str, meeting_time: str) -> int:
     return int(wait_time)
 
 
-def fetch_time(timezone: str) -> dict:
+def _asked_question(chat_ctx: llm.ChatContext) -> bool:
+    """Return whether the agent's last message was a question."""
+    for item in reversed(chat_ctx.items):
+        if item.type == "message" and item.role == "assistant":
+            return (item.text_content or "").rstrip().endswith("?")
+    return False
+
+
+async def fetch_time(timezone: str) -> dict:
     """
-    Fetch current time for the given timezone using WorldTimeAPI.
+    Fetch current time for the given timezone.
+
+    The time comes from the shared `TimeProvider`, which only contacts WorldTimeAPI
+    in the background and otherwise answers from a cached clock offset.
 
     :param timezone: IANA timezone like "Europe/London"
-    :return: JSON response as a dictionary
+    :return: A dictionary with the `timezone` and the ISO 8601 `datetime`
     """
-    url = f"https://worldtimeapi.org/api/timezone/{timezone}"
+    now = await get_time_provider().now(timezone)
 
-    response = requests.get(url, timeout=5)
-    response.raise_for_status()  
-
-    return response.json()
+    return {"timezone": timezone, "datetime": now.isoformat()}
 
 
 
@@ -273,43 +549,150 @@ def imperial_to_metric(temp_f: float) -> float:
 server = AgentServer()
 
 
-def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
-
-
-server.setup_fnc = prewarm
+class Models(NamedTuple):
+    """The voice pipeline's models. A kiosk host shares one set between all its rooms."""
 
+    stt: Any
+    llm: Any
+    tts: Any
+    vad: Any
+    turn_detection: Any
 
-@server.rtc_session()
-async def my_agent(ctx: JobContext):
-    # Logging setup
-    # Add any other context you want in all log entries here
-    ctx.log_context_fields = {
-        "room": ctx.room.name,
-    }
 
-    # Set up a voice AI pipeline using OpenAI, Cartesia, Deepgram, and the LiveKit turn detector
-    session = AgentSession(
+def create_models(vad: Any, turn_detection: Any = None, http_session: aiohttp.ClientSession | None = None) -> Models:
+    """Create the STT, LLM and TTS clients, reusing `http_session`'s connections if given."""
+    return Models(
         # Speech-to-text (STT) is your agent's ears, turning the user's speech into text that the LLM can understand
         # See all available models at https://docs.livekit.io/agents/models/stt/
-        stt=inference.STT(model="deepgram/nova-3", language="multi"),
+        stt=inference.STT(model="deepgram/nova-3", language="multi", http_session=http_session),
         # A Large Language Model (LLM) is your agent's brain, processing user input and generating a response
         # See all available models at https://docs.livekit.io/agents/models/llm/
         llm=inference.LLM(model="openai/gpt-4.1-mini"),
         # Text-to-speech (TTS) is your agent's voice, turning the LLM's text into speech that the user can hear
         # See all available models as well as voice selections at https://docs.livekit.io/agents/models/tts/
-        tts=inference.TTS(
-            model="cartesia/sonic-3", voice="9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"
-        ),
+        tts=inference.TTS(model=TTS_MODEL, voice=TTS_VOICE, http_session=http_session),
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        vad=vad,
+        turn_detection=turn_detection if turn_detection is not None else MultilingualModel(),
+    )
+
+
+def load_resources() -> dict[str, Any]:
+    """Load what every session in a process shares."""
+    # loaded once in the forkserver and shared copy-on-write when preloading is
+    # enabled, otherwise loaded here. The turn detector's weights need no warming
+    # per job: they live in the worker's shared inference process.
+    resources: dict[str, Any] = {"vad": shared("vad")}
+    # tenants are loaded on demand; the default one reuses the shared directory
+    tenants = TenantStore()
+    tenants.put(default_tenant(shared("directory")), pin=True)
+    resources["tenants"] = tenants
+    resources["weather"] = CachedWeatherBackend(OpenMeteoBackend())
+    resources["visitors"] = VisitorRegistry(
+        os.environ.get("VISITOR_DB_PATH", "visitors.db")
+    )
+    # on disk, so every worker process plays the same audio and it survives restarts
+    resources["speech"] = SpeechCache(
+        store=SpeechStore(os.environ.get("SPEECH_CACHE_PATH", "speech-cache")),
+        voice="{}/{}".format(TTS_MODEL, TTS_VOICE),
+    )
+    # tenant id -> live presence, fed for as long as the process runs
+    resources["presence"] = {}
+    resources["router"] = IntentRouter()
+    resources["machine_load"] = MachineLoad()
+    resources["noise_cancellation"] = NoiseCancellationPolicy(resources["machine_load"])
+    return resources
+
+
+def prewarm(proc: JobProcess):
+    proc.userdata.update(load_resources())
+
+
+server.setup_fnc = prewarm
+
+
+async def start_lobby(
+    room: rtc.Room,
+    resources: dict[str, Any],
+    models: Models,
+    add_shutdown_callback: Callable[[Callable[[], Awaitable[None]]], None],
+    *,
+    metadata: str | None = None,
+    labels: dict[str, Any] | None = None,
+) -> AgentSession[VisitState]:
+    """Start the receptionist in one lobby room.
+
+    Args:
+        room: The lobby's room. It may or may not be connected yet.
+        resources: The process's shared resources, see `load_resources`.
+        models: The pipeline's models, see `create_models`.
+        add_shutdown_callback: Registers cleanup to run when the room's session ends.
+        metadata: The room's metadata, naming its tenant. Defaults to `room.metadata`.
+        labels: Log context and latency labels for the room, updated with the tenant.
+    """
+    labels = labels if labels is not None else {"room": room.name}
+
+    # Each room is one building's lobby, named in the room metadata as {"tenant": "..."}
+    tenant_id = tenant_from_metadata(metadata if metadata is not None else room.metadata)
+    # pick up the tenant's directory snapshot if it was swapped in since its last
+    # session, without a restart
+    await resources["tenants"].refresh([tenant_id])
+    try:
+        tenant = await resources["tenants"].load(tenant_id)
+    except UnknownTenantError:
+        logger.warning("unknown tenant {}, using {}".format(tenant_id, DEFAULT_TENANT))
+        tenant = await resources["tenants"].load(DEFAULT_TENANT)
+    labels["tenant"] = tenant.id
+
+    # Who is in the building, kept up to date by the tenant's badge-swipe feed
+    presence = resources["presence"].get(tenant.id)
+    if presence is None:
+        presence = resources["presence"][tenant.id] = PresenceStore.from_directory(tenant.directory)
+        if tenant.presence_feed:
+            presence.start(open_feed(tenant.presence_feed))
+
+    # Learn the remote clock offset before the first visitor asks for a wait time
+    get_time_provider().prefetch(tenant.timezone)
+
+    # Badges of visitors checking in together are printed as one job
+    badges = BadgeQueue()
+    add_shutdown_callback(badges.aclose)
+
+    # Per-stage latency histograms, labelled with the room and tenant
+    recorder = get_recorder()
+    recorder.bind(labels)
+
+    # Set up a voice AI pipeline using OpenAI, Cartesia, Deepgram, and the LiveKit turn detector
+    session = AgentSession[VisitState](
+        # What the tools learn about the visit, shared between them
+        userdata=VisitState(),
+        stt=models.stt,
+        llm=models.llm,
+        tts=models.tts,
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
         preemptive_generation=True,
     )
 
+    recorder.attach(session)
+
+    # Pre-synthesize the most common lobby answers, so they play without waiting on the LLM or TTS
+    speech = resources["speech"]
+    warm_speech = asyncio.create_task(
+        speech.warm(
+            session.tts,
+            tenant.responses.frequent_answers(tenant.directory.floors()),
+        )
+    )
+
+    async def stop_warming_speech():
+        warm_speech.cancel()
+
+    add_shutdown_callback(stop_warming_speech)
+
     # To use a realtime model instead of a voice pipeline, use the following session setup instead.
     # (Note: This is for the OpenAI Realtime API. For other providers, see https://docs.livekit.io/agents/models/realtime/))
     # 1. Install livekit-agents[openai]
@@ -326,23 +709,68 @@ async def my_agent(ctx: JobContext):
     #   avatar_id="...",  # See https://docs.livekit.io/agents/models/avatar/plugins/hedra
     # )
     # # Start the avatar and wait for it to join
-    # await avatar.start(session, room=ctx.room)
+    # await avatar.start(session, room=room)
 
     # Start the session, which initializes the voice pipeline and warms up the models
     await session.start(
-        agent=Assistant(),
-        room=ctx.room,
+        agent=Assistant(
+            directory=tenant.directory,
+            weather=resources["weather"],
+            visitors=resources["visitors"],
+            responses=tenant.responses,
+            speech=speech,
+            router=resources["router"],
+            building=tenant.building,
+            timezone=tenant.timezone,
+            presence=presence,
+            badges=badges,
+        ),
+        room=room,
         room_options=room_io.RoomOptions(
             audio_input=room_io.AudioInputOptions(
-                noise_cancellation=lambda params: (
-                    noise_cancellation.BVCTelephony()
-                    if params.participant.kind
-                    == rtc.ParticipantKind.PARTICIPANT_KIND_SIP
-                    else noise_cancellation.BVC()
-                ),
+                # BVC (BVCTelephony for SIP callers), cheaper when the CPU is short
+                noise_cancellation=resources["noise_cancellation"],
             ),
         ),
     )
+    return session
+
+
+@server.rtc_session()
+async def my_agent(ctx: JobContext):
+    # Logging setup
+    # Add any other context you want in all log entries here
+    ctx.log_context_fields = {
+        "room": ctx.room.name,
+    }
+
+    ctx.add_shutdown_callback(close_http_session)
+
+    visitors = ctx.proc.userdata["visitors"]
+    visitors.start()
+    ctx.add_shutdown_callback(visitors.aclose)
+
+    # Export the per-stage latency histograms
+    ctx.add_shutdown_callback(await start_exporters())
+
+    # Log and count anything that blocks the event loop, e.g. sync I/O in a tool
+    watchdog = StallWatchdog()
+    watchdog.start()
+    ctx.add_shutdown_callback(watchdog.aclose)
+
+    # Sample the machine's CPU use, for the callers' noise cancellation
+    machine_load = ctx.proc.userdata["machine_load"]
+    machine_load.start()
+    ctx.add_shutdown_callback(machine_load.aclose)
+
+    await start_lobby(
+        ctx.room,
+        ctx.proc.userdata,
+        create_models(ctx.proc.userdata["vad"]),
+        ctx.add_shutdown_callback,
+        metadata=ctx.job.room.metadata,
+        labels=ctx.log_context_fields,
+    )
 
     # Join the room and connect to the user
     await ctx.connect()
@@ -367,4 +795,5 @@ async def my_agent(ctx: JobContext):
 #     asyncio.run(demo())
 
 if __name__ == "__main__":
+    enable_forkserver_preload("livekit.plugins.noise_cancellation")
     cli.run_app(server)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+import logging
+from collections import Counter
+from collections.abc import Callable
+
+import psutil
+from livekit import rtc
+from livekit.agents.voice.room_io.types import NoiseCancellationParams
+
+from startup import lazy_import
+
+logger = logging.getLogger("agent")
+
+# only needed once a session starts, see `AGENT_LAZY_IMPORTS`
+noise_cancellation = lazy_import("livekit.plugins.noise_cancellation")
+
+FULL = "full"
+"""The caller's best model: BVC, or BVCTelephony for SIP callers."""
+LIGHT = "light"
+"""The plain NC model, which doesn't also remove background voices."""
+OFF = "off"
+"""No noise cancellation; the VAD and STT get the caller's audio as is."""
+
+
+class MachineLoad:
+    """The machine's CPU use as a share of `max_cpu`, sampled in the background.
+
+    Calling it returns the latest reading. CPU use is sampled every `interval`
+    seconds and smoothed over recent intervals, so a reading reflects the last
+    few seconds however long ago it was last read. `max_cpu` defaults to the
+    worker's own `load_threshold` in production, past which it stops
+    accepting jobs. Sampling starts with `start`, or on the first reading.
+    """
+
+    def __init__(
+        self,
+        max_cpu: float = 0.7,
+        *,
+        interval: float = 1.0,
+        smoothing: float = 0.5,
+        cpu: Callable[[], float] | None = None,
+    ) -> None:
+        self._max_cpu = max_cpu
+        self._interval = interval
+        self._smoothing = smoothing
+        self._cpu_source = cpu if cpu is not None else _machine_cpu()
+        self._sampler: asyncio.Task[None] | None = None
+        self.cpu = 0.0
+        """Smoothed CPU use of the machine, from 0 to 1."""
+
+    def __call__(self) -> float:
+        if self._sampler is None:
+            # outside an event loop there is nothing to sample on
+            with contextlib.suppress(RuntimeError):
+                asyncio.get_running_loop()
+                self.start()
+        return self.cpu / self._max_cpu
+
+    def sample(self) -> None:
+        """Record one interval's CPU use."""
+        self.cpu += self._smoothing * (self._cpu_source() - self.cpu)
+
+    def start(self) -> None:
+        if self._sampler is None:
+            self._sampler = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            self.sample()
+
+
+def _machine_cpu() -> Callable[[], float]:
+    # each reading covers the time since the previous one
+    psutil.cpu_percent(None)
+    return lambda: psutil.cpu_percent(None) / 100
+
+
+class NoiseCancellationPolicy:
+    """Chooses each caller's noise cancellation, cheaper under load.
+
+    Pass it as room IO's `noise_cancellation` selector. Room IO calls it when a
+    caller's microphone track is subscribed, and the choice holds for that
+    track. `load` reports how busy the process is, where 1.0 means it is at its
+    CPU budget (`kiosk.AdmissionControl.load`, or a `MachineLoad` by default).
+    Below `downgrade_at` callers get the `FULL` model, below `skip_at` the
+    `LIGHT` one, and at or above it none (`OFF`), so the sessions already
+    running keep their share of the CPU.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], float] | None = None,
+        *,
+        downgrade_at: float = 0.8,
+        skip_at: float = 1.0,
+    ) -> None:
+        self._load = load if load is not None else MachineLoad()
+        self._downgrade_at = downgrade_at
+        self._skip_at = skip_at
+        self._level = FULL
+        self.chosen: Counter[str] = Counter()
+        """Tracks given each level so far."""
+
+    def level(self) -> str:
+        """Return the level a caller joining now would get."""
+        load = self._load()
+        if load >= self._skip_at:
+            level = OFF
+        elif load >= self._downgrade_at:
+            level = LIGHT
+        else:
+            level = FULL
+        if level != self._level:
+            logger.info(
+                f"noise cancellation now {level}", extra={"load": round(load, 2)}
+            )
+            self._level = level
+        return level
+
+    def __call__(
+        self, params: NoiseCancellationParams
+    ) -> rtc.NoiseCancellationOptions | None:
+        level = self.level()
+        self.chosen[level] += 1
+        if level == OFF:
+            return None
+        if level == LIGHT:
+            return noise_cancellation.NC()
+        if params.participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
+            return noise_cancellation.BVCTelephony()
+        return noise_cancellation.BVC()
@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import Iterable, Sequence
+from typing import Protocol
+
+from visitors import Visit
+
+logger = logging.getLogger("agent")
+
+
+class BadgePrinter(Protocol):
+    """Prints visitor badges. Printing a batch costs one job on the printer."""
+
+    async def print_badges(self, visits: Sequence[Visit]) -> None: ...
+
+
+class LogBadgePrinter:
+    """Badge printer for desks without one: badges are only logged."""
+
+    async def print_badges(self, visits: Sequence[Visit]) -> None:
+        logger.info(
+            "printed visitor badges",
+            extra={"badges": [visit.name for visit in visits]},
+        )
+
+
+class BadgeQueue:
+    """Coalescing queue of badge-print jobs.
+
+    Badges are queued without waiting for the printer. A single background
+    worker takes everything queued within `linger` seconds of the first badge,
+    up to `max_batch`, and sends it to the printer as one job, so a group
+    arriving together is printed in one go instead of one job per person.
+    """
+
+    def __init__(
+        self,
+        printer: BadgePrinter | None = None,
+        *,
+        max_batch: int = 50,
+        linger: float = 0.05,
+    ) -> None:
+        self._printer = printer if printer is not None else LogBadgePrinter()
+        self._max_batch = max_batch
+        self._linger = linger
+        self._queue: asyncio.Queue[tuple[Visit, asyncio.Future[None]]] | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self.jobs = 0
+        self.printed = 0
+
+    def submit(self, visit: Visit) -> asyncio.Future[None]:
+        """Queue a badge. The returned future is done once it is printed."""
+        return self.submit_many([visit])[0]
+
+    def submit_many(self, visits: Iterable[Visit]) -> list[asyncio.Future[None]]:
+        """Queue badges for a group. They are printed in as few jobs as possible."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run(self._queue))
+        assert self._queue is not None
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for visit in visits:
+            future = loop.create_future()
+            # callers may not wait for their badge; failures are logged instead
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._queue.put_nowait((visit, future))
+            futures.append(future)
+        return futures
+
+    async def aclose(self) -> None:
+        """Print everything queued, then stop the worker."""
+        if self._queue is not None and self._worker is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._queue.join()
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._queue = self._worker = None
+
+    async def _run(
+        self, queue: asyncio.Queue[tuple[Visit, asyncio.Future[None]]]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._linger
+            while len(batch) < self._max_batch:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(queue.get_nowait())
+
+            try:
+                await self._printer.print_badges([visit for visit, _ in batch])
+            except Exception as e:
+                logger.exception(
+                    "failed to print visitor badges", extra={"badges": len(batch)}
+                )
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self.jobs += 1
+                self.printed += len(batch)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                for _ in batch:
+                    queue.task_done()
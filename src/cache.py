@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+logger = logging.getLogger("agent")
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class AsyncTTLCache(Generic[K, V]):
+    """Bounded async cache with TTL expiry, request coalescing and stale reads.
+
+    - Entries are evicted least-recently-used once `max_entries` is reached.
+    - Concurrent misses for the same key share a single call to `loader`.
+    - Entries older than `ttl` but younger than `ttl + stale_ttl` are returned
+      immediately while a background reload refreshes them.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[K], Awaitable[V]],
+        *,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self._loader = loader
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    async def get(self, key: K) -> V:
+        """Return the value for `key`, loading it if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = self._clock() - loaded_at
+            if age < self._ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self._ttl + self._stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._load(key)
+                return value
+
+        self.misses += 1
+        # shielded so a cancelled caller doesn't cancel the load shared with others
+        return await asyncio.shield(self._load(key))
+
+    def invalidate(self, key: K) -> None:
+        """Drop `key` from the cache."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+
+    def _load(self, key: K) -> asyncio.Task[V]:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        task = asyncio.create_task(self._fill(key))
+        self._inflight[key] = task
+        task.add_done_callback(self._log_failure)
+        return task
+
+    async def _fill(self, key: K) -> V:
+        try:
+            value = await self._loader(key)
+        finally:
+            self._inflight.pop(key, None)
+
+        self._entries[key] = (value, self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task[V]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("cache load failed", exc_info=task.exception())
@@ -0,0 +1,172 @@
+import re
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+
+from livekit.agents import llm
+
+CHARS_PER_TOKEN = 4
+"""Rough size of a token, the same estimate the usage metrics use offline."""
+
+ITEM_OVERHEAD = 4
+"""Tokens a chat item costs on top of its content (role, separators)."""
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+_SPACES = re.compile(r"[ \t]+")
+
+
+def compact_instructions(text: str) -> str:
+    """Normalize whitespace in a prompt without changing its wording.
+
+    Indentation, trailing spaces and runs of blank lines are sent to the LLM
+    as tokens on every request; only the paragraph breaks carry meaning.
+    """
+    lines = (_SPACES.sub(" ", line).strip() for line in text.strip().splitlines())
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines))
+
+
+def estimate_tokens(items: Iterable[llm.ChatItem]) -> int:
+    """Estimate the prompt tokens of chat items, about four characters each."""
+    chars = 0
+    count = 0
+    for item in items:
+        count += 1
+        if item.type == "message":
+            chars += len(item.text_content or "")
+        elif item.type == "function_call":
+            chars += len(item.name) + len(item.arguments)
+        elif item.type == "function_call_output":
+            chars += len(item.output)
+    return chars // CHARS_PER_TOKEN + count * ITEM_OVERHEAD
+
+
+def _is_system(item: llm.ChatItem) -> bool:
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+class ContextBudget:
+    """Keeps the LLM's context small over a long kiosk session.
+
+    A lobby session can stay open for hours and serve one visitor after
+    another. Without a budget every request carries the whole day's history,
+    so prompts, cost and time to first token grow with each guest.
+
+    The history is split into visits: a turn after `idle_gap` seconds of quiet
+    starts a new one (see `next_turn` and `start_visit`), or after
+    `waiting_gap` seconds while a guest is waiting in the lobby, so a guest
+    who speaks up after a long wait is still the same visit. `trim` sends only
+    the current visit, with a one-line summary for each of the last
+    `keep_summaries` visits before it, and drops the visit's oldest turns once
+    a request would go over `max_tokens`. Instructions and the current turn
+    are always sent. The session's own history is left as it is.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_tokens: int | None = 2000,
+        idle_gap: float | None = 120.0,
+        waiting_gap: float | None = 1800.0,
+        keep_summaries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.idle_gap = idle_gap
+        self.waiting_gap = waiting_gap
+        self._clock = clock
+        self._last_turn: float | None = None
+        self._visit_start = 0.0
+        self._summaries: deque[str] = deque(maxlen=keep_summaries)
+        self.visits = 1
+        self.requests = 0
+        self.prompt_tokens = 0
+        """Estimated prompt tokens sent, summed over all requests."""
+        self.trimmed_tokens = 0
+        """Estimated prompt tokens `trim` kept out of requests."""
+
+    def next_turn(self, *, waiting: bool = False) -> bool:
+        """Note a user turn. Returns True if it starts a new visit.
+
+        Args:
+            waiting: Whether the current visit's guest has checked in or said
+                who they are here to see, and may be waiting for them.
+        """
+        now = self._clock()
+        gap = self.waiting_gap if waiting else self.idle_gap
+        new_visit = (
+            gap is not None
+            and self._last_turn is not None
+            and now - self._last_turn >= gap
+        )
+        self._last_turn = now
+        return new_visit
+
+    def start_visit(self, summary: str | None = None, *, at: float) -> None:
+        """Start a new visit with the chat items created from `at` on.
+
+        Args:
+            summary: A few words on the visit that ended, sent in its place.
+            at: `created_at` of the new visit's first user message.
+        """
+        self.visits += 1
+        self._visit_start = at
+        if summary:
+            self._summaries.append(summary)
+
+    def trim(self, chat_ctx: llm.ChatContext) -> llm.ChatContext:
+        """Return what to send of `chat_ctx`: the current visit, within budget.
+
+        Everything from the latest user message on is kept, as are system
+        messages, however large; older turns of the visit are dropped first.
+        """
+        items = chat_ctx.items
+        total = estimate_tokens(items)
+        self.requests += 1
+
+        system = [item for item in items if _is_system(item)]
+        if self._summaries:
+            system.append(
+                llm.ChatMessage(
+                    role="system",
+                    content=[
+                        "Earlier visitors, for reference only: "
+                        + "; ".join(self._summaries)
+                        + "."
+                    ],
+                )
+            )
+        last_user = next(
+            (
+                i
+                for i in range(len(items) - 1, -1, -1)
+                if items[i].type == "message" and items[i].role == "user"
+            ),
+            len(items),
+        )
+        kept = [item for item in items[last_user:] if not _is_system(item)]
+        history = [
+            item
+            for item in items[:last_user]
+            if not _is_system(item) and item.created_at >= self._visit_start
+        ]
+
+        if self.max_tokens is not None:
+            budget = self.max_tokens - estimate_tokens(system) - estimate_tokens(kept)
+            start = len(history)
+            while start > 0:
+                cost = estimate_tokens((history[start - 1],))
+                if cost > budget:
+                    break
+                budget -= cost
+                start -= 1
+            history = history[start:]
+
+        # a tool call's output is never sent without the call
+        while history and history[0].type in ("function_call", "function_call_output"):
+            history.pop(0)
+
+        trimmed = llm.ChatContext([*system, *history, *kept])
+        sent = estimate_tokens(trimmed.items)
+        self.prompt_tokens += sent
+        self.trimmed_tokens += max(total - sent, 0)
+        return trimmed
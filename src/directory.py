@@ -0,0 +1,196 @@
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from fuzzy import NameMatcher
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+class Person(NamedTuple):
+    """A single entry in the building directory."""
+
+    name: str
+    company: str
+    floor: int
+    in_building: bool
+
+
+DEFAULT_PEOPLE: tuple[Person, ...] = (
+    Person(name="Sarah Collins", company="Shard Capital", floor=34, in_building=True),
+    Person(name="James Patel", company="Shard Capital", floor=21, in_building=False),
+    Person(name="Emily Wong", company="Shard capital", floor=42, in_building=True),
+)
+
+NOT_FOUND: dict[str, Any] = {"found": False}
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name or company for index lookups.
+
+    Punctuation is dropped, whitespace is collapsed and the result is casefolded,
+    so "  sarah  COLLINS." and "Sarah Collins" share the same key.
+    """
+    return " ".join(_NON_WORD.sub(" ", name).casefold().split())
+
+
+class Directory:
+    """Immutable, preloaded index over the building directory.
+
+    People are keyed by their normalized name, with secondary indexes by
+    company and floor. Tool responses are computed once when the index is
+    built, so lookups from the agent tools are plain dictionary reads.
+
+    A `NameMatcher` over the same names is built alongside the index, so
+    misheard names can be answered with ranked candidates in a single call.
+    """
+
+    __slots__ = (
+        "_by_company",
+        "_by_floor",
+        "_by_name",
+        "_candidates",
+        "_matcher",
+        "_people",
+        "_results",
+    )
+
+    def __init__(self, people: Iterable[Person]) -> None:
+        by_name: dict[str, Person] = {}
+        by_company: dict[str, list[Person]] = {}
+        by_floor: dict[int, list[Person]] = {}
+
+        for person in people:
+            key = normalize_name(person.name)
+            if key in by_name:
+                raise ValueError(f"duplicate directory entry for {person.name!r}")
+            by_name[key] = person
+            by_company.setdefault(normalize_name(person.company), []).append(person)
+            by_floor.setdefault(person.floor, []).append(person)
+
+        # exact display names are indexed too, so well-formed input skips
+        # normalization entirely
+        aliases = {person.name: person for person in by_name.values()}
+
+        self._people: tuple[Person, ...] = tuple(by_name.values())
+        self._by_name: dict[str, Person] = {**by_name, **aliases}
+        self._by_company: dict[str, tuple[Person, ...]] = {
+            company: tuple(members) for company, members in by_company.items()
+        }
+        self._by_floor: dict[int, tuple[Person, ...]] = {
+            floor: tuple(members) for floor, members in by_floor.items()
+        }
+        self._results: dict[Person, dict[str, Any]] = {
+            person: {"found": True, "company": person.company, "floor": person.floor}
+            for person in self._people
+        }
+        self._candidates: dict[Person, dict[str, Any]] = {
+            person: {
+                "name": person.name,
+                "company": person.company,
+                "floor": person.floor,
+            }
+            for person in self._people
+        }
+        self._matcher = NameMatcher(list(by_name))
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+    def __iter__(self) -> Iterator[Person]:
+        return iter(self._people)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.get(name) is not None
+
+    def get(self, name: str) -> Person | None:
+        """Return the person with the given name, or None if they are not listed."""
+        person = self._by_name.get(name)
+        if person is None:
+            person = self._by_name.get(normalize_name(name))
+        return person
+
+    def lookup(self, name: str) -> dict[str, Any]:
+        """Return the precomputed `lookup_directory` response for a name.
+
+        The returned dictionary is shared between calls and must not be mutated.
+        """
+        person = self.get(name)
+        if person is None:
+            return NOT_FOUND
+        return self._results[person]
+
+    def search(
+        self, name: str, *, limit: int = 3, min_score: float = 0.5
+    ) -> list[Person]:
+        """Return up to `limit` people whose names closely match `name`, best first."""
+        hits = self._matcher.search(
+            normalize_name(name), limit=limit, min_score=min_score
+        )
+        return [self._people[idx] for idx, _ in hits]
+
+    def resolve(self, name: str, *, limit: int = 3) -> dict[str, Any]:
+        """Return the `lookup_directory` response for a possibly misheard name.
+
+        Exact matches return the precomputed response. Otherwise the response is
+        marked as not found and carries the closest `candidates`, if any.
+        """
+        person = self.get(name)
+        if person is not None:
+            return self._results[person]
+
+        candidates = self.search(name, limit=limit)
+        if not candidates:
+            return NOT_FOUND
+        return {
+            "found": False,
+            "candidates": [self._candidates[person] for person in candidates],
+        }
+
+    def by_company(self, company: str) -> tuple[Person, ...]:
+        """Return everyone working for the given company."""
+        return self._by_company.get(normalize_name(company), ())
+
+    def on_floor(self, floor: int) -> tuple[Person, ...]:
+        """Return everyone based on the given floor."""
+        return self._by_floor.get(floor, ())
+
+    def floors(self) -> list[int]:
+        """Return the floors anyone is based on, lowest first."""
+        return sorted(self._by_floor)
+
+
+def load_directory(path: str | os.PathLike[str] | None = None) -> Directory:
+    """Load the building directory.
+
+    Args:
+        path: A JSON file containing a list of objects with `name`, `company`,
+            `floor` and `in_building` keys, or a snapshot compiled from one (see
+            `snapshot`), which is opened in place instead of parsed. Defaults to
+            the `DIRECTORY_PATH` environment variable, or the built-in directory
+            when neither is set.
+    """
+    path = path or os.environ.get("DIRECTORY_PATH")
+    if not path:
+        return Directory(DEFAULT_PEOPLE)
+
+    from snapshot import is_snapshot, open_snapshot
+
+    if is_snapshot(path):
+        return open_snapshot(path).directory
+
+    with Path(path).open(encoding="utf-8") as f:
+        records = json.load(f)
+
+    return Directory(
+        Person(
+            name=record["name"],
+            company=record["company"],
+            floor=int(record["floor"]),
+            in_building=bool(record.get("in_building", False)),
+        )
+        for record in records
+    )
@@ -0,0 +1,205 @@
+import heapq
+from array import array
+from collections import Counter
+from collections.abc import Mapping, Sequence
+
+_VOWELS = frozenset("AEIOU")
+_FRONT_VOWELS = frozenset("EIY")
+_SILENT_STARTS = {"KN": "N", "GN": "N", "PN": "N", "WR": "R", "AE": "E", "WH": "W"}
+
+# trigrams shared by more names than this are too common to narrow the search
+_MAX_POSTING = 512
+_MIN_TRIGRAMS = 3
+_RERANK = 24
+
+
+def phonetic_key(word: str) -> str:
+    """Return a Metaphone-style phonetic key for a single word.
+
+    This is a compact subset of Metaphone that folds the spellings speech to
+    text most often confuses (doubled letters, silent h, c/k/s, ph/f, ...) onto
+    the same key, e.g. "Colins" and "Collins" both map to "KLNS".
+    """
+    w = "".join(c for c in word.upper() if "A" <= c <= "Z")
+    if not w:
+        return ""
+    if w[:2] in _SILENT_STARTS:
+        w = _SILENT_STARTS[w[:2]] + w[2:]
+    elif w[0] == "X":
+        w = "S" + w[1:]
+
+    out: list[str] = []
+    n = len(w)
+    i = 0
+    while i < n:
+        c = w[i]
+        nxt = w[i + 1] if i + 1 < n else ""
+        code = ""
+        skip = 0
+
+        if c == nxt and c != "C":
+            i += 1
+            continue
+        if c in _VOWELS:
+            code = "A" if i == 0 else ""
+        elif c == "B":
+            code = "" if i == n - 1 and i > 0 and w[i - 1] == "M" else "B"
+        elif c == "C":
+            if nxt == "H":
+                code, skip = "X", 1
+            elif nxt in _FRONT_VOWELS:
+                code = "S"
+            elif nxt == "K" or nxt == "C":
+                code, skip = "K", 1
+            else:
+                code = "K"
+        elif c == "D":
+            if nxt == "G" and i + 2 < n and w[i + 2] in _FRONT_VOWELS:
+                code, skip = "J", 2
+            else:
+                code = "T"
+        elif c == "G":
+            if nxt == "H":
+                code, skip = ("K" if i == 0 else ""), 1
+            elif nxt == "N" and i + 2 >= n:
+                code = ""
+            elif nxt in _FRONT_VOWELS:
+                code = "J"
+            else:
+                code = "K"
+        elif c == "H":
+            prev = w[i - 1] if i > 0 else ""
+            code = "H" if nxt in _VOWELS and prev not in "CGPST" else ""
+        elif c == "K":
+            code = "" if i > 0 and w[i - 1] == "C" else "K"
+        elif c == "P":
+            code, skip = ("F", 1) if nxt == "H" else ("P", 0)
+        elif c == "Q":
+            code = "K"
+        elif c == "S":
+            if nxt == "H":
+                code, skip = "X", 1
+            elif nxt == "I" and i + 2 < n and w[i + 2] in "OA":
+                code = "X"
+            else:
+                code = "S"
+        elif c == "T":
+            if nxt == "H":
+                code, skip = "0", 1
+            elif nxt == "I" and i + 2 < n and w[i + 2] in "OA":
+                code = "X"
+            else:
+                code = "T"
+        elif c == "V":
+            code = "F"
+        elif c in "WY":
+            code = c if nxt in _VOWELS else ""
+        elif c == "X":
+            code = "KS"
+        elif c == "Z":
+            code = "S"
+        else:
+            code = c
+
+        if code and not (out and out[-1] == code):
+            out.append(code)
+        i += 1 + skip
+
+    return "".join(out)
+
+
+def _trigrams(text: str) -> list[str]:
+    padded = f"  {text} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+Postings = Mapping[str, Sequence[int]]
+"""A key's name indexes, in ascending order."""
+
+
+def build_index(names: Sequence[str]) -> tuple[Postings, Postings, Postings]:
+    """Return the phonetic, phonetic word and trigram indexes over `names`."""
+    phonetic: dict[str, array] = {}
+    token_keys: dict[str, array] = {}
+    trigrams: dict[str, array] = {}
+
+    for idx, name in enumerate(names):
+        keys = [k for k in (phonetic_key(t) for t in name.split()) if k]
+        phonetic.setdefault(" ".join(keys), array("I")).append(idx)
+        for key in set(keys):
+            token_keys.setdefault(key, array("I")).append(idx)
+        for gram in set(_trigrams(name)):
+            trigrams.setdefault(gram, array("I")).append(idx)
+    return phonetic, token_keys, trigrams
+
+
+class NameMatcher:
+    """Approximate name search over a fixed list of names.
+
+    The index is built once up front and combines two candidate sources: a
+    phonetic index (whole names and individual words) that catches misheard
+    spellings, and a character trigram index that catches typos and partial
+    names. Candidates from both are re-ranked by trigram similarity, with a
+    boost for names that sound the same.
+
+    Names are expected to be normalized already (see `directory.normalize_name`).
+    The indexes are built from `names` (see `build_index`) unless `index` is
+    given, e.g. read from a directory snapshot.
+    """
+
+    __slots__ = ("_names", "_phonetic", "_token_keys", "_trigrams")
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        index: tuple[Postings, Postings, Postings] | None = None,
+    ) -> None:
+        self._names = names if index is not None else tuple(names)
+        self._phonetic, self._token_keys, self._trigrams = (
+            index if index is not None else build_index(names)
+        )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(
+        self, query: str, *, limit: int = 3, min_score: float = 0.5
+    ) -> list[tuple[int, float]]:
+        """Return up to `limit` `(index, score)` pairs, best match first.
+
+        Scores are in the range [0, 1], where 1 is an exact match.
+        """
+        if not query:
+            return []
+
+        keys = [k for k in (phonetic_key(t) for t in query.split()) if k]
+        votes: Counter[int] = Counter()
+        phonetic_hits = self._phonetic.get(" ".join(keys), ())
+        for idx in phonetic_hits:
+            votes[idx] += 4
+        for key in keys:
+            posting = self._token_keys.get(key, ())
+            if len(posting) <= _MAX_POSTING:
+                votes.update(posting)
+
+        query_grams = frozenset(_trigrams(query))
+        postings = sorted(
+            (p for p in (self._trigrams.get(g) for g in query_grams) if p),
+            key=len,
+        )
+        for i, posting in enumerate(postings):
+            if i >= _MIN_TRIGRAMS and len(posting) > _MAX_POSTING:
+                break
+            votes.update(posting)
+
+        phonetic_set = frozenset(phonetic_hits)
+        scored: list[tuple[float, int]] = []
+        for idx, _ in votes.most_common(_RERANK):
+            grams = frozenset(_trigrams(self._names[idx]))
+            score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+            if idx in phonetic_set:
+                score = 0.5 + score / 2
+            if score >= min_score:
+                scored.append((score, idx))
+
+        return [(idx, score) for score, idx in heapq.nlargest(limit, scored)]
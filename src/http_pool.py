@@ -0,0 +1,38 @@
+import asyncio
+
+import aiohttp
+
+_CONNECTION_LIMIT = 100
+_DNS_CACHE_TTL = 300
+
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+
+def http_session() -> aiohttp.ClientSession:
+    """Return the process-wide pooled HTTP session for the running event loop.
+
+    The session keeps connections and DNS results alive between tool calls, so
+    repeated requests to the same backend skip the TCP and TLS handshakes. A new
+    session is created if the previous one was closed or belongs to another loop.
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=_CONNECTION_LIMIT, ttl_dns_cache=_DNS_CACHE_TTL
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+    return _session
+
+
+async def close_http_session() -> None:
+    """Close the pooled HTTP session, if one is open."""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
@@ -0,0 +1,272 @@
+"""Kiosk mode: many lobby rooms served from one process and one event loop.
+
+The worker (`agent.py dev|start`) runs every job in its own process or, with
+the thread executor, on its own event loop, so nothing bound to a loop (HTTP
+and WebSocket connection pools, the turn detector's queue) can be shared
+between rooms. A kiosk host instead joins a fixed list of lobby rooms itself
+and serves them all on one loop, with one set of STT, LLM and TTS clients,
+one pooled HTTP session and one turn-detection queue.
+
+Usage:
+    uv run python src/kiosk.py --rooms lobby-1,lobby-2,lobby-3 [--max-cpu 0.75]
+
+Connects with `LIVEKIT_URL`, `LIVEKIT_API_KEY` and `LIVEKIT_API_SECRET`.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+import psutil
+from livekit import api, rtc
+
+from agent import Models, create_models, load_resources, start_lobby
+from audio_budget import NoiseCancellationPolicy
+from http_pool import close_http_session, http_session
+from latency import start_exporters
+from loopwatch import StallWatchdog
+from turns import TurnDetectionService
+
+logger = logging.getLogger("agent")
+
+KIOSK_IDENTITY = "receptionist"
+
+
+def _process_cpu() -> Callable[[], float]:
+    process = psutil.Process()
+    process.cpu_percent(None)
+    return lambda: process.cpu_percent(None) / 100
+
+
+class AdmissionControl:
+    """Decides whether the process can take another session.
+
+    Load is the larger of two ratios: the process's CPU use, in cores, to
+    `max_cpu`, and event-loop lag to `max_lag`. Lag is measured every `poll`
+    seconds (how late a timer fires) and the `percentile` of each `interval`
+    is kept, so a single slow callback doesn't close the door; both are
+    smoothed over recent intervals. A load of 1 or more means
+    the process is at its budget, and the sessions already running would get
+    slower if another one joined.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_cpu: float = 0.75,
+        max_lag: float = 0.05,
+        interval: float = 1.0,
+        poll: float = 0.02,
+        percentile: float = 0.95,
+        smoothing: float = 0.5,
+        cpu: Callable[[], float] | None = None,
+    ) -> None:
+        self._max_cpu = max_cpu
+        self._max_lag = max_lag
+        self._interval = interval
+        self._poll = poll
+        self._percentile = percentile
+        self._smoothing = smoothing
+        self._cpu_source = cpu if cpu is not None else _process_cpu()
+        self._sampler: asyncio.Task[None] | None = None
+        self.cpu = 0.0
+        """Smoothed CPU use of the process, in cores (1.0 is one core busy)."""
+        self.lag = 0.0
+        """Smoothed event-loop lag, in seconds."""
+
+    @property
+    def load(self) -> float:
+        return max(self.cpu / self._max_cpu, self.lag / self._max_lag)
+
+    def admits(self) -> bool:
+        return self.load < 1.0
+
+    def sample(self, lag: float) -> None:
+        """Record one interval's CPU use and loop lag."""
+        a = self._smoothing
+        self.cpu += a * (self._cpu_source() - self.cpu)
+        self.lag += a * (lag - self.lag)
+
+    def start(self) -> None:
+        if self._sampler is None:
+            self._sampler = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+
+    async def wait_for_capacity(self) -> None:
+        """Return once the process is under its budget."""
+        while not self.admits():
+            await asyncio.sleep(self._interval)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lags = []
+            end = loop.time() + self._interval
+            while (before := loop.time()) < end:
+                await asyncio.sleep(self._poll)
+                lags.append(loop.time() - before - self._poll)
+            lags.sort()
+            self.sample(lags[min(len(lags) - 1, int(len(lags) * self._percentile))])
+
+
+class KioskHost:
+    """Serves a fixed set of lobby rooms from one event loop.
+
+    Each room is joined once the admission control has room for it, and
+    rejoined `retry` seconds after its session ends or its connection drops.
+    Everything the sessions can share is created once: the resources from
+    `agent.load_resources`, the pipeline's models, the HTTP connection pool
+    and the turn-detection queue, which runs up to `turn_batch` end-of-turn
+    requests together.
+    """
+
+    def __init__(
+        self,
+        rooms: Iterable[str],
+        *,
+        url: str | None = None,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        max_cpu: float = 0.75,
+        max_lag: float = 0.05,
+        turn_batch: int = 1,
+        retry: float = 5.0,
+    ) -> None:
+        self.rooms = list(dict.fromkeys(rooms))
+        self._url = url or os.environ["LIVEKIT_URL"]
+        self._api_key = api_key or os.environ["LIVEKIT_API_KEY"]
+        self._api_secret = api_secret or os.environ["LIVEKIT_API_SECRET"]
+        self._retry = retry
+        self.watchdog = StallWatchdog()
+        self.admission = AdmissionControl(max_cpu=max_cpu, max_lag=max_lag)
+        self.turns = TurnDetectionService(max_batch=turn_batch)
+        self.sessions: dict[str, Any] = {}
+
+    async def run(self) -> None:
+        """Serve the rooms until cancelled."""
+        resources = load_resources()
+        # callers joining a busy host get cheaper noise cancellation
+        resources["noise_cancellation"] = NoiseCancellationPolicy(
+            lambda: self.admission.load
+        )
+        models = create_models(
+            resources["vad"],
+            turn_detection=self.turns.model(),
+            http_session=http_session(),
+        )
+        self.watchdog.start()
+        self.admission.start()
+        resources["visitors"].start()
+        close_exporters = await start_exporters()
+        try:
+            await asyncio.gather(
+                *(self._serve(name, resources, models) for name in self.rooms)
+            )
+        finally:
+            await close_exporters()
+            await resources["visitors"].aclose()
+            await self.turns.aclose()
+            await self.admission.aclose()
+            await self.watchdog.aclose()
+            await close_http_session()
+
+    async def _serve(
+        self, name: str, resources: dict[str, Any], models: Models
+    ) -> None:
+        while True:
+            await self.admission.wait_for_capacity()
+            try:
+                await self._host(name, resources, models)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("kiosk room failed", extra={"room": name})
+            await asyncio.sleep(self._retry)
+
+    async def _host(self, name: str, resources: dict[str, Any], models: Models) -> None:
+        shutdown: list[Callable[[], Awaitable[None]]] = []
+        ended = asyncio.Event()
+        room = rtc.Room()
+        room.on("disconnected", lambda *_: ended.set())
+        session = None
+        try:
+            await room.connect(self._url, self._token(name))
+            session = await start_lobby(room, resources, models, shutdown.append)
+            session.on("close", lambda _: ended.set())
+            self.sessions[name] = session
+            logger.info(
+                "kiosk room joined",
+                extra={"room": name, "load": round(self.admission.load, 2)},
+            )
+            await ended.wait()
+        finally:
+            self.sessions.pop(name, None)
+            if session is not None:
+                await session.aclose()
+            for callback in reversed(shutdown):
+                with contextlib.suppress(Exception):
+                    await callback()
+            await room.disconnect()
+
+    def _token(self, room: str) -> str:
+        return (
+            api.AccessToken(self._api_key, self._api_secret)
+            .with_identity(KIOSK_IDENTITY)
+            .with_kind("agent")
+            .with_grants(api.VideoGrants(room_join=True, room=room, agent=True))
+            .to_jwt()
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--rooms",
+        default=os.environ.get("KIOSK_ROOMS", ""),
+        help="comma-separated lobby rooms to serve (default: $KIOSK_ROOMS)",
+    )
+    parser.add_argument(
+        "--max-cpu",
+        type=float,
+        default=0.75,
+        help="CPU use, in cores, to stop admitting rooms at",
+    )
+    parser.add_argument(
+        "--max-lag",
+        type=float,
+        default=0.05,
+        help="event-loop lag, in seconds, to stop admitting rooms at",
+    )
+    parser.add_argument(
+        "--turn-batch",
+        type=int,
+        default=1,
+        help="end-of-turn requests to run together (default: 1, no batching)",
+    )
+    args = parser.parse_args()
+    rooms = [room.strip() for room in args.rooms.split(",") if room.strip()]
+    if not rooms:
+        parser.error("no rooms to serve, pass --rooms or set KIOSK_ROOMS")
+
+    logging.basicConfig(level=logging.INFO)
+    host = KioskHost(
+        rooms,
+        max_cpu=args.max_cpu,
+        max_lag=args.max_lag,
+        turn_batch=args.turn_batch,
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(host.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from types import CodeType
+from typing import Any, TypeVar
+
+from aiohttp import web
+from livekit.agents import AgentSession, MetricsCollectedEvent, metrics
+
+logger = logging.getLogger("agent")
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+STAGES = (
+    "end_of_utterance",
+    "stt_final",
+    "llm_ttft",
+    "tool",
+    "tts_ttfb",
+    "loop_lag",
+    "loop_stall",
+)
+
+BUCKETS: tuple[float, ...] = (
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    1.5,
+    2.5,
+    5.0,
+    10.0,
+)
+"""Histogram bucket upper bounds, in seconds."""
+
+_labels: contextvars.ContextVar[tuple[tuple[str, str], ...]] = contextvars.ContextVar(
+    "latency_labels", default=()
+)
+
+_tool_codes: dict[CodeType, str] = {}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; its memory doesn't grow with observations."""
+
+    __slots__ = ("count", "counts", "sum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile, interpolating linearly inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class LatencyRecorder:
+    """Per-stage latency histograms for the voice pipeline.
+
+    Histograms are keyed by stage and label set (e.g. room, tool). At most
+    `max_series` label sets are kept; the least recently updated one is dropped
+    first, so memory stays bounded however many rooms a worker serves.
+    """
+
+    def __init__(self, *, max_series: int = 512) -> None:
+        self._max_series = max_series
+        self._series: OrderedDict[
+            tuple[str, tuple[tuple[str, str], ...]], Histogram
+        ] = OrderedDict()
+
+    def observe(self, stage: str, seconds: float, **labels: str) -> None:
+        """Record one latency sample for `stage`, labelled with the bound labels."""
+        key = (stage, _labels.get() + tuple(sorted(labels.items())))
+        histogram = self._series.get(key)
+        if histogram is None:
+            histogram = self._series[key] = Histogram()
+            if len(self._series) > self._max_series:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(key)
+        histogram.observe(seconds)
+
+    def bind(self, labels: Mapping[str, Any]) -> None:
+        """Attach `labels` to everything observed from the current context on.
+
+        Tasks created afterwards (the session's and its tools') inherit them.
+        """
+        _labels.set(tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def attach(self, session: AgentSession) -> None:
+        """Record the session's pipeline metrics as they are collected."""
+
+        def on_metrics(ev: MetricsCollectedEvent) -> None:
+            m = ev.metrics
+            if isinstance(m, metrics.EOUMetrics):
+                self.observe("end_of_utterance", m.end_of_utterance_delay)
+                self.observe("stt_final", m.transcription_delay)
+            elif isinstance(m, metrics.LLMMetrics) and not m.cancelled:
+                self.observe("llm_ttft", m.ttft)
+            elif isinstance(m, metrics.TTSMetrics) and not m.cancelled:
+                self.observe("tts_ttfb", m.ttfb)
+
+        session.on("metrics_collected", on_metrics)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Return every series as a JSON-serializable summary."""
+        return [
+            {
+                "stage": stage,
+                "labels": dict(labels),
+                "count": h.count,
+                "sum": h.sum,
+                "p50": h.quantile(0.5),
+                "p95": h.quantile(0.95),
+                "p99": h.quantile(0.99),
+                "buckets": list(h.counts),
+            }
+            for (stage, labels), h in self._series.items()
+        ]
+
+    def render_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        name = "agent_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Voice pipeline latency per stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, labels), h in self._series.items():
+            base = ",".join(
+                f'{k}="{_escape(v)}"' for k, v in (("stage", stage), *labels)
+            )
+            cumulative = 0
+            for upper, n in zip((*BUCKETS, "+Inf"), h.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{base},le="{upper}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{base}}} {h.sum}")
+            lines.append(f"{name}_count{{{base}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_jsonl(self) -> str:
+        """Return the current snapshot as JSONL, one line per series."""
+        now = time.time()
+        pid = os.getpid()
+        return "".join(
+            json.dumps({"time": now, "pid": pid, **series}) + "\n"
+            for series in self.snapshot()
+        )
+
+    def write_jsonl(self, path: str | os.PathLike[str]) -> None:
+        """Append the current snapshot to a JSONL file, one line per series."""
+        _append(path, self.to_jsonl())
+
+
+def _append(path: str | os.PathLike[str], text: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_recorder = LatencyRecorder()
+
+
+def get_recorder() -> LatencyRecorder:
+    """Return the process-wide latency recorder."""
+    return _recorder
+
+
+def timed_tool(func: F) -> F:
+    """Record how long a function tool takes, labelled with the tool's name.
+
+    Apply it under `@function_tool`, so the tool keeps its signature and docstring.
+    """
+    # the innermost function, past wrappers such as `offload`, so that a stall
+    # in its body is attributed to the tool (see `tool_name`)
+    _tool_codes[inspect.unwrap(func).__code__] = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _recorder.observe("tool", time.perf_counter() - start, tool=func.__name__)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def tool_name(code: CodeType) -> str | None:
+    """Return the tool name if `code` is the body of a `timed_tool`."""
+    return _tool_codes.get(code)
+
+
+async def serve_prometheus(
+    port: int, *, host: str = "0.0.0.0", recorder: LatencyRecorder | None = None
+) -> web.AppRunner:
+    """Serve the recorder's histograms at `http://host:port/metrics`."""
+    recorder = recorder or _recorder
+
+    async def handle(_: web.Request) -> web.Response:
+        return web.Response(
+            text=recorder.render_prometheus(), content_type="text/plain"
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def start_exporters() -> Callable[[], Awaitable[None]]:
+    """Start the exporters configured in the environment.
+
+    - `METRICS_JSONL_PATH`: append a snapshot to this file periodically.
+    - `METRICS_PORT`: serve Prometheus text on this port. Only one process can
+      bind it, so with several job processes per node prefer the JSONL export.
+
+    Returns a coroutine function that stops them.
+    """
+    tasks: list[asyncio.Task[None]] = []
+    runners: list[web.AppRunner] = []
+
+    if path := os.environ.get("METRICS_JSONL_PATH"):
+        tasks.append(asyncio.create_task(export_jsonl(path)))
+    if port := os.environ.get("METRICS_PORT"):
+        try:
+            runners.append(await serve_prometheus(int(port)))
+        except OSError as e:
+            logger.warning(f"could not serve metrics on port {port}: {e}")
+
+    async def close() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for runner in runners:
+            await runner.cleanup()
+
+    return close
+
+
+async def export_jsonl(
+    path: str | os.PathLike[str],
+    *,
+    interval: float = 30.0,
+    recorder: LatencyRecorder | None = None,
+) -> None:
+    """Append a snapshot to `path` every `interval` seconds until cancelled.
+
+    The snapshot is taken on the loop, which is where the series are updated,
+    and only written to the file on a thread.
+    """
+    recorder = recorder or _recorder
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(_append, path, recorder.to_jsonl())
+    finally:
+        await asyncio.to_thread(_append, path, recorder.to_jsonl())
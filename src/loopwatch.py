@@ -0,0 +1,245 @@
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from collections.abc import AsyncIterator
+from pathlib import Path
+from types import FrameType
+from typing import NamedTuple
+
+import latency
+from latency import LatencyRecorder, get_recorder, tool_name
+
+logger = logging.getLogger("agent")
+
+_APP_DIR = str(Path(__file__).resolve().parent)
+# instrumentation frames, never the cause of a stall
+_SKIP_FILES = frozenset({__file__, latency.__file__})
+_MAX_STACK = 32
+
+
+class Stall(NamedTuple):
+    """A period during which the event loop could not run anything else."""
+
+    duration: float
+    tool: str | None
+    """The function tool that was running, if any."""
+    task: str | None
+    """Name and coroutine of the asyncio task that was running."""
+    site: str | None
+    """Innermost application frame, as `file:line in function`."""
+    stack: list[str]
+
+    @property
+    def culprit(self) -> str:
+        return self.tool or self.site or self.task or "unknown"
+
+
+class LoopStallError(AssertionError):
+    """Raised in strict mode when a function tool blocked the event loop."""
+
+    def __init__(self, stalls: list[Stall]) -> None:
+        self.stalls = stalls
+        details = "\n\n".join(
+            "{} blocked the event loop for {:.1f} ms at {}\n{}".format(
+                s.tool, s.duration * 1000, s.site, "".join(s.stack)
+            )
+            for s in stalls
+        )
+        super().__init__(details)
+
+
+class _Capture(NamedTuple):
+    beat: float
+    tool: str | None
+    task: str | None
+    site: str | None
+    stack: list[str]
+
+
+class StallWatchdog:
+    """Detects event-loop stalls and attributes them to the code that caused them.
+
+    A heartbeat task on the loop measures how late each `interval` timer fires
+    (recorded as the `loop_lag` stage). A watcher thread notices when the
+    heartbeat is more than `threshold` seconds overdue and captures the loop
+    thread's stack while the blocking code is still running, so each stall can
+    be attributed to the function tool, task and line that caused it. Stalls are
+    logged, counted per culprit and recorded as the `loop_stall` stage.
+
+    With `strict=True`, `check()` raises `LoopStallError` for stalls caused by
+    function tools, so tests can fail tools that block the loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        strict: bool = False,
+        recorder: LatencyRecorder | None = None,
+    ) -> None:
+        self._threshold = threshold
+        self._interval = interval
+        self._strict = strict
+        self._recorder = recorder or get_recorder()
+        self._beat = time.monotonic()
+        self._capture: _Capture | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread = 0
+        self._heartbeat: asyncio.Task[None] | None = None
+        self._watcher: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self.counts: Counter[str] = Counter()
+        self.stalls: list[Stall] = []
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        if self._heartbeat is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        self._watcher = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watcher.start()
+
+    async def aclose(self) -> None:
+        """Stop watching."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        if self._watcher is not None:
+            self._stopped.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def check(self) -> None:
+        """In strict mode, raise `LoopStallError` if a tool has stalled the loop."""
+        if not self._strict:
+            return
+        blocking = [s for s in self.stalls if s.tool is not None]
+        if blocking:
+            raise LoopStallError(blocking)
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self._interval)
+            lag = max(0.0, time.monotonic() - self._beat - self._interval)
+            self._recorder.observe("loop_lag", lag)
+            if lag > self._threshold:
+                self._report(lag)
+
+    def _watch(self) -> None:
+        # poll often enough to catch the blocking code before it returns
+        poll = min(self._interval, self._threshold) / 2
+        while not self._stopped.wait(poll):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self._interval
+            if overdue > self._threshold and (
+                self._capture is None or self._capture.beat != beat
+            ):
+                self._capture = self._capture_stack(beat)
+
+    def _capture_stack(self, beat: float) -> _Capture | None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+
+        task = None
+        if self._loop is not None:
+            current = asyncio.current_task(self._loop)
+            if current is not None:
+                coro = current.get_coro()
+                task = "{} ({})".format(
+                    current.get_name(), getattr(coro, "__qualname__", coro)
+                )
+        return _Capture(
+            beat=beat,
+            tool=_find_tool(frame),
+            task=task,
+            site=_find_site(frame),
+            stack=traceback.format_list(
+                traceback.extract_stack(frame, limit=_MAX_STACK)
+            ),
+        )
+
+    def _report(self, duration: float) -> None:
+        capture = self._capture
+        if capture is None or capture.beat != self._beat:
+            # too short for the watcher to catch it in the act
+            capture = _Capture(self._beat, None, None, None, [])
+        self._capture = None
+
+        stall = Stall(
+            duration=duration,
+            tool=capture.tool,
+            task=capture.task,
+            site=capture.site,
+            stack=capture.stack,
+        )
+        self.stalls.append(stall)
+        del self.stalls[:-100]
+        self.counts[stall.culprit] += 1
+        self._recorder.observe(
+            "loop_stall", duration, **({"tool": stall.tool} if stall.tool else {})
+        )
+        logger.warning(
+            f"event loop blocked for {duration * 1000:.0f} ms by {stall.culprit}",
+            extra={
+                "stall_ms": round(duration * 1000, 1),
+                "tool": stall.tool,
+                "task": stall.task,
+                "site": stall.site,
+                "stack": "".join(stall.stack),
+            },
+        )
+
+
+def _find_tool(frame: FrameType | None) -> str | None:
+    name = None
+    while frame is not None:
+        name = tool_name(frame.f_code) or name
+        frame = frame.f_back
+    return name
+
+
+def _find_site(frame: FrameType | None) -> str | None:
+    while frame is not None:
+        code = frame.f_code
+        if (
+            code.co_filename.startswith(_APP_DIR)
+            and code.co_filename not in _SKIP_FILES
+        ):
+            return f"{Path(code.co_filename).name}:{frame.f_lineno} in {code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+@contextlib.asynccontextmanager
+async def watch_loop(
+    *, threshold: float = 0.005, strict: bool = True
+) -> AsyncIterator[StallWatchdog]:
+    """Watch the running loop for the duration of the block.
+
+    Defaults to strict mode with a 5 ms threshold, for tests: leaving the block
+    raises `LoopStallError` if any function tool blocked the loop.
+    """
+    watchdog = StallWatchdog(
+        threshold=threshold, interval=min(threshold, 0.05), strict=strict
+    )
+    watchdog.start()
+    try:
+        yield watchdog
+    finally:
+        await watchdog.aclose()
+    watchdog.check()
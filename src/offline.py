@@ -0,0 +1,250 @@
+import asyncio
+import json
+import re
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, NamedTuple
+from zoneinfo import ZoneInfo
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    utils,
+)
+from livekit.agents.llm import ToolChoice
+from livekit.agents.types import NOT_GIVEN
+
+from context_budget import estimate_tokens
+from directory import normalize_name
+from responses import GREETING, TOPIC_SYNONYMS
+
+
+class ToolCall(NamedTuple):
+    """A function tool call the scripted LLM should make."""
+
+    name: str
+    arguments: dict[str, Any]
+
+
+Step = str | list[ToolCall]
+"""A scripted reply: either text, or tool calls to run in parallel."""
+
+Script = Callable[[llm.ChatContext], Step]
+
+_MEETING = re.compile(
+    r"\b(?:meet(?:ing)?(?: with)?|see(?:ing)?|visiting)\s+"
+    r"([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)"
+)
+_ISO_TIME = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2})?(?:[+-]\d{2}:\d{2})?"
+)
+_CLOCK_TIME = re.compile(r"\bat (\d{1,2}):(\d{2})\b")
+_WEATHER = re.compile(r"\bweather in ([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)")
+_FLOOR = re.compile(r"\bfloor (\d+)\b")
+_CHECK_IN = re.compile(r"\bmy name is ([A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*)")
+_TOPICS = {
+    phrase: topic
+    for topic, synonyms in TOPIC_SYNONYMS.items()
+    for phrase in (topic, *synonyms)
+}
+
+
+def _meeting_time(text: str) -> str | None:
+    if m := _ISO_TIME.search(text):
+        return m.group(0)
+    if m := _CLOCK_TIME.search(text):
+        now = datetime.now(ZoneInfo("Europe/London"))
+        at = now.replace(
+            hour=int(m.group(1)), minute=int(m.group(2)), second=0, microsecond=0
+        )
+        return at.isoformat()
+    return None
+
+
+def _last_user_text(chat_ctx: llm.ChatContext) -> str:
+    for item in reversed(chat_ctx.items):
+        if item.type == "message" and item.role == "user":
+            return item.text_content or ""
+    return ""
+
+
+def _call_arguments(chat_ctx: llm.ChatContext, call_id: str) -> dict[str, Any]:
+    for item in reversed(chat_ctx.items):
+        if item.type == "function_call" and item.call_id == call_id:
+            return json.loads(item.arguments or "{}")
+    return {}
+
+
+def serial_receptionist_script(chat_ctx: llm.ChatContext) -> Step:
+    """Deterministic stand-in for the receptionist's LLM.
+
+    A guest who is "here to see Sarah Collins at 10:30" gets the same chain of
+    tool calls a model would make without `prepare_visit`: `lookup_directory`,
+    then `check_available`, then `get_wait_time` when a meeting time was given,
+    one LLM round each. Weather, floors, facilities and check-ins map to their
+    tools; anything else gets a greeting.
+    """
+    last = next(
+        (
+            item
+            for item in reversed(chat_ctx.items)
+            if item.type in ("message", "function_call_output")
+        ),
+        None,
+    )
+
+    if last is not None and last.type == "function_call_output":
+        args = _call_arguments(chat_ctx, last.call_id)
+        if last.is_error:
+            return "Sorry, something went wrong. Could you say that again?"
+        if last.name in ("lookup_directory", "prepare_visit"):
+            if "'found': True" not in last.output:
+                return "I'm sorry, I couldn't find {} in the directory.".format(
+                    args.get("name", "them")
+                )
+            if last.name == "lookup_directory":
+                return [ToolCall("check_available", {"name": args["name"]})]
+        if last.name == "check_available":
+            time = _meeting_time(_last_user_text(chat_ctx))
+            if time is not None and "is currently in the building" in last.output:
+                return [
+                    ToolCall("get_wait_time", {"contact": args["name"], "time": time})
+                ]
+        return last.output
+
+    text = _last_user_text(chat_ctx)
+    if m := _MEETING.search(text):
+        return [ToolCall("lookup_directory", {"name": m.group(1)})]
+    if m := _WEATHER.search(text):
+        return [ToolCall("lookup_weather", {"location": m.group(1)})]
+    if m := _FLOOR.search(text):
+        return [ToolCall("get_directions", {"floor": int(m.group(1))})]
+    if m := _CHECK_IN.search(text):
+        return [ToolCall("check_in", {"name": m.group(1)})]
+    words = f" {normalize_name(text)} "
+    for phrase, topic in _TOPICS.items():
+        if f" {phrase} " in words:
+            return [ToolCall("get_building_info", {"topic": topic})]
+    return GREETING
+
+
+def receptionist_script(chat_ctx: llm.ChatContext) -> Step:
+    """Like `serial_receptionist_script`, but arrivals go through `prepare_visit`.
+
+    The lookup, availability check and wait estimate come back from a single
+    tool call, so the guest's answer takes one LLM round instead of three.
+    """
+    last = chat_ctx.items[-1] if chat_ctx.items else None
+    is_user = last is not None and last.type == "message" and last.role == "user"
+    text = (last.text_content or "") if is_user else ""
+    if m := _MEETING.search(text):
+        return [
+            ToolCall("prepare_visit", {"name": m.group(1), "time": _meeting_time(text)})
+        ]
+    return serial_receptionist_script(chat_ctx)
+
+
+class ScriptedLLM(llm.LLM):
+    """LLM that answers from a script instead of a model, entirely offline.
+
+    Every request is answered with `script(chat_ctx)` after `ttft` seconds, plus
+    `prefill_per_token` seconds for each (estimated) prompt token, as a real
+    model's time to first token grows with the prompt. Text replies are
+    streamed word by word, `token_interval` seconds apart. Use it to test and
+    load-test the session loop and tools without network access.
+    """
+
+    def __init__(
+        self,
+        script: Script = receptionist_script,
+        *,
+        ttft: float = 0.0,
+        token_interval: float = 0.0,
+        prefill_per_token: float = 0.0,
+    ) -> None:
+        super().__init__()
+        self._script = script
+        self._ttft = ttft
+        self._token_interval = token_interval
+        self._prefill_per_token = prefill_per_token
+
+    @property
+    def model(self) -> str:
+        return "scripted"
+
+    @property
+    def provider(self) -> str:
+        return "offline"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.FunctionTool | llm.RawFunctionTool] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> "ScriptedLLMStream":
+        return ScriptedLLMStream(
+            self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options
+        )
+
+
+class ScriptedLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        scripted: ScriptedLLM = self._llm  # type: ignore[assignment]
+        step = scripted._script(self._chat_ctx)
+        request_id = utils.shortuuid("scripted_")
+        # a rough count (four characters per token) keeps the usage metrics plausible
+        prompt_tokens = estimate_tokens(self._chat_ctx.items)
+
+        ttft = scripted._ttft + scripted._prefill_per_token * prompt_tokens
+        if ttft:
+            await asyncio.sleep(ttft)
+
+        completion_tokens = 0
+        if isinstance(step, str):
+            for i, word in enumerate(step.split(" ")):
+                if i and scripted._token_interval:
+                    await asyncio.sleep(scripted._token_interval)
+                self._event_ch.send_nowait(
+                    llm.ChatChunk(
+                        id=request_id,
+                        delta=llm.ChoiceDelta(
+                            role="assistant", content=f" {word}" if i else word
+                        ),
+                    )
+                )
+                completion_tokens += 1
+        else:
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(
+                        role="assistant",
+                        tool_calls=[
+                            llm.FunctionToolCall(
+                                name=call.name,
+                                arguments=json.dumps(call.arguments),
+                                call_id=utils.shortuuid("call_"),
+                            )
+                            for call in step
+                        ],
+                    ),
+                )
+            )
+            completion_tokens = len(step)
+
+        self._event_ch.send_nowait(
+            llm.ChatChunk(
+                id=request_id,
+                usage=llm.CompletionUsage(
+                    completion_tokens=completion_tokens,
+                    prompt_tokens=prompt_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            )
+        )
@@ -0,0 +1,261 @@
+import asyncio
+import functools
+import importlib
+import inspect
+import logging
+import multiprocessing as mp
+import os
+import time
+import weakref
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal, TypeVar
+
+from livekit.agents import ToolError
+
+from latency import LatencyRecorder, get_recorder
+
+logger = logging.getLogger("agent")
+
+R = TypeVar("R")
+
+Kind = Literal["thread", "process"]
+
+
+class OffloadStats:
+    """Counters for one offloaded tool."""
+
+    __slots__ = ("completed", "failed", "running", "timeouts", "waiting")
+
+    def __init__(self) -> None:
+        self.waiting = 0
+        """Calls waiting for one of the tool's concurrency slots."""
+        self.running = 0
+        """Calls submitted to the pool (queued for a worker or running)."""
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Offloader:
+    """Runs sync and CPU-bound work off the event loop, on bounded pools.
+
+    The event loop also drives the session's real-time audio, so anything that
+    holds it for more than a few milliseconds adds jitter. Blocking I/O and
+    short CPU work go to a thread pool of `max_threads`; heavy CPU work goes to
+    a process pool of `max_processes`, where it doesn't contend for the GIL.
+
+    Each call is labelled with a name (the tool's), which gets its own
+    concurrency limit and counters. The time a call waits for a slot and a
+    worker is recorded as the `offload_wait` stage.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: int = 4,
+        max_processes: int | None = None,
+        recorder: LatencyRecorder | None = None,
+    ) -> None:
+        self._max_threads = max_threads
+        self._max_processes = max_processes or max(1, (os.cpu_count() or 2) // 2)
+        self._recorder = recorder or get_recorder()
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._stats: dict[str, OffloadStats] = {}
+        # semaphores are bound to the loop they are first used on
+        self._limits: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Return the counters of every offloaded tool."""
+        return {name: s.as_dict() for name, s in self._stats.items()}
+
+    async def run(
+        self,
+        name: str,
+        func: Callable[..., R],
+        *args: Any,
+        kind: Kind = "thread",
+        limit: int | None = None,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> R:
+        """Run `func(*args, **kwargs)` on the `kind` pool and return its result.
+
+        At most `limit` calls named `name` are submitted at once; the rest wait
+        in line. A call that takes longer than `timeout` seconds raises
+        `ToolError`, so the LLM can tell the user; the work itself can't be
+        interrupted, and keeps its slot until it finishes.
+
+        For the process pool, `func` must be importable by its module and
+        qualified name, and its arguments and result picklable.
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = OffloadStats()
+        loop = asyncio.get_running_loop()
+
+        submitted = time.monotonic()
+        semaphore = self._limit(loop, name, limit) if limit is not None else None
+        if semaphore is not None:
+            stats.waiting += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                stats.waiting -= 1
+
+        if kind == "process":
+            target = (func.__module__, func.__qualname__)
+            executor = self._process_pool()
+        else:
+            target = func
+            executor = self._thread_pool()
+
+        try:
+            future = loop.run_in_executor(
+                executor, functools.partial(_call, target, args, kwargs)
+            )
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        stats.running += 1
+
+        def on_done(f: asyncio.Future[Any]) -> None:
+            stats.running -= 1
+            if semaphore is not None:
+                semaphore.release()
+            if f.cancelled() or f.exception() is not None:
+                stats.failed += 1
+            else:
+                stats.completed += 1
+
+        future.add_done_callback(on_done)
+
+        try:
+            started, result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            logger.warning(
+                f"offloaded tool {name} timed out",
+                extra={"tool": name, "timeout": timeout, **stats.as_dict()},
+            )
+            raise ToolError(
+                f"{name} is taking too long, please try again in a moment"
+            ) from None
+
+        self._recorder.observe("offload_wait", started - submitted, tool=name)
+        return result
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Shut the pools down. They are recreated if used again."""
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=wait, cancel_futures=True)
+        self._threads = self._processes = None
+
+    def _limit(
+        self, loop: asyncio.AbstractEventLoop, name: str, limit: int
+    ) -> asyncio.Semaphore:
+        limits = self._limits.setdefault(loop, {})
+        semaphore = limits.get(name)
+        if semaphore is None:
+            semaphore = limits[name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def _thread_pool(self) -> Executor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                self._max_threads, thread_name_prefix="offload"
+            )
+        return self._threads
+
+    def _process_pool(self) -> Executor:
+        if self._processes is None:
+            # job processes run threads, so never fork them
+            method = (
+                "forkserver" if "forkserver" in mp.get_all_start_methods() else None
+            )
+            self._processes = ProcessPoolExecutor(
+                self._max_processes, mp_context=mp.get_context(method)
+            )
+        return self._processes
+
+
+def _call(
+    target: Callable[..., Any] | tuple[str, str],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> tuple[float, Any]:
+    started = time.monotonic()
+    if isinstance(target, tuple):
+        # in a pool process: look the function up, past its `offload` wrapper
+        module, qualname = target
+        obj: Any = importlib.import_module(module)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+        target = inspect.unwrap(obj)
+    return started, target(*args, **kwargs)
+
+
+_offloader = Offloader()
+
+
+def get_offloader() -> Offloader:
+    """Return the process-wide offloader."""
+    return _offloader
+
+
+def offload(
+    kind: Kind = "thread",
+    *,
+    limit: int | None = None,
+    timeout: float | None = None,
+) -> Callable[[Callable[..., R]], Callable[..., Awaitable[R]]]:
+    """Declare a sync function as blocking or CPU-bound, to run off the event loop.
+
+    The decorated function becomes a coroutine function that runs the original
+    on the shared `Offloader`, with at most `limit` concurrent calls and a
+    `timeout`. Function tools keep their signature and docstring, so apply it
+    under `@function_tool` (and `@timed_tool`):
+
+        @function_tool
+        @timed_tool
+        @offload(limit=4, timeout=2.0)
+        def lookup_directory(self, context: RunContext, name: str) -> dict: ...
+
+    `kind="process"` is for module-level functions only: methods can't be sent
+    to another process.
+    """
+
+    def decorator(func: Callable[..., R]) -> Callable[..., Awaitable[R]]:
+        if inspect.iscoroutinefunction(func):
+            raise TypeError(
+                f"{func.__qualname__} is async: only sync code is offloaded"
+            )
+        if kind == "process" and "." in func.__qualname__:
+            raise TypeError(
+                f"{func.__qualname__} must be a module-level function to run"
+                " in a process"
+            )
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> R:
+            return await _offloader.run(
+                func.__name__,
+                func,
+                *args,
+                kind=kind,
+                limit=limit,
+                timeout=timeout,
+                **kwargs,
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,94 @@
+import asyncio
+import contextlib
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+R = TypeVar("R")
+
+
+class Prefetcher:
+    """Speculative tool results, started before the LLM asks for them.
+
+    When one tool's result makes the next call predictable (a guest who was
+    found in the directory is about to be checked for availability), `warm`
+    starts that work in the background. The tool that needs it calls `get`
+    with the same key and picks up the running or finished result instead of
+    starting from scratch.
+
+    Speculative results are only reused for `max_age` seconds, and at most
+    `max_entries` are kept. Speculation never fails a tool: if the warmed work
+    raised, `get` runs it again and lets that call's error through.
+    """
+
+    __slots__ = ("_max_age", "_max_entries", "_tasks", "hits", "misses")
+
+    def __init__(self, *, max_age: float = 30.0, max_entries: int = 32) -> None:
+        self._max_age = max_age
+        self._max_entries = max_entries
+        # key -> (task, monotonic expiry), oldest first
+        self._tasks: dict[Hashable, tuple[asyncio.Task[Any], float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._tasks.get(key)  # type: ignore[call-overload]
+        return entry is not None and time.monotonic() < entry[1]
+
+    def warm(self, key: Hashable, factory: Callable[[], Awaitable[R]]) -> None:
+        """Start `factory()` in the background, unless `key` is already warm."""
+        if key in self:
+            return
+        self._drop(key)
+        while len(self._tasks) >= self._max_entries:
+            self._drop(next(iter(self._tasks)))
+
+        task = asyncio.ensure_future(factory())
+        # a failed speculation is retried by `get`, never reported on its own
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._tasks[key] = (task, time.monotonic() + self._max_age)
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[R]]) -> R:
+        """Return the warmed result for `key`, or await `factory()` if there is none."""
+        entry = self._tasks.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            task = entry[0]
+            try:
+                # shielded: one caller giving up doesn't cancel the shared work
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            except Exception:
+                pass
+            else:
+                self.hits += 1
+                return result
+            self._drop(key)
+
+        self.misses += 1
+        return await factory()
+
+    def discard(self, key: Hashable) -> None:
+        """Forget `key`, e.g. because the data it was computed from changed."""
+        self._drop(key)
+
+    def cancel(self) -> None:
+        """Cancel and forget all speculative work."""
+        for key in list(self._tasks):
+            self._drop(key)
+
+    async def aclose(self) -> None:
+        tasks = [task for task, _ in self._tasks.values()]
+        self.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._tasks.pop(key, None)
+        if entry is not None and not entry[0].done():
+            entry[0].cancel()
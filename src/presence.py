@@ -0,0 +1,237 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from directory import Directory, normalize_name
+
+logger = logging.getLogger("agent")
+
+
+class PresenceEvent(NamedTuple):
+    """A change in whether someone is in the building, e.g. a badge swipe."""
+
+    name: str
+    present: bool
+    at: float
+    """Unix time of the swipe."""
+
+
+class PresenceStore:
+    """Live, in-process view of who is in the building.
+
+    The store is fed incremental `PresenceEvent`s (badge swipes in and out)
+    from an async feed, see `start`, and answers point queries with a single
+    dictionary lookup, so tools never poll the building's access system.
+    Events older than the last one applied for the same person are ignored,
+    so a feed may replay or reorder them.
+
+    Code that needs to know when someone arrives awaits `wait_for_arrival`
+    instead of polling; listeners added with `add_listener` are told about
+    every change.
+    """
+
+    def __init__(
+        self,
+        initial: Iterable[PresenceEvent] = (),
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._clock = clock
+        # normalized name -> last event applied
+        self._state: dict[str, PresenceEvent] = {}
+        self._arrivals: dict[str, set[asyncio.Future[float]]] = {}
+        self._listeners: list[Callable[[PresenceEvent], None]] = []
+        self._feed_task: asyncio.Task[None] | None = None
+        for event in initial:
+            self.apply(event)
+
+    @classmethod
+    def from_directory(
+        cls, directory: Directory, *, clock: Callable[[], float] = time.time
+    ) -> "PresenceStore":
+        """Seed a store with the directory's `in_building` flags.
+
+        The seed is dated 0, so any event from the feed overrides it.
+        """
+        return cls(
+            (
+                PresenceEvent(person.name, person.in_building, 0.0)
+                for person in directory
+            ),
+            clock=clock,
+        )
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def is_present(self, name: str) -> bool | None:
+        """Return whether `name` is in the building, or None if they are unknown."""
+        event = self._state.get(normalize_name(name))
+        return event.present if event is not None else None
+
+    def since(self, name: str) -> float | None:
+        """Return when `name` last came in or went out, or None if unknown."""
+        event = self._state.get(normalize_name(name))
+        return event.at if event is not None else None
+
+    def arrived_within(self, name: str, seconds: float) -> bool:
+        """Return whether `name` came into the building in the last `seconds`."""
+        event = self._state.get(normalize_name(name))
+        return (
+            event is not None and event.present and self._clock() - event.at <= seconds
+        )
+
+    def apply(self, event: PresenceEvent) -> bool:
+        """Apply a presence change. Returns False if it was stale or a no-op."""
+        key = normalize_name(event.name)
+        current = self._state.get(key)
+        if current is not None and (
+            event.at < current.at or event.present == current.present
+        ):
+            return False
+
+        self._state[key] = event
+        if event.present:
+            for waiter in self._arrivals.pop(key, ()):
+                if not waiter.done():
+                    waiter.set_result(event.at)
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("presence listener failed")
+        return True
+
+    async def wait_for_arrival(self, name: str, timeout: float | None = None) -> float:
+        """Wait until `name` is in the building and return when they came in.
+
+        Returns straight away if they are already in. Raises
+        `asyncio.TimeoutError` if they don't arrive within `timeout` seconds.
+        """
+        key = normalize_name(name)
+        event = self._state.get(key)
+        if event is not None and event.present:
+            return event.at
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self._arrivals.setdefault(key, set())
+        waiters.add(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            waiters.discard(waiter)
+            if not waiters and self._arrivals.get(key) is waiters:
+                del self._arrivals[key]
+
+    def add_listener(self, listener: Callable[[PresenceEvent], None]) -> None:
+        """Call `listener` with every change applied from now on."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[PresenceEvent], None]) -> None:
+        with contextlib.suppress(ValueError):
+            self._listeners.remove(listener)
+
+    def start(self, feed: AsyncIterable[PresenceEvent]) -> None:
+        """Apply the events of `feed` in the background."""
+        if self._feed_task is None:
+            self._feed_task = asyncio.create_task(self._consume(feed))
+
+    async def aclose(self) -> None:
+        """Stop following the feed."""
+        if self._feed_task is not None:
+            self._feed_task.cancel()
+            await asyncio.gather(self._feed_task, return_exceptions=True)
+            self._feed_task = None
+
+    async def _consume(self, feed: AsyncIterable[PresenceEvent]) -> None:
+        try:
+            async for event in feed:
+                self.apply(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("presence feed failed, availability may be stale")
+
+
+def parse_event(line: str | bytes) -> PresenceEvent | None:
+    """Parse a JSON line like `{"name": "...", "present": true, "at": 1.7e9}`.
+
+    `at` defaults to now. Returns None for blank or malformed lines.
+    """
+    try:
+        record = json.loads(line)
+        return PresenceEvent(
+            str(record["name"]),
+            bool(record["present"]),
+            float(record.get("at", time.time())),
+        )
+    except (ValueError, TypeError, KeyError, AttributeError):
+        if line.strip():
+            logger.warning("ignoring malformed presence event", extra={"line": line})
+        return None
+
+
+async def tail_file(
+    path: str | os.PathLike[str], *, poll_interval: float = 0.5
+) -> AsyncIterator[PresenceEvent]:
+    """Follow a file of JSON-lines presence events, like `tail -f`.
+
+    Events already in the file are replayed first.
+    """
+    with Path(path).open(encoding="utf-8") as f:
+        partial = ""
+        while True:
+            lines = await asyncio.to_thread(f.readlines)
+            if not lines:
+                await asyncio.sleep(poll_interval)
+                continue
+            lines[0] = partial + lines[0]
+            # a line still being written is completed by the next read
+            partial = "" if lines[-1].endswith("\n") else lines.pop()
+            for line in lines:
+                if (event := parse_event(line)) is not None:
+                    yield event
+
+
+async def read_stream(reader: asyncio.StreamReader) -> AsyncIterator[PresenceEvent]:
+    """Read JSON-lines presence events from a stream, e.g. a socket."""
+    while line := await reader.readline():
+        if (event := parse_event(line)) is not None:
+            yield event
+
+
+async def open_feed(url: str) -> AsyncIterator[PresenceEvent]:
+    """Open a presence feed: `file:///path/to/events.jsonl` or `tcp://host:port`.
+
+    TCP feeds reconnect after a second when the connection drops.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        async for event in tail_file(parsed.path):
+            yield event
+    elif parsed.scheme == "tcp":
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    parsed.hostname, parsed.port
+                )
+            except OSError as e:
+                logger.warning(
+                    "failed to connect to presence feed", extra={"error": str(e)}
+                )
+            else:
+                try:
+                    async for event in read_stream(reader):
+                        yield event
+                finally:
+                    writer.close()
+            await asyncio.sleep(1.0)
+    else:
+        raise ValueError(f"unsupported presence feed {url!r}")
@@ -0,0 +1,683 @@
+"""Record the pipeline's provider streams, and replay them offline.
+
+Wrap a session's STT, LLM and TTS in `RecordingSTT`, `RecordingLLM` and
+`RecordingTTS` to capture what the providers sent, and when, on a `Tape`, then
+`Tape.save` it. `ReplaySTT`, `ReplayLLM` and `ReplayTTS` play a loaded tape back
+with the same timing and no network, while `PacedAudioInput` plays the caller's
+recorded audio into the session and `PlayoutAudioOutput` plays the agent's
+speech out, both in real time. Together they run `Assistant` end to end, the
+same way every time, in CI or on a box with no access to LiveKit Cloud.
+
+Each stream keeps its own timing:
+
+- STT: each event at how much of the caller's audio had been pushed when it
+  arrived, so a transcript trails the speech by as much as it did live. A
+  non-streaming STT's results come back after as long as they took.
+- LLM: each chunk at its delay from the request.
+- TTS: each audio frame at its delay from the request.
+"""
+
+import asyncio
+import dataclasses
+import json
+import struct
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    stt,
+    tts,
+    utils,
+)
+from livekit.agents.llm import ToolChoice
+from livekit.agents.types import NOT_GIVEN
+from livekit.agents.utils import AudioBuffer
+from livekit.agents.voice import io
+
+MAGIC = b"LKTAPE1\n"
+_RECORD = struct.Struct("<BIdI")
+
+# record tags
+_TAKE = 0
+_EVENT = 1
+_AUDIO = 2
+
+# the wrapped provider retries on its own; retrying the wrapper would replay
+# a stream that has already been consumed
+_NO_RETRY = APIConnectOptions(max_retry=0)
+
+
+class ReplayError(Exception):
+    """The tape has nothing recorded for what the session asked."""
+
+
+class Record(NamedTuple):
+    at: float
+    """Seconds from the start of the take (of caller audio, for STT)."""
+    tag: int
+    data: bytes
+
+
+class Take:
+    """One provider request or stream: an STT stream, an LLM request or a TTS
+    synthesis, with what it sent (and, for STT, the audio it was sent)."""
+
+    __slots__ = ("kind", "meta", "records")
+
+    def __init__(self, kind: str, meta: dict[str, Any]) -> None:
+        self.kind = kind
+        self.meta = meta
+        self.records: list[Record] = []
+
+    def add(self, at: float, tag: int, data: bytes) -> None:
+        self.records.append(Record(at, tag, data))
+
+    def events(self) -> Iterator[tuple[float, bytes]]:
+        return ((r.at, r.data) for r in self.records if r.tag == _EVENT)
+
+    def audio(self) -> Iterator[tuple[float, bytes]]:
+        return ((r.at, r.data) for r in self.records if r.tag == _AUDIO)
+
+
+class Tape:
+    """Takes recorded from the providers of one session, in the order made.
+
+    On disk, a tape is `MAGIC` followed by records: a header (tag, take index,
+    time and payload length, little-endian) and the payload, JSON for takes and
+    events and raw 16-bit PCM for audio.
+    """
+
+    def __init__(self) -> None:
+        self.takes: list[Take] = []
+
+    def take(self, kind: str, **meta: Any) -> Take:
+        take = Take(kind, meta)
+        self.takes.append(take)
+        return take
+
+    def of(self, kind: str) -> list[Take]:
+        return [take for take in self.takes if take.kind == kind]
+
+    def caller_audio(self) -> Iterator[rtc.AudioFrame]:
+        """Return the caller's audio, as the session pushed it to the STT."""
+        for take in self.of("stt"):
+            rate, channels = take.meta["sample_rate"], take.meta["num_channels"]
+            for _, data in take.audio():
+                samples = len(data) // (2 * channels)
+                yield rtc.AudioFrame(data, rate, channels, samples)
+
+    def save(self, path: str | Path) -> None:
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            for index, take in enumerate(self.takes):
+                meta = json.dumps({"kind": take.kind, **take.meta}).encode()
+                f.write(_RECORD.pack(_TAKE, index, 0.0, len(meta)) + meta)
+                for at, tag, data in take.records:
+                    f.write(_RECORD.pack(tag, index, at, len(data)) + data)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Tape":
+        data = Path(path).read_bytes()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a tape")
+        tape = cls()
+        offset = len(MAGIC)
+        while offset < len(data):
+            tag, index, at, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            payload = data[offset : offset + length]
+            offset += length
+            if tag == _TAKE:
+                meta = json.loads(payload)
+                tape.take(meta.pop("kind"), **meta)
+            else:
+                tape.takes[index].add(at, tag, payload)
+        return tape
+
+
+class _Takes:
+    """Hands out a tape's takes of one kind, by key if it matches, else in order."""
+
+    def __init__(self, tape: Tape, kind: str, key: str | None = None) -> None:
+        self._kind = kind
+        self._key = key
+        self._unused = tape.of(kind)
+
+    def next(self, key: str | None = None) -> Take:
+        for i, take in enumerate(self._unused):
+            if key is None or take.meta.get(self._key) == key:
+                return self._unused.pop(i)
+        if self._unused:
+            return self._unused.pop(0)
+        raise ReplayError(f"no {self._kind} takes left on the tape")
+
+
+def _dump_speech_event(event: stt.SpeechEvent) -> bytes:
+    # word timings are provider-specific and not needed for replay
+    alternatives = [
+        {**dataclasses.asdict(alt), "words": None} for alt in event.alternatives
+    ]
+    return json.dumps(
+        {
+            "type": event.type.value,
+            "request_id": event.request_id,
+            "alternatives": alternatives,
+            "recognition_usage": (
+                dataclasses.asdict(event.recognition_usage)
+                if event.recognition_usage
+                else None
+            ),
+        }
+    ).encode()
+
+
+def _load_speech_event(data: bytes) -> stt.SpeechEvent:
+    event = json.loads(data)
+    usage = event["recognition_usage"]
+    return stt.SpeechEvent(
+        type=stt.SpeechEventType(event["type"]),
+        request_id=event["request_id"],
+        alternatives=[stt.SpeechData(**alt) for alt in event["alternatives"]],
+        recognition_usage=stt.RecognitionUsage(**usage) if usage else None,
+    )
+
+
+def _prompt_key(chat_ctx: llm.ChatContext) -> str:
+    # what a request answers: the caller's last words or the last tool output
+    for item in reversed(chat_ctx.items):
+        if item.type == "message" and item.role == "user":
+            return f"user: {item.text_content or ''}"
+        if item.type == "function_call_output":
+            return f"{item.name}: {item.output}"
+    return ""
+
+
+def _text_key(text: str) -> str:
+    return " ".join(text.split())
+
+
+async def _sleep_until(start: float, at: float) -> None:
+    delay = start + at - asyncio.get_running_loop().time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+class RecordingSTT(stt.STT):
+    """Records a streaming STT's events, and the caller audio they came from.
+
+    A non-streaming STT's results are recorded too, with how long each took;
+    its audio is not, as it only gets the caller's speech, cut up by the VAD.
+    """
+
+    def __init__(self, wrapped: stt.STT, tape: Tape) -> None:
+        super().__init__(capabilities=wrapped.capabilities)
+        self._wrapped = wrapped
+        self._tape = tape
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        take = self._tape.take("recognize")
+        start = time.perf_counter()
+        event = await self._wrapped.recognize(
+            buffer, language=language, conn_options=conn_options
+        )
+        take.add(time.perf_counter() - start, _EVENT, _dump_speech_event(event))
+        return event
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> stt.RecognizeStream:
+        return _RecordingRecognizeStream(
+            self,
+            self._wrapped.stream(language=language, conn_options=conn_options),
+            self._tape.take("stt"),
+        )
+
+
+class _RecordingRecognizeStream(stt.RecognizeStream):
+    def __init__(
+        self, recorder: RecordingSTT, wrapped: stt.RecognizeStream, take: Take
+    ) -> None:
+        super().__init__(stt=recorder, conn_options=_NO_RETRY)
+        self._wrapped = wrapped
+        self._take = take
+
+    async def _run(self) -> None:
+        pushed = 0.0  # seconds of caller audio
+
+        async def forward_audio() -> None:
+            nonlocal pushed
+            async for frame in self._input_ch:
+                if isinstance(frame, self._FlushSentinel):
+                    self._wrapped.flush()
+                    continue
+                self._take.meta.setdefault("sample_rate", frame.sample_rate)
+                self._take.meta.setdefault("num_channels", frame.num_channels)
+                self._take.add(pushed, _AUDIO, bytes(frame.data))
+                pushed += frame.duration
+                self._wrapped.push_frame(frame)
+            self._wrapped.end_input()
+
+        forward = asyncio.create_task(forward_audio())
+        try:
+            async for event in self._wrapped:
+                self._take.add(pushed, _EVENT, _dump_speech_event(event))
+                self._event_ch.send_nowait(event)
+        finally:
+            await utils.aio.cancel_and_wait(forward)
+            await self._wrapped.aclose()
+
+
+class ReplaySTT(stt.STT):
+    """Streams a tape's STT events back, each once as much audio has been pushed
+    as when it was recorded. The n-th stream replays the n-th STT take.
+
+    Non-streaming results are returned in the order they were recorded, each
+    after as long as it took.
+    """
+
+    def __init__(self, tape: Tape) -> None:
+        super().__init__(
+            capabilities=stt.STTCapabilities(
+                streaming=True,
+                interim_results=True,
+                offline_recognize=bool(tape.of("recognize")),
+            )
+        )
+        self._takes = _Takes(tape, "stt")
+        self._recognized = _Takes(tape, "recognize")
+
+    @property
+    def model(self) -> str:
+        return "replay"
+
+    @property
+    def provider(self) -> str:
+        return "offline"
+
+    async def _recognize_impl(
+        self,
+        buffer: AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        events = list(self._recognized.next().events())
+        if not events:
+            raise ReplayError("a recognize take on the tape has no result")
+        at, data = events[0]
+        await asyncio.sleep(at)
+        return _load_speech_event(data)
+
+    def stream(
+        self,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> stt.RecognizeStream:
+        return _ReplayRecognizeStream(self, self._takes.next())
+
+
+class _ReplayRecognizeStream(stt.RecognizeStream):
+    def __init__(self, replay: ReplaySTT, take: Take) -> None:
+        super().__init__(stt=replay, conn_options=_NO_RETRY)
+        self._take = take
+
+    async def _run(self) -> None:
+        events = list(self._take.events())
+        pushed, i = 0.0, 0
+        async for frame in self._input_ch:
+            if isinstance(frame, self._FlushSentinel):
+                continue
+            pushed += frame.duration
+            while i < len(events) and events[i][0] <= pushed:
+                self._event_ch.send_nowait(_load_speech_event(events[i][1]))
+                i += 1
+        for _, data in events[i:]:
+            self._event_ch.send_nowait(_load_speech_event(data))
+
+
+class RecordingLLM(llm.LLM):
+    """Records an LLM's chunks and when they arrived after each request."""
+
+    def __init__(self, wrapped: llm.LLM, tape: Tape) -> None:
+        super().__init__()
+        self._wrapped = wrapped
+        self._tape = tape
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.FunctionTool | llm.RawFunctionTool] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> llm.LLMStream:
+        wrapped = self._wrapped.chat(
+            chat_ctx=chat_ctx,
+            tools=tools,
+            conn_options=conn_options,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=tool_choice,
+            extra_kwargs=extra_kwargs,
+        )
+        take = self._tape.take("llm", prompt=_prompt_key(chat_ctx))
+        return _RecordingLLMStream(
+            self, wrapped, take, chat_ctx=chat_ctx, tools=tools or []
+        )
+
+
+class _RecordingLLMStream(llm.LLMStream):
+    def __init__(
+        self,
+        recorder: RecordingLLM,
+        wrapped: llm.LLMStream,
+        take: Take,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.FunctionTool | llm.RawFunctionTool],
+    ) -> None:
+        super().__init__(
+            recorder, chat_ctx=chat_ctx, tools=tools, conn_options=_NO_RETRY
+        )
+        self._wrapped = wrapped
+        self._take = take
+
+    async def _run(self) -> None:
+        start = time.perf_counter()
+        async with self._wrapped as stream:
+            async for chunk in stream:
+                at = time.perf_counter() - start
+                self._take.add(at, _EVENT, chunk.model_dump_json().encode())
+                self._event_ch.send_nowait(chunk)
+
+
+class ReplayLLM(llm.LLM):
+    """Answers from a tape's LLM takes, chunk by chunk at their recorded delays.
+
+    A request gets the first unused take recorded for the same prompt (the
+    caller's last words or the last tool output), or else the next one.
+    """
+
+    def __init__(self, tape: Tape) -> None:
+        super().__init__()
+        self._takes = _Takes(tape, "llm", key="prompt")
+
+    @property
+    def model(self) -> str:
+        return "replay"
+
+    @property
+    def provider(self) -> str:
+        return "offline"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[llm.FunctionTool | llm.RawFunctionTool] | None = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> llm.LLMStream:
+        take = self._takes.next(_prompt_key(chat_ctx))
+        return _ReplayLLMStream(
+            self, take, chat_ctx=chat_ctx, tools=tools or [], conn_options=_NO_RETRY
+        )
+
+
+class _ReplayLLMStream(llm.LLMStream):
+    def __init__(self, replay: ReplayLLM, take: Take, **kwargs: Any) -> None:
+        super().__init__(replay, **kwargs)
+        self._take = take
+
+    async def _run(self) -> None:
+        start = asyncio.get_running_loop().time()
+        for at, data in self._take.events():
+            await _sleep_until(start, at)
+            self._event_ch.send_nowait(llm.ChatChunk.model_validate_json(data))
+
+
+class RecordingTTS(tts.TTS):
+    """Records a TTS's audio and when it arrived after each request.
+
+    Requests are made one sentence at a time (the session wraps a
+    non-streaming TTS in a `tts.StreamAdapter`), so that each can be matched
+    by its text on replay.
+    """
+
+    def __init__(self, wrapped: tts.TTS, tape: Tape) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self._wrapped = wrapped
+        self._tape = tape
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> tts.ChunkedStream:
+        return _RecordingChunkedStream(
+            self,
+            self._wrapped.synthesize(text, conn_options=conn_options),
+            self._tape.take(
+                "tts",
+                text=_text_key(text),
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+            ),
+            text,
+        )
+
+
+class _RecordingChunkedStream(tts.ChunkedStream):
+    def __init__(
+        self,
+        recorder: RecordingTTS,
+        wrapped: tts.ChunkedStream,
+        take: Take,
+        text: str,
+    ) -> None:
+        super().__init__(tts=recorder, input_text=text, conn_options=_NO_RETRY)
+        self._wrapped = wrapped
+        self._take = take
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        start = time.perf_counter()
+        output_emitter.initialize(
+            request_id=utils.shortuuid("record_"),
+            sample_rate=self._tts.sample_rate,
+            num_channels=self._tts.num_channels,
+            mime_type="audio/pcm",
+        )
+        async with self._wrapped as stream:
+            async for audio in stream:
+                data = bytes(audio.frame.data)
+                self._take.add(time.perf_counter() - start, _AUDIO, data)
+                output_emitter.push(data)
+        output_emitter.flush()
+
+
+class ReplayTTS(tts.TTS):
+    """Speaks from a tape's TTS takes, frame by frame at their recorded delays.
+
+    Text is matched to the first unused take recorded for the same text, or
+    else the next one. The audio format is the recorded one.
+    """
+
+    def __init__(self, tape: Tape) -> None:
+        takes = tape.of("tts")
+        meta = takes[0].meta if takes else {}
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=meta.get("sample_rate", 24000),
+            num_channels=meta.get("num_channels", 1),
+        )
+        self._takes = _Takes(tape, "tts", key="text")
+
+    @property
+    def model(self) -> str:
+        return "replay"
+
+    @property
+    def provider(self) -> str:
+        return "offline"
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> tts.ChunkedStream:
+        return _ReplayChunkedStream(self, self._takes.next(_text_key(text)), text)
+
+
+class _ReplayChunkedStream(tts.ChunkedStream):
+    def __init__(self, replay: ReplayTTS, take: Take, text: str) -> None:
+        super().__init__(tts=replay, input_text=text, conn_options=_NO_RETRY)
+        self._take = take
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        start = asyncio.get_running_loop().time()
+        output_emitter.initialize(
+            request_id=utils.shortuuid("replay_"),
+            sample_rate=self._tts.sample_rate,
+            num_channels=self._tts.num_channels,
+            mime_type="audio/pcm",
+        )
+        for at, data in self._take.audio():
+            await _sleep_until(start, at)
+            output_emitter.push(data)
+        output_emitter.flush()
+
+
+class PacedAudioInput(io.AudioInput):
+    """Plays frames into a session as a microphone would: in real time, then
+    silence. `done` is set once the last frame has been played."""
+
+    def __init__(self, frames: Iterable[rtc.AudioFrame]) -> None:
+        super().__init__(label="PacedAudioInput")
+        self._frames = iter(frames)
+        self._start: float | None = None
+        self._played = 0.0
+        self._silence: rtc.AudioFrame | None = None
+        self.done = asyncio.Event()
+
+    def __aiter__(self) -> AsyncIterator[rtc.AudioFrame]:
+        return self
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        loop = asyncio.get_running_loop()
+        if self._start is None:
+            self._start = loop.time()
+        await _sleep_until(self._start, self._played)
+        frame = next(self._frames, None)
+        if frame is None:
+            self.done.set()
+            frame = self._silence
+        elif self._silence is None:
+            self._silence = rtc.AudioFrame.create(
+                frame.sample_rate, frame.num_channels, frame.samples_per_channel
+            )
+        if frame is None:
+            raise StopAsyncIteration
+        self._played += frame.duration
+        return frame
+
+
+class PlayoutAudioOutput(io.AudioOutput):
+    """An audio sink that plays the agent's speech in real time, to nowhere.
+
+    `started` holds the `time.perf_counter()` at which each reply began to
+    play, for measuring how long the caller waited for it.
+    """
+
+    def __init__(self, *, sample_rate: int | None = None) -> None:
+        super().__init__(
+            label="PlayoutAudioOutput",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+            sample_rate=sample_rate,
+        )
+        self._segment_start: float | None = None
+        self._pushed = 0.0
+        self._finish: asyncio.TimerHandle | None = None
+        self.started: list[float] = []
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self._segment_start is None:
+            self._segment_start = asyncio.get_running_loop().time()
+            self._pushed = 0.0
+            self.started.append(time.perf_counter())
+            self.on_playback_started(created_at=time.time())
+        self._pushed += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if self._segment_start is None:
+            return
+        loop = asyncio.get_running_loop()
+        remaining = self._segment_start + self._pushed - loop.time()
+        self._finish = loop.call_later(max(remaining, 0.0), self._finished, False)
+
+    def clear_buffer(self) -> None:
+        if self._segment_start is None:
+            return
+        if self._finish is not None:
+            self._finish.cancel()
+        self._finished(True)
+
+    def _finished(self, interrupted: bool) -> None:
+        assert self._segment_start is not None
+        played = asyncio.get_running_loop().time() - self._segment_start
+        self._segment_start = None
+        self._finish = None
+        self.on_playback_finished(
+            playback_position=min(played, self._pushed), interrupted=interrupted
+        )
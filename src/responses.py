@@ -0,0 +1,325 @@
+import asyncio
+import bisect
+import logging
+import re
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable, Mapping, Sequence
+from typing import TYPE_CHECKING
+
+from livekit import rtc
+
+from directory import normalize_name
+from speech_store import SpeechStore, normalize_text
+
+if TYPE_CHECKING:
+    from livekit.agents import tts
+
+logger = logging.getLogger("agent")
+
+BUILDING = "The Shard"
+
+FLOORS = 72
+
+LIFT_BANKS: tuple[tuple[int, str], ...] = ((10, "first"), (40, "second"), (72, "third"))
+"""The highest floor each lift bank serves, lowest bank first."""
+
+BUILDING_INFO: dict[str, str] = {
+    "bathroom": "The nearest restrooms are just past the security gates on the left.",
+    "waiting area": (
+        "You’re welcome to take a seat in the main lobby just behind reception."  # noqa: RUF001
+    ),
+    "lifts": (
+        "The lifts are directly behind you. Security will direct you to the"
+        " correct lift bank."
+    ),
+}
+
+TOPIC_SYNONYMS: dict[str, tuple[str, ...]] = {
+    "bathroom": (
+        "bathrooms",
+        "toilet",
+        "toilets",
+        "loo",
+        "loos",
+        "restroom",
+        "restrooms",
+        "washroom",
+        "washrooms",
+        "wc",
+        "lavatory",
+        "ladies",
+        "gents",
+    ),
+    "waiting area": (
+        "waiting room",
+        "waiting",
+        "lobby",
+        "seating",
+        "seat",
+        "somewhere to sit",
+        "reception area",
+    ),
+    "lifts": ("lift", "elevator", "elevators", "lift bank", "lift banks"),
+}
+
+GREETING_TEMPLATE = "Hello, welcome to {}! Who are you here to see today?"
+
+GREETING = GREETING_TEMPLATE.format(BUILDING)
+
+UNKNOWN_TOPIC = "I can help with that, could you be a bit more specific?"
+
+TAKE_A_SEAT = "Please take a seat in the lobby while I notify your contact."
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_SLOT = "\0"
+"""Stands in for a template's slots, to find its fixed sentences."""
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+class ResponseTable:
+    """Precomputed answers to the static lobby questions.
+
+    Directions to every floor and the answer to every facility topic are built
+    once, so the tools only do a dictionary or tuple lookup. Topics are matched
+    after normalization, through their synonyms ("loo", "restrooms" and
+    "toilets" all mean "bathroom"), and then word by word, so "the ladies
+    toilets" still finds the bathroom.
+
+    `building`, `floors` and `lift_banks` describe the building the answers are
+    for; they default to The Shard.
+    """
+
+    __slots__ = ("_building", "_directions", "_topics", "greeting")
+
+    def __init__(
+        self,
+        info: Mapping[str, str] = BUILDING_INFO,
+        synonyms: Mapping[str, Iterable[str]] = TOPIC_SYNONYMS,
+        *,
+        building: str = BUILDING,
+        floors: int = FLOORS,
+        lift_banks: Sequence[tuple[int, str]] = LIFT_BANKS,
+    ) -> None:
+        if not lift_banks:
+            raise ValueError("a building needs at least one lift bank")
+        self._building = building
+        self.greeting = GREETING_TEMPLATE.format(building)
+        self._topics: dict[str, str] = {}
+        for topic, answer in info.items():
+            self._topics[normalize_name(topic)] = answer
+            for synonym in synonyms.get(topic, ()):
+                self._topics.setdefault(normalize_name(synonym), answer)
+
+        banks = sorted(lift_banks)
+        tops = [top for top, _ in banks]
+        self._directions: tuple[str, ...] = tuple(
+            f"To get to floor {floor}, take the lifts on the left and select the"
+            f" {banks[min(bisect.bisect_left(tops, floor), len(banks) - 1)][1]}"
+            " lift bank."
+            for floor in range(floors + 1)
+        )
+
+    @property
+    def floors(self) -> int:
+        return len(self._directions) - 1
+
+    def building_info(self, topic: str) -> str:
+        """Return the answer for a facility topic, or `UNKNOWN_TOPIC`."""
+        key = normalize_name(topic)
+        answer = self._topics.get(key)
+        if answer is not None:
+            return answer
+
+        words = key.split()
+        for size in (2, 1):
+            for i in range(len(words) - size + 1):
+                answer = self._topics.get(" ".join(words[i : i + size]))
+                if answer is not None:
+                    return answer
+        return UNKNOWN_TOPIC
+
+    def directions(self, floor: int) -> str:
+        """Return directions to the lift bank for `floor`."""
+        if 1 <= floor <= self.floors:
+            return self._directions[floor]
+        return (
+            f"I'm sorry, but {floor} is not a valid floor in {self._building}."
+            " Please check the directory for valid floors."
+        )
+
+    def checked_in(self, name: str) -> str:
+        return (
+            f"Welcome to {self._building}, {name}! I have checked you in and printed"
+            f" a visitor badge for you. {TAKE_A_SEAT}"
+        )
+
+    def checked_in_group(self, count: int) -> str:
+        return (
+            f"Welcome to {self._building}! I have checked in all {count} of you and"
+            f" your visitor badges are printing now. {TAKE_A_SEAT}"
+        )
+
+    def not_in_building(self, name: str) -> str:
+        return (
+            f"I'm sorry, but {name} is not currently in the building. Would you like"
+            " me to let them know you stopped by, or would you like to wait for them"
+            " to arrive?"
+        )
+
+    def template_sentences(self) -> list[str]:
+        """Return the sentences of the templated answers that don't change.
+
+        Cached, they play as is, and only the sentences with a name or count in
+        them are synthesized live (see `SpeechCache.compose`).
+        """
+        answers = (
+            self.checked_in(_SLOT),
+            self.checked_in_group(_SLOT),  # type: ignore[arg-type]
+            self.not_in_building(_SLOT),
+        )
+        sentences = (s for answer in answers for s in split_sentences(answer))
+        return list(dict.fromkeys(s for s in sentences if _SLOT not in s))
+
+    def frequent_answers(self, floors: Iterable[int] = ()) -> list[str]:
+        """Return the answers worth pre-synthesizing.
+
+        That is the greeting, every facility answer and the fixed sentences of
+        the templated answers, plus directions to `floors`, e.g. the floors of
+        the people in the directory.
+        """
+        answers = [self.greeting, *dict.fromkeys(self._topics.values())]
+        answers += self.template_sentences()
+        answers += [self.directions(floor) for floor in sorted(set(floors))]
+        return answers
+
+
+class SpeechCache:
+    """Pre-synthesized audio for fixed answers.
+
+    Answers that are spoken from the cache start playing immediately, with no
+    LLM or TTS round trip. Answers are matched by their normalized text. With a
+    `store`, the audio is kept on disk under `voice` (the TTS model and voice
+    it was synthesized with), shared between processes and kept across
+    restarts. Otherwise at most `max_bytes` of audio is kept in memory, and
+    answers that don't fit are left to be synthesized live.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 16 * 2**20,
+        store: SpeechStore | None = None,
+        voice: str = "",
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._store = store
+        self._voice = voice
+        self._size = 0
+        self._audio: dict[str, tuple[rtc.AudioFrame, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._store) if self._store is not None else len(self._audio)
+
+    def __contains__(self, text: object) -> bool:
+        if not isinstance(text, str):
+            return False
+        if self._store is not None:
+            return self._store.has(self._voice, text)
+        return normalize_text(text) in self._audio
+
+    @property
+    def size(self) -> int:
+        """Bytes of audio held."""
+        return self._store.size if self._store is not None else self._size
+
+    async def warm(self, engine: "tts.TTS", texts: Iterable[str]) -> int:
+        """Synthesize `texts` with `engine`. Returns the number of answers added.
+
+        Warming stops at the first failure; answers that aren't cached are
+        synthesized live as usual.
+        """
+        added = 0
+        for text in texts:
+            if text in self:
+                continue
+            try:
+                async with engine.synthesize(text) as stream:
+                    frames = tuple([ev.frame async for ev in stream])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("failed to pre-synthesize answers", exc_info=True)
+                break
+
+            if self._store is not None:
+                added += await self._store.aput(self._voice, text, frames)
+                continue
+            size = sum(frame.data.nbytes for frame in frames)
+            if self._size + size > self._max_bytes:
+                continue
+            self._audio[normalize_text(text)] = frames
+            self._size += size
+            added += 1
+        return added
+
+    def audio(self, text: str) -> AsyncGenerator[rtc.AudioFrame, None] | None:
+        """Return the cached audio for `text` as a stream, or None if not cached."""
+        if self._store is not None:
+            return self._store.get(self._voice, text)
+        frames = self._audio.get(normalize_text(text))
+        if frames is None:
+            return None
+        return _replay(frames)
+
+    def compose(
+        self, engine: "tts.TTS", text: str
+    ) -> AsyncIterator[rtc.AudioFrame] | None:
+        """Return `text`'s audio, sentence by sentence, or None if none is cached.
+
+        Cached sentences play from the cache. The others (the ones with a name
+        in them) are synthesized with `engine`, all at once as soon as this is
+        called, so they are ready by the time their turn comes.
+        """
+        sentences = split_sentences(text)
+        if len(sentences) < 2:
+            return None
+        cached = [self.audio(sentence) for sentence in sentences]
+        if all(audio is None for audio in cached):
+            return None
+        live = [
+            engine.synthesize(sentence) if audio is None else None
+            for sentence, audio in zip(sentences, cached)
+        ]
+        return _compose(cached, live)
+
+
+async def _replay(
+    frames: tuple[rtc.AudioFrame, ...],
+) -> AsyncGenerator[rtc.AudioFrame, None]:
+    for frame in frames:
+        yield frame
+
+
+async def _compose(
+    cached: list[AsyncGenerator[rtc.AudioFrame, None] | None],
+    live: list["tts.ChunkedStream | None"],
+) -> AsyncIterator[rtc.AudioFrame]:
+    try:
+        for audio, stream in zip(cached, live):
+            if audio is not None:
+                async for frame in audio:
+                    yield frame
+            elif stream is not None:
+                async for ev in stream:
+                    yield ev.frame
+    finally:
+        # interrupted, the sentences not played yet still hold their audio
+        for audio in cached:
+            if audio is not None:
+                await audio.aclose()
+        for stream in live:
+            if stream is not None:
+                await stream.aclose()
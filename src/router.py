@@ -0,0 +1,326 @@
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from typing import NamedTuple
+
+from directory import normalize_name
+from responses import TOPIC_SYNONYMS
+
+OTHER = "other"
+
+_NUMBER = re.compile(r"\b(\d+)(?:st|nd|rd|th)?\b")
+
+_UNITS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+}
+_ORDINALS = {
+    "first": 1,
+    "second": 2,
+    "third": 3,
+    "fourth": 4,
+    "fifth": 5,
+    "sixth": 6,
+    "seventh": 7,
+    "eighth": 8,
+    "ninth": 9,
+    **{f"{word}th": n for word, n in _UNITS.items() if n >= 10},
+    "twelfth": 12,
+    "twentieth": 20,
+    "thirtieth": 30,
+    "fortieth": 40,
+    "fiftieth": 50,
+    "sixtieth": 60,
+    "seventieth": 70,
+}
+_TENS = {
+    "twenty": 20,
+    "thirty": 30,
+    "forty": 40,
+    "fifty": 50,
+    "sixty": 60,
+    "seventy": 70,
+}
+
+_DIRECTION_CUES = frozenset(
+    ("floor", "floors", "level", "lift", "lifts", "elevator", "elevators")
+)
+"""Words a floor question has in it: a bare number answers something else."""
+
+_TOPIC_CUES: dict[str, str] = {
+    normalize_name(phrase): topic
+    for topic, synonyms in TOPIC_SYNONYMS.items()
+    for phrase in (topic, *synonyms)
+}
+"""Facility words and phrases, and the topic each one asks about."""
+
+_TOPIC_TEMPLATES = (
+    "{}",
+    "where is the {}",
+    "hi where is the {}",
+    "where are the {}",
+    "where can i find the {}",
+    "is there a {} nearby",
+    "can you tell me where the {} is",
+    "i need the {}",
+    "which way to the {}",
+)
+
+EXAMPLES: dict[str, tuple[str, ...]] = {
+    **{
+        f"topic:{topic}": tuple(
+            template.format(phrase)
+            for phrase in (topic, *synonyms)
+            for template in _TOPIC_TEMPLATES
+        )
+        for topic, synonyms in TOPIC_SYNONYMS.items()
+    },
+    "directions": (
+        "floor num",
+        "floor num please",
+        "how do i get to floor num",
+        "how do i get to the num floor",
+        "which lift do i take for floor num",
+        "which lifts go to floor num",
+        "where is floor num",
+        "i need to go to floor num",
+        "i need to get to the num floor",
+        "directions to floor num",
+        "i am going to floor num",
+        "which lift bank for num",
+    ),
+    "greeting": (
+        "hello",
+        "hi",
+        "hey",
+        "hi there",
+        "hello there",
+        "hey there",
+        "good morning",
+        "good afternoon",
+        "good evening",
+        "morning",
+        "hiya",
+    ),
+    OTHER: (
+        "i am here to see sarah collins",
+        "hi i am here to meet james patel",
+        "hello i have a meeting with emily wong",
+        "good morning i have a meeting at ten",
+        "i have a meeting on floor num with james",
+        "i am visiting shard capital on floor num",
+        "is sarah in the building",
+        "what is the weather like in london",
+        "can you check me in",
+        "my name is alex morgan",
+        "has my guest arrived",
+        "how long will i have to wait",
+        "what time is it",
+        "thank you",
+        "thanks very much",
+        "where is the nearest tube station",
+        "where can i get a coffee",
+        "where is the exit",
+        "can i leave my bag here",
+        "is there wifi",
+        "who are you",
+        "can you call a taxi",
+        "i am here for an interview",
+        "i have a delivery",
+        "yes",
+        "no",
+        "sorry could you repeat that",
+    ),
+}
+"""Training phrases per intent, normalized, with numbers written as `num`."""
+
+
+class Route(NamedTuple):
+    """A confident classification of a guest's utterance."""
+
+    intent: str
+    """`building_info`, `directions` or `greeting`."""
+    score: float
+    topic: str | None = None
+    floor: int | None = None
+
+
+def parse_number(text: str) -> int | None:
+    """Return the first number in `text`, in digits or words, up to 79th."""
+    if m := _NUMBER.search(text):
+        return int(m.group(1))
+
+    words = normalize_name(text.replace("-", " ")).split()
+    for i, word in enumerate(words):
+        if word in _TENS:
+            after = words[i + 1] if i + 1 < len(words) else ""
+            unit = _UNITS.get(after) or _ORDINALS.get(after) or 0
+            return _TENS[word] + (unit if unit < 10 else 0)
+        if word in _UNITS:
+            return _UNITS[word]
+        if word in _ORDINALS:
+            return _ORDINALS[word]
+    return None
+
+
+def _normalize(text: str) -> str:
+    words = normalize_name(_NUMBER.sub(" num ", text.replace("-", " "))).split()
+    out: list[str] = []
+    for word in words:
+        if word in _UNITS or word in _TENS or word in _ORDINALS:
+            # "thirty four" is one number
+            if out and out[-1] == "num":
+                continue
+            word = "num"
+        out.append(word)
+    return " ".join(out)
+
+
+def _features(text: str) -> Counter[str]:
+    words = text.split()
+    features: Counter[str] = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    # character trigrams catch plurals and small transcription differences
+    for word in words:
+        padded = f" {word} "
+        features.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def _topics_in(words: str) -> set[str]:
+    """Return the facility topics mentioned in normalized `words`."""
+    padded = f" {words} "
+    return {topic for cue, topic in _TOPIC_CUES.items() if f" {cue} " in padded}
+
+
+class IntentRouter:
+    """Fast n-gram intent classifier for the most common lobby requests.
+
+    Utterances are normalized (numbers become `num`), turned into word
+    unigrams, bigrams and character trigrams, weighted by TF-IDF over the
+    training phrases, and compared by cosine similarity with every phrase. The
+    closest phrase wins if it scores at least `threshold` and beats the closest
+    phrase of any other intent by `margin`; anything else, including the
+    `other` intent, falls back to the LLM. Directions also need a floor or a
+    lift in the utterance, so a bare "ten" is never taken for a floor, and an
+    utterance that also asks about another facility ("is the gents on floor
+    3") goes to the LLM, which can answer both.
+
+    Classifying an utterance takes tens of microseconds, against hundreds of
+    milliseconds for an LLM round trip.
+    """
+
+    __slots__ = (
+        "_idf",
+        "_intents",
+        "_margin",
+        "_max_idf",
+        "_postings",
+        "_threshold",
+        "hits",
+        "misses",
+    )
+
+    def __init__(
+        self,
+        examples: Mapping[str, Iterable[str]] = EXAMPLES,
+        *,
+        threshold: float = 0.6,
+        margin: float = 0.1,
+    ) -> None:
+        self._threshold = threshold
+        self._margin = margin
+        self.hits = 0
+        self.misses = 0
+
+        phrases = [
+            (intent, _features(_normalize(phrase)))
+            for intent, intent_phrases in examples.items()
+            for phrase in intent_phrases
+        ]
+        df: Counter[str] = Counter()
+        for _, features in phrases:
+            df.update(features.keys())
+        n = len(phrases)
+        self._idf = {f: math.log((1 + n) / (1 + c)) + 1.0 for f, c in df.items()}
+        # unseen features get the highest idf: they make a phrase less similar
+        self._max_idf = math.log(1 + n) + 1.0
+
+        # feature -> [(phrase index, weight)], so only shared features are scored
+        self._intents = [intent for intent, _ in phrases]
+        self._postings: dict[str, list[tuple[int, float]]] = {}
+        for i, (_, features) in enumerate(phrases):
+            for f, w in self._vector(features).items():
+                self._postings.setdefault(f, []).append((i, w))
+
+    def _vector(self, features: Counter[str]) -> dict[str, float]:
+        vector = {f: c * self._idf.get(f, self._max_idf) for f, c in features.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {f: w / norm for f, w in vector.items()}
+
+    def classify(self, text: str) -> tuple[str, float, float]:
+        """Return the best intent, its score and the best other intent's score."""
+        scores = [0.0] * len(self._intents)
+        for f, w in self._vector(_features(_normalize(text))).items():
+            for i, weight in self._postings.get(f, ()):
+                scores[i] += w * weight
+
+        best: dict[str, float] = {}
+        for intent, score in zip(self._intents, scores):
+            if score > best.get(intent, 0.0):
+                best[intent] = score
+
+        if not best:
+            return OTHER, 0.0, 0.0
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return ranked[0][0], ranked[0][1], runner_up
+
+    def route(self, text: str) -> Route | None:
+        """Return a route for `text` if it can be answered without the LLM."""
+        intent, score, runner_up = self.classify(text)
+        route = None
+        if (
+            intent != OTHER
+            and score >= self._threshold
+            and score - runner_up >= self._margin
+        ):
+            words = _normalize(text)
+            if intent.startswith("topic:"):
+                topic = intent[len("topic:") :]
+                if _topics_in(words) <= {topic}:
+                    route = Route("building_info", score, topic=topic)
+            elif intent == "directions":
+                floor = parse_number(text)
+                if (
+                    floor is not None
+                    and _DIRECTION_CUES.intersection(words.split())
+                    and _topics_in(words) <= {"lifts"}
+                ):
+                    route = Route("directions", score, floor=floor)
+            elif not _topics_in(words):
+                route = Route(intent, score)
+
+        if route is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return route
@@ -0,0 +1,458 @@
+"""Compile the directory and building data into a snapshot, and open it zero-copy.
+
+A snapshot is one versioned binary file, built ahead of time from a directory
+(JSON or CSV) or a tenant configuration. Opening it maps the file read-only and
+reads a few hundred bytes of headers; the people, their names and every index
+stay in the file, as flat arrays read in place, and are only paged in as they
+are used. Every worker process mapping the same snapshot shares its pages.
+
+The file holds named sections, each aligned to 8 bytes:
+
+- `meta`: JSON, with the tenant's building data if it was built from one.
+- `strings`, `string_ends`: UTF-8 strings back to back, and where each ends.
+- `person.*`: one column per field, indexed by person.
+- one hash index per lookup (`name`, `company`, `floor` and the fuzzy name
+  indexes): open-addressing `slots` over the `keys` (string ids), each key's
+  people in `postings`, from `starts[i]` to `starts[i + 1]`.
+
+Snapshots are replaced atomically (written aside, then renamed over), so a
+process holding the old one keeps reading it until it reopens the new one,
+see `Snapshot.replaced` and `tenants.TenantStore.refresh`.
+
+Usage:
+    uv run python src/snapshot.py directory.json directory.snap
+    uv run python src/snapshot.py tenants/acme.json tenants/acme.snap
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from directory import NOT_FOUND, Directory, Person, normalize_name
+from fuzzy import NameMatcher, build_index
+
+MAGIC = b"LKSNAP\r\n"
+VERSION = 1
+"""Bumped whenever the layout changes; older snapshots must be rebuilt."""
+
+_HEADER = struct.Struct("<8sII")
+"""Magic, version and number of sections."""
+_SECTION = struct.Struct("<24sQQ")
+"""Name, offset and length in bytes."""
+
+_IN_BUILDING = 1
+
+_INDEXES = ("name", "company", "floor", "phonetic", "tokens", "trigrams")
+
+
+class _Strings(Sequence[str]):
+    """The string table: strings are decoded as they are read."""
+
+    def __init__(self, data: memoryview, ends: memoryview) -> None:
+        self._data = data
+        self._ends = ends
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, i: int) -> str:  # type: ignore[override]
+        return str(self.raw(i), "utf-8")
+
+    def raw(self, i: int) -> memoryview:
+        return self._data[self._ends[i - 1] if i else 0 : self._ends[i]]
+
+
+class _Column(Sequence[str]):
+    """A column of string ids, read as the strings themselves."""
+
+    def __init__(self, ids: memoryview, strings: _Strings) -> None:
+        self._ids = ids
+        self._strings = strings
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i: int) -> str:  # type: ignore[override]
+        return self._strings[self._ids[i]]
+
+
+class _HashIndex(Mapping[str, Sequence[int]]):
+    """A read-only hash index from strings to ascending person indexes."""
+
+    def __init__(
+        self, sections: Mapping[str, memoryview], name: str, strings: _Strings
+    ) -> None:
+        self._slots = sections[f"{name}.slots"]
+        self._keys = sections[f"{name}.keys"]
+        self._starts = sections[f"{name}.starts"]
+        self._postings = sections[f"{name}.postings"]
+        self._strings = strings
+        self._mask = len(self._slots) - 1
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._strings[key] for key in self._keys)
+
+    def __getitem__(self, key: str) -> Sequence[int]:
+        encoded = key.encode()
+        slot = zlib.crc32(encoded) & self._mask
+        while entry := self._slots[slot]:
+            if self._strings.raw(self._keys[entry - 1]) == encoded:
+                return self._postings[self._starts[entry - 1] : self._starts[entry]]
+            slot = (slot + 1) & self._mask
+        raise KeyError(key)
+
+
+class Snapshot:
+    """An open snapshot file. See the module docstring for the layout."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        """Bytes in the file."""
+
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        _, version, count = _HEADER.unpack_from(self._map)
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} snapshot, not {VERSION}")
+        if sys.byteorder != "little":
+            raise ValueError("snapshots can only be read on little-endian machines")
+
+        data = memoryview(self._map)
+        sections: dict[str, memoryview] = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(
+                self._map, _HEADER.size + i * _SECTION.size
+            )
+            name = name.rstrip(b"\0").decode()
+            section = data[offset : offset + length]
+            sections[name] = (
+                section
+                if name in ("meta", "strings")
+                else section.cast("i" if name == "person.floor" else "I")
+            )
+
+        self.meta: dict[str, Any] = json.loads(bytes(sections["meta"]))
+        strings = _Strings(sections["strings"], sections["string_ends"])
+        indexes = {name: _HashIndex(sections, name, strings) for name in _INDEXES}
+        self.directory = SnapshotDirectory(self, sections, strings, indexes)
+
+    def replaced(self) -> bool:
+        """Return whether the file has been replaced since it was opened."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self._stamp
+
+
+class SnapshotDirectory(Directory):
+    """A `Directory` read in place from a snapshot, see `open_snapshot`.
+
+    People are decoded when they are returned, and lookup responses built
+    per call, instead of up front.
+    """
+
+    __slots__ = (
+        "_company",
+        "_flags",
+        "_floor",
+        "_indexes",
+        "_name",
+        "_snapshot",
+        "_strings",
+    )
+
+    def __init__(
+        self,
+        snapshot: Snapshot,
+        sections: Mapping[str, memoryview],
+        strings: _Strings,
+        indexes: Mapping[str, _HashIndex],
+    ) -> None:
+        self._snapshot = snapshot
+        self._strings = strings
+        self._name = sections["person.name"]
+        self._company = sections["person.company"]
+        self._floor = sections["person.floor"]
+        self._flags = sections["person.flags"]
+        self._indexes = indexes
+        self._matcher = NameMatcher(
+            _Column(sections["person.key"], strings),
+            (indexes["phonetic"], indexes["tokens"], indexes["trigrams"]),
+        )
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def _person(self, i: int) -> Person:
+        return Person(
+            name=self._strings[self._name[i]],
+            company=self._strings[self._company[i]],
+            floor=self._floor[i],
+            in_building=bool(self._flags[i] & _IN_BUILDING),
+        )
+
+    def _people_in(self, index: str, key: str) -> tuple[Person, ...]:
+        return tuple(self._person(i) for i in self._indexes[index].get(key, ()))
+
+    def __len__(self) -> int:
+        return len(self._name)
+
+    def __iter__(self) -> Iterator[Person]:
+        return (self._person(i) for i in range(len(self._name)))
+
+    def get(self, name: str) -> Person | None:
+        names = self._indexes["name"]
+        hits = names.get(name) or names.get(normalize_name(name))
+        return self._person(hits[0]) if hits else None
+
+    def lookup(self, name: str) -> dict[str, Any]:
+        person = self.get(name)
+        if person is None:
+            return NOT_FOUND
+        return {"found": True, "company": person.company, "floor": person.floor}
+
+    def search(
+        self, name: str, *, limit: int = 3, min_score: float = 0.5
+    ) -> list[Person]:
+        hits = self._matcher.search(
+            normalize_name(name), limit=limit, min_score=min_score
+        )
+        return [self._person(idx) for idx, _ in hits]
+
+    def resolve(self, name: str, *, limit: int = 3) -> dict[str, Any]:
+        person = self.get(name)
+        if person is not None:
+            return {"found": True, "company": person.company, "floor": person.floor}
+
+        candidates = self.search(name, limit=limit)
+        if not candidates:
+            return NOT_FOUND
+        return {
+            "found": False,
+            "candidates": [
+                {"name": p.name, "company": p.company, "floor": p.floor}
+                for p in candidates
+            ],
+        }
+
+    def by_company(self, company: str) -> tuple[Person, ...]:
+        return self._people_in("company", normalize_name(company))
+
+    def on_floor(self, floor: int) -> tuple[Person, ...]:
+        return self._people_in("floor", str(floor))
+
+    def floors(self) -> list[int]:
+        return sorted(int(floor) for floor in self._indexes["floor"])
+
+
+def open_snapshot(path: str | os.PathLike[str]) -> Snapshot:
+    """Open a snapshot file. Raises ValueError if it isn't one, or is outdated."""
+    return Snapshot(path)
+
+
+def is_snapshot(path: str | os.PathLike[str]) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _Builder:
+    def __init__(self) -> None:
+        self.strings: dict[str, int] = {}
+        self.sections: dict[str, bytes] = {}
+
+    def string(self, value: str) -> int:
+        sid = self.strings.get(value)
+        if sid is None:
+            sid = self.strings[value] = len(self.strings)
+        return sid
+
+    def index(self, name: str, postings: Mapping[str, Sequence[int]]) -> None:
+        size = 1
+        while size < 2 * len(postings) + 1:
+            size *= 2
+        slots = array("I", bytes(4 * size))
+        keys, starts, flat = array("I"), array("I", [0]), array("I")
+        for key, people in postings.items():
+            encoded = key.encode()
+            slot = zlib.crc32(encoded) & (size - 1)
+            while slots[slot]:
+                slot = (slot + 1) & (size - 1)
+            keys.append(self.string(key))
+            slots[slot] = len(keys)
+            flat.extend(people)
+            starts.append(len(flat))
+        for part, values in (
+            ("slots", slots),
+            ("keys", keys),
+            ("starts", starts),
+            ("postings", flat),
+        ):
+            self.sections[f"{name}.{part}"] = values.tobytes()
+
+    def write(self, path: Path, meta: Mapping[str, Any]) -> None:
+        ends, total = array("I"), 0
+        for value in self.strings:
+            total += len(value.encode())
+            ends.append(total)
+        sections = {
+            "meta": json.dumps(meta).encode(),
+            "strings": "".join(self.strings).encode(),
+            "string_ends": ends.tobytes(),
+            **self.sections,
+        }
+
+        offset = _HEADER.size + _SECTION.size * len(sections)
+        table, layout = [], []
+        for name, data in sections.items():
+            offset += -offset % 8
+            table.append(_SECTION.pack(name.encode(), offset, len(data)))
+            layout.append((offset, data))
+            offset += len(data)
+
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(sections)))
+            f.writelines(table)
+            for start, data in layout:
+                f.write(bytes(start - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def build_snapshot(
+    people: Iterable[Person],
+    path: str | os.PathLike[str],
+    *,
+    tenant: Mapping[str, Any] | None = None,
+) -> None:
+    """Compile `people`, and a tenant's building data if given, into a snapshot.
+
+    The snapshot is written next to `path` and renamed over it, so processes
+    never see it half written. Raises ValueError on duplicate names, as
+    `Directory` does.
+    """
+    builder = _Builder()
+    by_name: dict[str, list[int]] = {}
+    by_company: dict[str, list[int]] = {}
+    by_floor: dict[str, list[int]] = {}
+    displays: list[str] = []
+    columns = {
+        name: array("i" if name == "floor" else "I")
+        for name in ("name", "company", "floor", "flags", "key")
+    }
+
+    for i, person in enumerate(people):
+        key = normalize_name(person.name)
+        if key in by_name:
+            raise ValueError(f"duplicate directory entry for {person.name!r}")
+        by_name[key] = [i]
+        by_company.setdefault(normalize_name(person.company), []).append(i)
+        by_floor.setdefault(str(person.floor), []).append(i)
+        columns["name"].append(builder.string(person.name))
+        columns["company"].append(builder.string(person.company))
+        columns["floor"].append(person.floor)
+        columns["flags"].append(_IN_BUILDING if person.in_building else 0)
+        columns["key"].append(builder.string(key))
+        displays.append(person.name)
+
+    # exact display names too, as `Directory` indexes them
+    names = list(by_name)
+    for i, display in enumerate(displays):
+        by_name[display] = [i]
+
+    for name, column in columns.items():
+        builder.sections[f"person.{name}"] = column.tobytes()
+    phonetic, tokens, trigrams = build_index(names)
+    for name, postings in (
+        ("name", by_name),
+        ("company", by_company),
+        ("floor", by_floor),
+        ("phonetic", phonetic),
+        ("tokens", tokens),
+        ("trigrams", trigrams),
+    ):
+        builder.index(name, postings)
+
+    meta = {"built_at": time.time(), "people": len(names), "tenant": tenant}
+    builder.write(Path(path), meta)
+
+
+def read_people(path: str | os.PathLike[str]) -> list[Person]:
+    """Read a directory from JSON (see `directory.load_directory`) or CSV.
+
+    CSV files have a header row with the same columns: `name`, `company`,
+    `floor` and, optionally, `in_building` (true/false, yes/no or 1/0).
+    """
+    with Path(path).open(encoding="utf-8", newline="") as f:
+        if Path(path).suffix.lower() == ".csv":
+            records: list[dict[str, Any]] = list(csv.DictReader(f))
+            for record in records:
+                flag = str(record.get("in_building") or "").strip().casefold()
+                record["in_building"] = flag in ("1", "true", "yes", "y")
+        else:
+            records = json.load(f)
+    return [
+        Person(
+            name=record["name"],
+            company=record["company"],
+            floor=int(record["floor"]),
+            in_building=bool(record.get("in_building", False)),
+        )
+        for record in records
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "source",
+        type=Path,
+        help="a directory (JSON or CSV), or a tenant configuration (JSON object)",
+    )
+    parser.add_argument("output", type=Path)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    tenant = None
+    if args.source.suffix.lower() == ".json":
+        with args.source.open(encoding="utf-8") as f:
+            config = json.load(f)
+        if isinstance(config, dict):
+            tenant = {k: v for k, v in config.items() if k != "directory"}
+            people = read_people(args.source.parent / config["directory"])
+        else:
+            people = read_people(args.source)
+    else:
+        people = read_people(args.source)
+    build_snapshot(people, args.output, tenant=tenant)
+    print(
+        f"wrote {len(people)} people to {args.output} "
+        f"({args.output.stat().st_size / 2**20:.1f} MiB) "
+        f"in {time.perf_counter() - start:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import asyncio
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import unicodedata
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Iterable
+from pathlib import Path
+
+from livekit import rtc
+
+logger = logging.getLogger("agent")
+
+MAGIC = b"LKPCM1\n\0"
+_HEADER = struct.Struct("<8sII")
+"""Magic, sample rate and channel count, ahead of the 16-bit PCM."""
+
+FRAME_MS = 100
+"""Length of the frames audio is played back in."""
+
+
+def normalize_text(text: str) -> str:
+    """Return `text` as it is cached: NFKC-normalized, with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class SpeechStore:
+    """Synthesized speech on disk, keyed by voice and normalized text.
+
+    Each entry is one file of raw 16-bit PCM behind a small header, played back
+    through a read-only memory map, so the audio is paged in as it plays and
+    the page cache holds one copy for every worker process sharing `path`.
+    Entries are written atomically. Once they add up to more than `max_bytes`,
+    the least recently played are deleted first; playing an entry touches its
+    file, so the order carries over to the next process.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], *, max_bytes: int = 256 * 2**20
+    ) -> None:
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+
+        files = []
+        for file in self._path.glob("*.pcm"):
+            with contextlib.suppress(FileNotFoundError):
+                stat = file.stat()
+                files.append((stat.st_mtime, file.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._size += size
+        self._delete(self._evict())
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes of audio stored, headers included."""
+        return self._size
+
+    def _key(self, voice: str, text: str) -> str:
+        return hashlib.sha256(f"{voice}\n{normalize_text(text)}".encode()).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self._path / f"{key}.pcm"
+
+    def has(self, voice: str, text: str) -> bool:
+        return self._key(voice, text) in self._entries
+
+    def get(self, voice: str, text: str) -> AsyncGenerator[rtc.AudioFrame, None] | None:
+        """Return the stored audio for `text` as a stream, or None if not stored."""
+        key = self._key(voice, text)
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        try:
+            with open(self._file(key), "rb") as f:
+                audio = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # deleted by another process sharing the directory, or empty
+            self._size -= self._entries.pop(key)
+            self.misses += 1
+            return None
+        magic, sample_rate, num_channels = _HEADER.unpack_from(audio)
+        if magic != MAGIC:
+            audio.close()
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return _play(audio, sample_rate, num_channels, self._file(key))
+
+    def put(self, voice: str, text: str, frames: Iterable[rtc.AudioFrame]) -> bool:
+        """Store `frames` as the audio for `text`. Returns False if it doesn't fit."""
+        frames = list(frames)
+        size = self._entry_size(frames)
+        if size is None:
+            return False
+        key = self._key(voice, text)
+        self._write(key, frames)
+        self._delete(self._add(key, size))
+        return True
+
+    async def aput(
+        self, voice: str, text: str, frames: Iterable[rtc.AudioFrame]
+    ) -> bool:
+        """Like `put`, but writes and deletes files off the event loop."""
+        frames = list(frames)
+        size = self._entry_size(frames)
+        if size is None:
+            return False
+        key = self._key(voice, text)
+        await asyncio.to_thread(self._write, key, frames)
+        evicted = self._add(key, size)
+        if evicted:
+            await asyncio.to_thread(self._delete, evicted)
+        return True
+
+    def _entry_size(self, frames: list[rtc.AudioFrame]) -> int | None:
+        if not frames:
+            return None
+        size = _HEADER.size + sum(frame.data.nbytes for frame in frames)
+        return size if size <= self._max_bytes else None
+
+    def _write(self, key: str, frames: list[rtc.AudioFrame]) -> None:
+        file = self._file(key)
+        tmp = file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, frames[0].sample_rate, frames[0].num_channels))
+            for frame in frames:
+                f.write(frame.data)
+        os.replace(tmp, file)
+
+    def _add(self, key: str, size: int) -> list[str]:
+        """Account for a written entry. Returns the entries evicted to fit it."""
+        self._size += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        return self._evict()
+
+    def _remove(self, key: str) -> None:
+        self._size -= self._entries.pop(key, 0)
+        self._delete([key])
+
+    def _delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            with contextlib.suppress(FileNotFoundError):
+                self._file(key).unlink()
+
+    def _evict(self) -> list[str]:
+        evicted = []
+        while self._size > self._max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            evicted.append(key)
+            logger.debug("evicted cached speech", extra={"key": key})
+        return evicted
+
+
+async def _play(
+    audio: mmap.mmap, sample_rate: int, num_channels: int, file: Path
+) -> AsyncGenerator[rtc.AudioFrame, None]:
+    step = sample_rate * FRAME_MS // 1000 * num_channels * 2
+    try:
+        # mark it recently played, for eviction here and in other processes
+        with contextlib.suppress(FileNotFoundError):
+            await asyncio.to_thread(os.utime, file)
+        for start in range(_HEADER.size, len(audio), step):
+            chunk = audio[start : start + step]
+            yield rtc.AudioFrame(
+                chunk, sample_rate, num_channels, len(chunk) // (2 * num_channels)
+            )
+    finally:
+        audio.close()
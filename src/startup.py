@@ -0,0 +1,109 @@
+import gc
+import importlib.util
+import logging
+import os
+import sys
+import time
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any
+
+from livekit.agents import Plugin
+
+logger = logging.getLogger("agent")
+
+LAZY_IMPORTS = os.environ.get("AGENT_LAZY_IMPORTS", "0") == "1"
+"""Defer imports that are only needed once a session starts (`AGENT_LAZY_IMPORTS=1`)."""
+
+_PRELOAD_ENV = "AGENT_FORKSERVER_PRELOAD"
+
+
+def _load_vad() -> Any:
+    from livekit.plugins import silero
+
+    return silero.VAD.load()
+
+
+def _load_directory() -> Any:
+    from directory import load_directory
+
+    return load_directory()
+
+
+SHARED_RESOURCES: dict[str, Callable[[], Any]] = {
+    "vad": _load_vad,
+    "directory": _load_directory,
+}
+"""Resources loaded once per node in the forkserver and inherited by every job."""
+
+_shared: dict[str, Any] = {}
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import a module on first attribute access.
+
+    Under `AGENT_LAZY_IMPORTS=1` this keeps heavy, session-only modules out of
+    the main worker process, which only needs them to exist by the time the
+    first session starts.
+    """
+    if not LAZY_IMPORTS:
+        return importlib.import_module(name)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class _PreloadPlugin(Plugin):
+    def __init__(self, package: str) -> None:
+        super().__init__("agent-preload", "1.0.0", package, logger)
+
+
+def enable_forkserver_preload(*modules: str) -> None:
+    """Preload shared resources and `modules` once, in LiveKit's forkserver.
+
+    On Linux, job processes are forked from a forkserver that imports every
+    registered plugin package first. Registering this module (and any extra
+    modules, e.g. plugins that don't register themselves) makes the forkserver
+    load `SHARED_RESOURCES` a single time, so each job inherits the loaded model
+    weights and directory copy-on-write instead of loading its own copy.
+
+    Must be called on the main thread before the worker starts.
+    """
+    os.environ[_PRELOAD_ENV] = "1"
+    for package in (__name__, *modules):
+        Plugin.register_plugin(_PreloadPlugin(package))
+
+
+def shared(name: str) -> Any:
+    """Return a shared resource, loading it in this process if it wasn't preloaded."""
+    resource = _shared.get(name)
+    if resource is None:
+        resource = _shared[name] = SHARED_RESOURCES[name]()
+    return resource
+
+
+def _preload() -> None:
+    start = time.perf_counter()
+    for name in SHARED_RESOURCES:
+        shared(name)
+    # keep the preloaded objects out of future collections, so the garbage
+    # collector doesn't touch (and copy) their pages in every forked job
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "preloaded shared resources",
+        extra={"resources": list(_shared), "elapsed": time.perf_counter() - start},
+    )
+
+
+if os.environ.get(_PRELOAD_ENV) == "1":
+    _preload()
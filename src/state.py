@@ -0,0 +1,56 @@
+from directory import Person, normalize_name
+from visitors import Visit
+
+
+class VisitState:
+    """What the tools have learned about the current visit.
+
+    One instance lives in each session's `userdata` (see `RunContext.userdata`),
+    so a tool can reuse what an earlier tool resolved instead of having the LLM
+    repeat it in the call's arguments, and instead of looking it up again.
+    """
+
+    __slots__ = ("contact", "floor", "group", "meeting_time", "visitor")
+
+    def __init__(self) -> None:
+        self.visitor: Visit | None = None
+        """The guest, once they have checked in; the first of a group."""
+        self.group: tuple[Visit, ...] = ()
+        """Everyone checked in with the guest, the guest included."""
+        self.contact: Person | None = None
+        """The person the guest is here to see, as found in the directory."""
+        self.floor: int | None = None
+        """The floor the guest is going to."""
+        self.meeting_time: str | None = None
+        """The time of the guest's meeting, in ISO format."""
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"VisitState({fields})"
+
+    @property
+    def in_progress(self) -> bool:
+        """Whether the guest has checked in or said who they are here to see."""
+        return self.visitor is not None or self.contact is not None
+
+    def meet(self, contact: Person) -> None:
+        """Remember who the guest is here to see, and so which floor."""
+        self.contact = contact
+        self.floor = contact.floor
+
+    def is_contact(self, name: str | None) -> bool:
+        """Return whether `name` refers to the remembered contact (or is omitted)."""
+        if self.contact is None:
+            return False
+        return not name or normalize_name(name) == normalize_name(self.contact.name)
+
+    def summary(self) -> str | None:
+        """Describe the visit in a few words, or None if nothing was learned."""
+        if not self.in_progress:
+            return None
+        guest = self.visitor.name if self.visitor is not None else "a guest"
+        if len(self.group) > 1:
+            guest += f" and {len(self.group) - 1} others"
+        if self.contact is None:
+            return f"{guest} checked in"
+        return f"{guest} came to see {self.contact.name} on floor {self.contact.floor}"
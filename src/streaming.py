@@ -0,0 +1,78 @@
+import asyncio
+import contextlib
+import functools
+import inspect
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
+
+from livekit.agents import RunContext
+
+R = TypeVar("R")
+
+
+def _run_context(args: tuple[Any, ...], kwargs: dict[str, Any]) -> RunContext | None:
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, RunContext):
+            return value
+    return None
+
+
+def streaming_tool(
+    *, grace: float = 0.3
+) -> Callable[[Callable[..., AsyncIterator[R]]], Callable[..., Awaitable[R | None]]]:
+    """Let a function tool speak provisional answers while it is still working.
+
+    The decorated tool is an async generator. Every value it yields replaces
+    the previous one as the tool's answer, and the last one is returned to the
+    LLM. If the tool takes more than `grace` seconds to yield the next value,
+    the current one is spoken to the guest straight away, so a slow backend
+    doesn't leave them in silence:
+
+        @function_tool
+        @timed_tool
+        @streaming_tool()
+        async def lookup_weather(self, context: RunContext, location: str):
+            yield "Let me check the weather in {}.".format(location)
+            yield await slow_lookup(location)
+
+    Fast tools never speak their provisional answers. If the final answer has
+    already been spoken, the tool returns None, so the LLM doesn't repeat it.
+    Apply it under `@function_tool` (and `@timed_tool`).
+    """
+
+    def decorator(
+        func: Callable[..., AsyncIterator[R]],
+    ) -> Callable[..., Awaitable[R | None]]:
+        if not inspect.isasyncgenfunction(func):
+            raise TypeError(f"{func.__qualname__} must be an async generator")
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> R | None:
+            context = _run_context(args, kwargs)
+            answers = func(*args, **kwargs)
+            answer: R | None = None
+            spoken = False
+            try:
+                while True:
+                    next_answer = asyncio.ensure_future(answers.__anext__())
+                    if answer is not None and not spoken and context is not None:
+                        done, _ = await asyncio.wait({next_answer}, timeout=grace)
+                        if not done:
+                            context.session.say(str(answer))
+                            spoken = True
+                    try:
+                        answer = await next_answer
+                    except StopAsyncIteration:
+                        break
+                    spoken = False
+            except asyncio.CancelledError:
+                next_answer.cancel()
+                raise
+            finally:
+                with contextlib.suppress(RuntimeError):
+                    await answers.aclose()  # type: ignore[attr-defined]
+            return None if spoken else answer
+
+        return wrapper
+
+    return decorator
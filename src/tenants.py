@@ -0,0 +1,331 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from directory import Directory, load_directory
+from offload import get_offloader
+from responses import BUILDING, BUILDING_INFO, FLOORS, LIFT_BANKS, ResponseTable
+from snapshot import Snapshot, SnapshotDirectory, open_snapshot
+
+logger = logging.getLogger("agent")
+
+DEFAULT_TENANT = "shard"
+
+DEFAULT_TIMEZONE = "Europe/London"
+
+_TENANT_ID = re.compile(r"^[\w-]{1,64}$")
+
+PERSON_BYTES = 900
+"""Approximate bytes one person holds in a loaded `Directory`, indexes included."""
+
+FLOOR_BYTES = 160
+"""Approximate bytes a `ResponseTable` holds per floor."""
+
+
+class Tenant(NamedTuple):
+    """Everything the Assistant needs to know about one building."""
+
+    id: str
+    building: str
+    timezone: str
+    directory: Directory
+    responses: ResponseTable
+    size: int
+    """Approximate bytes held by the directory and response table."""
+    presence_feed: str | None = None
+    """Where badge swipes are read from, see `presence.open_feed`."""
+    snapshot: Snapshot | None = None
+    """The snapshot the tenant was read from, if any, see `TenantStore.refresh`."""
+
+
+class UnknownTenantError(LookupError):
+    """Raised when no configuration exists for a tenant."""
+
+
+def tenant_from_metadata(metadata: str | None) -> str:
+    """Return the tenant named in a room's JSON metadata (`{"tenant": "..."}`).
+
+    Rooms without metadata, or without a valid tenant id, get `DEFAULT_TENANT`.
+    """
+    if not metadata:
+        return DEFAULT_TENANT
+    try:
+        value = json.loads(metadata).get("tenant")
+    except (ValueError, AttributeError):
+        logger.warning("room metadata is not a JSON object, using default tenant")
+        return DEFAULT_TENANT
+    if not isinstance(value, str) or not _TENANT_ID.match(value):
+        return DEFAULT_TENANT
+    return value
+
+
+def build_tenant(
+    tenant_id: str,
+    directory: Directory,
+    *,
+    building: str = BUILDING,
+    timezone: str = DEFAULT_TIMEZONE,
+    floors: int = FLOORS,
+    lift_banks: Sequence[tuple[int, str]] = LIFT_BANKS,
+    info: Mapping[str, str] = BUILDING_INFO,
+    presence_feed: str | None = None,
+) -> Tenant:
+    """Build a tenant's response table and estimate its size."""
+    responses = ResponseTable(
+        info, building=building, floors=floors, lift_banks=lift_banks
+    )
+    return Tenant(
+        tenant_id,
+        building,
+        timezone,
+        directory,
+        responses,
+        _estimate_size(directory, responses),
+        presence_feed,
+        directory.snapshot if isinstance(directory, SnapshotDirectory) else None,
+    )
+
+
+def default_tenant(directory: Directory | None = None) -> Tenant:
+    """Return The Shard, with the default directory and the `PRESENCE_FEED` feed."""
+    return build_tenant(
+        DEFAULT_TENANT,
+        directory if directory is not None else load_directory(),
+        presence_feed=os.environ.get("PRESENCE_FEED"),
+    )
+
+
+def load_tenant(tenant_id: str, root: str | os.PathLike[str] | None = None) -> Tenant:
+    """Load a tenant's configuration and directory from disk.
+
+    Args:
+        tenant_id: The tenant id, e.g. from `tenant_from_metadata(room.metadata)`.
+        root: A folder holding one `<tenant_id>.json` file per tenant, with the keys
+            `building`, `timezone`, `floors`, `lift_banks` (pairs of the highest
+            floor served and the bank's name), `building_info` and `directory`
+            (a file in the `load_directory` format, relative to `root`), and
+            optionally `presence_feed`. Only `building` and `directory` are
+            required. A `<tenant_id>.snap` snapshot compiled from the
+            configuration (see `snapshot`) is used instead if there is one.
+            Defaults to the `TENANTS_PATH` environment variable.
+
+    Without a configuration file, `DEFAULT_TENANT` is The Shard with the
+    default directory, see `default_tenant`; any other id raises `UnknownTenantError`.
+    """
+    if not _TENANT_ID.match(tenant_id):
+        raise UnknownTenantError(tenant_id)
+    root = root or os.environ.get("TENANTS_PATH")
+    compiled = Path(root, f"{tenant_id}.snap") if root else None
+    if compiled is not None and compiled.is_file():
+        snapshot = open_snapshot(compiled)
+        if snapshot.meta["tenant"] is not None:
+            return _build_from_config(
+                tenant_id, snapshot.meta["tenant"], snapshot.directory
+            )
+
+    path = Path(root, f"{tenant_id}.json") if root else None
+    if path is None or not path.is_file():
+        if tenant_id == DEFAULT_TENANT:
+            return default_tenant()
+        raise UnknownTenantError(tenant_id)
+
+    with path.open(encoding="utf-8") as f:
+        config = json.load(f)
+    return _build_from_config(
+        tenant_id, config, load_directory(path.parent / config["directory"])
+    )
+
+
+def _build_from_config(
+    tenant_id: str, config: Mapping[str, Any], directory: Directory
+) -> Tenant:
+    return build_tenant(
+        tenant_id,
+        directory,
+        building=config["building"],
+        timezone=config.get("timezone", DEFAULT_TIMEZONE),
+        floors=int(config.get("floors", FLOORS)),
+        lift_banks=[
+            (int(top), str(bank)) for top, bank in config.get("lift_banks", LIFT_BANKS)
+        ],
+        info=config.get("building_info", BUILDING_INFO),
+        presence_feed=config.get("presence_feed"),
+    )
+
+
+class TenantStore:
+    """Bounded, least-recently-used set of loaded tenants.
+
+    One worker process serves rooms for many buildings. Each tenant's
+    directory and response table is loaded on first use, off the event loop,
+    and kept while it is in use; once more than `max_tenants` are loaded, or
+    they hold more than `max_bytes`, the least recently used are dropped and
+    reloaded if they come back. Pinned tenants (see `put`) are never dropped.
+    Returning a loaded tenant is a dictionary lookup.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Tenant] = load_tenant,
+        *,
+        max_tenants: int = 8,
+        max_bytes: int = 256 * 2**20,
+    ) -> None:
+        if max_tenants < 1:
+            raise ValueError("max_tenants must be at least 1")
+
+        self._loader = loader
+        self._max_tenants = max_tenants
+        self._max_bytes = max_bytes
+        self._tenants: OrderedDict[str, Tenant] = OrderedDict()
+        self._loading: dict[str, asyncio.Future[Tenant]] = {}
+        self._pinned: set[str] = set()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def __contains__(self, tenant_id: object) -> bool:
+        return tenant_id in self._tenants
+
+    @property
+    def size(self) -> int:
+        """Approximate bytes held by the loaded tenants."""
+        return self._size
+
+    def get(self, tenant_id: str) -> Tenant | None:
+        """Return a loaded tenant, or None if it isn't loaded."""
+        tenant = self._tenants.get(tenant_id)
+        if tenant is not None:
+            self._tenants.move_to_end(tenant_id)
+        return tenant
+
+    async def load(self, tenant_id: str) -> Tenant:
+        """Return a tenant, loading it first if needed.
+
+        Concurrent loads of the same tenant share one call to the loader.
+        Raises `UnknownTenantError` if the tenant has no configuration.
+        """
+        tenant = self.get(tenant_id)
+        if tenant is not None:
+            self.hits += 1
+            return tenant
+
+        self.misses += 1
+        # shielded so a cancelled caller doesn't cancel a load shared with others
+        return await asyncio.shield(self._start_load(tenant_id))
+
+    async def refresh(self, tenant_ids: Iterable[str] | None = None) -> int:
+        """Reload the tenants whose snapshot has been replaced since they loaded.
+
+        Only the loaded tenants among `tenant_ids` are checked, if given, and
+        the files are checked off the event loop. The new tenant replaces the
+        old one in one step: sessions already running keep the tenant they
+        started with, and new sessions get the new one. A tenant that fails to
+        reload keeps being served as it was. Returns the number of tenants
+        reloaded.
+        """
+        if tenant_ids is None:
+            tenants = list(self._tenants.values())
+        else:
+            tenants = [self._tenants[i] for i in tenant_ids if i in self._tenants]
+        tenants = [tenant for tenant in tenants if tenant.snapshot is not None]
+        if not tenants:
+            return 0
+        stale = await get_offloader().run("refresh_tenants", _replaced, tenants)
+        reloaded = 0
+        for tenant_id in stale:
+            try:
+                await asyncio.shield(self._start_load(tenant_id))
+            except Exception:
+                logger.exception("failed to reload tenant", extra={"tenant": tenant_id})
+            else:
+                reloaded += 1
+        return reloaded
+
+    def _start_load(self, tenant_id: str) -> asyncio.Future[Tenant]:
+        future = self._loading.get(tenant_id)
+        if future is None:
+            future = asyncio.ensure_future(self._load(tenant_id))
+            self._loading[tenant_id] = future
+            future.add_done_callback(lambda _: self._loading.pop(tenant_id, None))
+        return future
+
+    def put(self, tenant: Tenant, *, pin: bool = False) -> None:
+        """Add a loaded tenant, evicting the least recently used if needed.
+
+        A pinned tenant, e.g. the default one sharing the preloaded directory,
+        stays loaded, as does the tenant whenever it is reloaded.
+        """
+        previous = self._tenants.pop(tenant.id, None)
+        if previous is not None:
+            self._size -= previous.size
+        self._tenants[tenant.id] = tenant
+        self._size += tenant.size
+        if pin:
+            self._pinned.add(tenant.id)
+
+        while len(self._tenants) > self._max_tenants or self._size > self._max_bytes:
+            evicted_id = next(
+                (
+                    tenant_id
+                    for tenant_id in self._tenants
+                    if tenant_id != tenant.id and tenant_id not in self._pinned
+                ),
+                None,
+            )
+            if evicted_id is None:
+                break
+            evicted = self._tenants.pop(evicted_id)
+            self._size -= evicted.size
+            self.evictions += 1
+            logger.info(
+                "unloaded tenant", extra={"tenant": evicted.id, "bytes": evicted.size}
+            )
+
+    async def _load(self, tenant_id: str) -> Tenant:
+        start = time.perf_counter()
+        tenant = await get_offloader().run("load_tenant", self._loader, tenant_id)
+        self.put(tenant)
+        logger.info(
+            "loaded tenant",
+            extra={
+                "tenant": tenant_id,
+                "bytes": tenant.size,
+                "elapsed": time.perf_counter() - start,
+            },
+        )
+        return tenant
+
+
+def _replaced(tenants: Iterable[Tenant]) -> list[str]:
+    return [
+        tenant.id
+        for tenant in tenants
+        if tenant.snapshot is not None and tenant.snapshot.replaced()
+    ]
+
+
+def _estimate_size(directory: Directory, responses: ResponseTable) -> int:
+    """Estimate the bytes held by a tenant's directory and response table.
+
+    Counted, not measured: walking the objects would take seconds for a large
+    directory, and would copy the pages of one shared with `forkserver`. A
+    snapshot counts as its file size.
+    """
+    if isinstance(directory, SnapshotDirectory):
+        size = directory.snapshot.size
+    else:
+        size = len(directory) * PERSON_BYTES
+    return size + (responses.floors + 1) * FLOOR_BYTES
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import aiohttp
+
+from http_pool import http_session
+
+logger = logging.getLogger("agent")
+
+WORLD_TIME_API_URL = "https://worldtimeapi.org/api/timezone"
+
+
+class TimeProvider:
+    """Non-blocking source of the current time for IANA timezones.
+
+    The remote time API is only used to learn the offset between the local
+    monotonic clock and the remote wall clock, once per timezone. After that,
+    `now` is answered from the cached offset without any network round trip,
+    and the offset is refreshed in the background once it is older than
+    `refresh_interval`. If the API cannot be reached, the local clock and
+    `zoneinfo` are used instead.
+
+    Pass `base_url=None` to only ever use the local clock, e.g. offline.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = WORLD_TIME_API_URL,
+        *,
+        refresh_interval: float = 3600.0,
+        retry_interval: float = 60.0,
+        timeout: float = 2.0,
+        session_factory: Callable[[], aiohttp.ClientSession] = http_session,
+    ) -> None:
+        self._base_url = base_url.rstrip("/") if base_url is not None else None
+        self._refresh_interval = refresh_interval
+        self._retry_interval = retry_interval
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session_factory = session_factory
+        # timezone -> (offset from monotonic to unix time, monotonic expiry)
+        self._offsets: dict[str, tuple[float, float]] = {}
+        self._syncing: dict[str, asyncio.Task[bool]] = {}
+
+    async def now(self, timezone: str) -> datetime:
+        """Return the current time in `timezone`.
+
+        This never waits on the network: a missing or stale offset is refreshed
+        in the background while the answer comes from the best clock available.
+        """
+        tzinfo = ZoneInfo(timezone)
+        if self._base_url is None:
+            return datetime.now(tzinfo)
+        cached = self._offsets.get(timezone)
+        mono = time.monotonic()
+        if cached is None or mono >= cached[1]:
+            self._refresh(timezone)
+        if cached is None:
+            return datetime.now(tzinfo)
+        return datetime.fromtimestamp(mono + cached[0], tzinfo)
+
+    def prefetch(self, *timezones: str) -> None:
+        """Start synchronizing the given timezones in the background."""
+        for timezone in timezones:
+            self._refresh(timezone)
+
+    async def warm(self, *timezones: str) -> None:
+        """Synchronize the given timezones and wait until they are done."""
+        await asyncio.gather(*(self._refresh(tz) for tz in timezones))
+
+    async def sync(self, timezone: str) -> bool:
+        """Fetch the remote time for `timezone` and update its cached offset.
+
+        Returns False if the remote time could not be fetched, in which case the
+        local clock is cached and retried after `retry_interval`.
+        """
+        if self._base_url is None:
+            return False
+        url = f"{self._base_url}/{timezone}"
+        try:
+            sent = time.monotonic()
+            async with self._session_factory().get(url, timeout=self._timeout) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+            received = time.monotonic()
+            remote = float(data["unixtime"])
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+            logger.warning(
+                "failed to fetch time, using the local clock",
+                extra={"timezone": timezone, "error": str(e)},
+            )
+            mono = time.monotonic()
+            self._offsets[timezone] = (time.time() - mono, mono + self._retry_interval)
+            return False
+
+        # assume the remote clock was read halfway through the round trip
+        offset = remote - (sent + received) / 2
+        self._offsets[timezone] = (offset, received + self._refresh_interval)
+        return True
+
+    def _refresh(self, timezone: str) -> asyncio.Future[bool]:
+        if self._base_url is None:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(False)
+            return done
+        task = self._syncing.get(timezone)
+        if task is None:
+            task = asyncio.create_task(self.sync(timezone))
+            self._syncing[timezone] = task
+            task.add_done_callback(lambda _: self._syncing.pop(timezone, None))
+        return task
+
+
+_default_provider: TimeProvider | None = None
+
+
+def get_time_provider() -> TimeProvider:
+    """Return the process-wide time provider."""
+    global _default_provider
+
+    if _default_provider is None:
+        _default_provider = TimeProvider()
+    return _default_provider
+
+
+def set_time_provider(provider: TimeProvider) -> None:
+    """Replace the process-wide time provider, e.g. with a local-clock one."""
+    global _default_provider
+
+    _default_provider = provider
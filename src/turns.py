@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Protocol, runtime_checkable
+
+import numpy as np
+from livekit.agents.inference_runner import _InferenceRunner
+from livekit.plugins.turn_detector.base import (
+    MAX_HISTORY_TOKENS,
+    EOUModelBase,
+    _EUORunnerBase,
+)
+from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+logger = logging.getLogger("agent")
+
+_Request = tuple[str, bytes, "asyncio.Future[bytes | None]"]
+
+
+class Runner(Protocol):
+    def run(self, data: bytes) -> bytes | None: ...
+
+
+@runtime_checkable
+class BatchRunner(Runner, Protocol):
+    def run_batch(self, batch: Sequence[bytes]) -> list[bytes | None]: ...
+
+
+RunnerFactory = Callable[[str], Runner]
+
+
+class _BatchedEOURunner:
+    """The turn detector plugin's runner, extended to take several requests.
+
+    The model is causal and takes no attention mask, so right-padding a short
+    chat context leaves the probabilities up to its last token unchanged.
+    """
+
+    def __init__(self, runner: _EUORunnerBase) -> None:
+        self._runner = runner
+
+    def run(self, data: bytes) -> bytes | None:
+        return self._runner.run(data)
+
+    def run_batch(self, batch: Sequence[bytes]) -> list[bytes | None]:
+        start = time.perf_counter()
+        tokenizer: Any = self._runner._tokenizer
+        texts = [
+            self._runner._format_chat_ctx(json.loads(data)["chat_ctx"])
+            for data in batch
+        ]
+        ids = [
+            tokenizer(
+                text,
+                add_special_tokens=False,
+                return_tensors="np",
+                max_length=MAX_HISTORY_TOKENS,
+                truncation=True,
+            )["input_ids"][0]
+            for text in texts
+        ]
+        width = max(len(seq) for seq in ids)
+        input_ids = np.full((len(ids), width), tokenizer.pad_token_id or 0, np.int64)
+        for row, seq in enumerate(ids):
+            input_ids[row, : len(seq)] = seq
+        outputs = self._runner._session.run(None, {"input_ids": input_ids})
+        probabilities = outputs[0].reshape(len(ids), width, -1)
+        duration = round(time.perf_counter() - start, 3)
+        return [
+            json.dumps(
+                {
+                    "eou_probability": float(probabilities[row, len(seq) - 1, -1]),
+                    "duration": duration,
+                    "input": text,
+                }
+            ).encode()
+            for row, (seq, text) in enumerate(zip(ids, texts))
+        ]
+
+
+def _load_runner(method: str) -> Runner:
+    runner = _InferenceRunner.registered_runners[method]()
+    runner.initialize()
+    if isinstance(runner, _EUORunnerBase):
+        return _BatchedEOURunner(runner)
+    return runner
+
+
+class TurnDetectionService:
+    """One end-of-turn model per process, shared by every session in it.
+
+    Implements LiveKit's `InferenceExecutor`: sessions hand it their
+    end-of-turn requests (see `model`), which go through a single queue to a
+    single inference thread, so a process hosting many rooms loads the model
+    weights once and never runs more than one inference at a time on them.
+
+    With `max_batch` above 1, requests arriving together are run as one batch
+    of up to `max_batch`: a request waits at most `max_wait` seconds for
+    others to join it, besides the time the batch before it takes. That only
+    pays off where the model is cheaper per request in a batch than alone
+    (`benchmarks/bench_turns.py` measures it), so it is off by default.
+    Runners that can't batch (no `run_batch`, or it fails) run a batch's
+    requests one at a time.
+
+    Runners are loaded on first use by `runner_factory`, by default the
+    runner the turn detector plugin registered for the inference method.
+    """
+
+    def __init__(
+        self,
+        runner_factory: RunnerFactory = _load_runner,
+        *,
+        max_batch: int = 1,
+        max_wait: float = 0.002,
+    ) -> None:
+        self._runner_factory = runner_factory
+        self._runners: dict[str, Runner] = {}
+        self._unbatched: set[str] = set()
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue: asyncio.Queue[_Request] = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="turn-detector")
+        self.requests = 0
+        self.batches = 0
+
+    def model(self) -> MultilingualModel:
+        """Return a turn detector for one session, backed by this service."""
+        return _SharedMultilingualModel(self)
+
+    async def do_inference(self, method: str, data: bytes) -> bytes | None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((method, data, future))
+        # the worker holds the batch's first request while it waits
+        if 1 < self._max_batch <= self._queue.qsize() + 1:
+            self._full.set()
+        return await future
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _infer(self, method: str, batch: list[bytes]) -> list[bytes | Exception | None]:
+        runner = self._runners.get(method)
+        if runner is None:
+            runner = self._runners[method] = self._runner_factory(method)
+        if (
+            len(batch) > 1
+            and method not in self._unbatched
+            and isinstance(runner, BatchRunner)
+        ):
+            try:
+                return list(runner.run_batch(batch))
+            except Exception:
+                logger.warning(
+                    f"batched turn detection failed, running {method} unbatched",
+                    exc_info=True,
+                )
+                self._unbatched.add(method)
+        results: list[bytes | Exception | None] = []
+        for data in batch:
+            try:
+                results.append(runner.run(data))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _next_batch(self) -> list[_Request]:
+        batch = [await self._queue.get()]
+        if self._max_batch > 1 and self._max_wait > 0:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self._max_wait)
+        self._full.clear()
+        while len(batch) < self._max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        # drop requests whose session gave up waiting, e.g. the user kept talking
+        return [request for request in batch if not request[2].done()]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            by_method: dict[str, list[_Request]] = defaultdict(list)
+            for request in await self._next_batch():
+                by_method[request[0]].append(request)
+            for method, requests in by_method.items():
+                try:
+                    results = await loop.run_in_executor(
+                        self._executor,
+                        self._infer,
+                        method,
+                        [data for _, data, _ in requests],
+                    )
+                except Exception as e:
+                    results = [e] * len(requests)
+                self.batches += 1
+                for (_, _, future), result in zip(requests, results):
+                    if isinstance(result, Exception):
+                        logger.error("turn detection failed", exc_info=result)
+                        with contextlib.suppress(asyncio.InvalidStateError):
+                            future.set_exception(result)
+                    else:
+                        self.requests += 1
+                        with contextlib.suppress(asyncio.InvalidStateError):
+                            future.set_result(result)
+
+
+class _SharedMultilingualModel(MultilingualModel):
+    # `MultilingualModel` takes its executor from the job context, which a
+    # session hosted outside of a job doesn't have
+    def __init__(self, service: TurnDetectionService) -> None:
+        EOUModelBase.__init__(
+            self, model_type="multilingual", inference_executor=service
+        )
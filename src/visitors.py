@@ -0,0 +1,231 @@
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+from directory import normalize_name
+
+logger = logging.getLogger("agent")
+
+_PRUNE_INTERVAL = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS visits (
+    id INTEGER PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    checked_in_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS visits_by_name ON visits (name_key, checked_in_at);
+"""
+
+
+class Visit(NamedTuple):
+    """A visitor check-in."""
+
+    name: str
+    checked_in_at: float
+
+
+class VisitorRegistry:
+    """Bounded registry of checked-in visitors, shared by every worker on a node.
+
+    Recent check-ins are kept in memory, keyed by normalized name, and expire
+    after `ttl` seconds; at most `max_entries` are held, oldest first out.
+    Check-ins are appended to a SQLite database in WAL mode in batches, so
+    they survive restarts and are visible to the other job processes, which
+    fall back to an indexed query when a name is not in their own memory.
+
+    Pass `path=None` for a memory-only registry.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str] | None = None,
+        *,
+        ttl: float = 12 * 3600.0,
+        max_entries: int = 10_000,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._clock = clock
+        self._recent: OrderedDict[str, Visit] = OrderedDict()
+        # lookups may run on a worker thread, see `offload`
+        self._recent_lock = threading.Lock()
+        self._pending: list[tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+        self._flush_task: asyncio.Task[None] | None = None
+        self._wake = asyncio.Event()
+        self._db: sqlite3.Connection | None = None
+
+        if path is not None:
+            # the connection is shared with the flush thread, guarded by _lock
+            self._db = sqlite3.connect(
+                path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.get(name) is not None
+
+    def add(self, name: str) -> Visit:
+        """Record a check-in. It is written to disk with the next batch."""
+        visit = Visit(name=name, checked_in_at=self._clock())
+        key = normalize_name(name)
+        self._remember(key, visit)
+
+        if self._db is not None:
+            with self._lock:
+                self._pending.append((key, visit.name, visit.checked_in_at))
+                full = len(self._pending) >= self._batch_size
+            if full:
+                self._schedule_flush()
+        return visit
+
+    def add_many(self, names: Iterable[str]) -> list[Visit]:
+        """Record a group's check-ins at once.
+
+        The group shares one check-in time, appears in memory all together and
+        is written to disk in a single transaction with the next batch.
+        """
+        at = self._clock()
+        visits = [
+            (normalize_name(name), Visit(name=name, checked_in_at=at)) for name in names
+        ]
+        with self._recent_lock:
+            for key, visit in visits:
+                self._recent[key] = visit
+                self._recent.move_to_end(key)
+            while len(self._recent) > self._max_entries:
+                self._recent.popitem(last=False)
+
+        if self._db is not None and visits:
+            with self._lock:
+                self._pending.extend(
+                    (key, visit.name, visit.checked_in_at) for key, visit in visits
+                )
+                full = len(self._pending) >= self._batch_size
+            if full:
+                self._schedule_flush()
+        return [visit for _, visit in visits]
+
+    def get(self, name: str) -> Visit | None:
+        """Return the most recent unexpired check-in for `name`, if any."""
+        key = normalize_name(name)
+        cutoff = self._clock() - self._ttl
+
+        with self._recent_lock:
+            visit = self._recent.get(key)
+            if visit is not None:
+                if visit.checked_in_at >= cutoff:
+                    return visit
+                del self._recent[key]
+
+        if self._db is None:
+            return None
+
+        # another worker may have checked this visitor in
+        with self._lock:
+            row = self._db.execute(
+                "SELECT name, checked_in_at FROM visits"
+                " WHERE name_key = ? AND checked_in_at >= ?"
+                " ORDER BY checked_in_at DESC LIMIT 1",
+                (key, cutoff),
+            ).fetchone()
+        if row is None:
+            return None
+
+        visit = Visit(name=row[0], checked_in_at=row[1])
+        self._remember(key, visit)
+        return visit
+
+    def flush(self) -> int:
+        """Write pending check-ins in one transaction. Returns the number written."""
+        if self._db is None:
+            return 0
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            try:
+                with self._db:
+                    self._db.execute("BEGIN")
+                    self._db.executemany(
+                        "INSERT INTO visits (name_key, name, checked_in_at)"
+                        " VALUES (?, ?, ?)",
+                        pending,
+                    )
+            except sqlite3.Error:
+                self._pending[:0] = pending
+                raise
+        return len(pending)
+
+    def prune(self) -> int:
+        """Delete expired check-ins from disk. Returns the number deleted."""
+        if self._db is None:
+            return 0
+
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM visits WHERE checked_in_at < ?",
+                (self._clock() - self._ttl,),
+            )
+        return cursor.rowcount
+
+    def start(self) -> None:
+        """Start flushing pending check-ins in the background."""
+        if self._db is not None and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def aclose(self) -> None:
+        """Stop the background flush and write anything still pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self._db is not None:
+            await asyncio.to_thread(self.flush)
+
+    def _remember(self, key: str, visit: Visit) -> None:
+        with self._recent_lock:
+            self._recent[key] = visit
+            self._recent.move_to_end(key)
+            while len(self._recent) > self._max_entries:
+                self._recent.popitem(last=False)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self.flush()
+        else:
+            self._wake.set()
+
+    async def _flush_loop(self) -> None:
+        next_prune = 0.0
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self._flush_interval)
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+                if time.monotonic() >= next_prune:
+                    await asyncio.to_thread(self.prune)
+                    next_prune = time.monotonic() + _PRUNE_INTERVAL
+            except sqlite3.Error:
+                logger.exception("failed to persist visitor check-ins")
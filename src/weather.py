@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from collections.abc import Callable, Mapping
+from typing import NamedTuple, Protocol
+
+import aiohttp
+
+from cache import AsyncTTLCache
+from http_pool import http_session
+
+logger = logging.getLogger("agent")
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+# WMO weather interpretation codes, as used by Open-Meteo
+_WEATHER_CODES: tuple[tuple[int, str], ...] = (
+    (0, "clear"),
+    (1, "mainly clear"),
+    (2, "partly cloudy"),
+    (3, "overcast"),
+    (48, "foggy"),
+    (57, "drizzly"),
+    (67, "rainy"),
+    (77, "snowy"),
+    (82, "showery"),
+    (86, "snowy"),
+    (99, "stormy"),
+)
+
+
+class Weather(NamedTuple):
+    """Current weather at a location."""
+
+    description: str
+    temperature_f: float
+
+
+class WeatherError(Exception):
+    """Raised when a weather backend cannot answer right now."""
+
+
+class WeatherBackend(Protocol):
+    async def current(self, location: str) -> Weather | None:
+        """Return the current weather, or None if the location is not supported."""
+        ...
+
+
+def _normalize_location(location: str) -> str:
+    return " ".join(location.casefold().split())
+
+
+def describe_weather_code(code: int) -> str:
+    """Return a short spoken description for a WMO weather code."""
+    for upper, description in _WEATHER_CODES:
+        if code <= upper:
+            return description
+    return "unsettled"
+
+
+class StaticWeatherBackend:
+    """Fixed weather table, used in development and evaluations."""
+
+    def __init__(self, table: Mapping[str, Weather] | None = None) -> None:
+        if table is None:
+            table = {"London": Weather(description="sunny", temperature_f=60.0)}
+        self._table = {_normalize_location(k): v for k, v in table.items()}
+
+    async def current(self, location: str) -> Weather | None:
+        return self._table.get(_normalize_location(location))
+
+
+class OpenMeteoBackend:
+    """Weather from the Open-Meteo geocoding and forecast APIs (no API key needed)."""
+
+    def __init__(
+        self,
+        *,
+        geocoding_url: str = GEOCODING_URL,
+        forecast_url: str = FORECAST_URL,
+        timeout: float = 3.0,
+        session_factory: Callable[[], aiohttp.ClientSession] = http_session,
+    ) -> None:
+        self._geocoding_url = geocoding_url
+        self._forecast_url = forecast_url
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session_factory = session_factory
+        # place names don't move, so coordinates are kept much longer than readings
+        self._coordinates: AsyncTTLCache[str, tuple[float, float] | None] = (
+            AsyncTTLCache(self._geocode, ttl=86400.0, max_entries=4096)
+        )
+
+    async def current(self, location: str) -> Weather | None:
+        coordinates = await self._coordinates.get(_normalize_location(location))
+        if coordinates is None:
+            return None
+
+        latitude, longitude = coordinates
+        data = await self._get_json(
+            self._forecast_url,
+            {
+                "latitude": str(latitude),
+                "longitude": str(longitude),
+                "current": "temperature_2m,weather_code",
+                "temperature_unit": "fahrenheit",
+            },
+        )
+        try:
+            current = data["current"]
+            return Weather(
+                description=describe_weather_code(int(current["weather_code"])),
+                temperature_f=float(current["temperature_2m"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise WeatherError(f"unexpected forecast response: {e}") from e
+
+    async def _geocode(self, location: str) -> tuple[float, float] | None:
+        data = await self._get_json(
+            self._geocoding_url, {"name": location, "count": "1"}
+        )
+        results = data.get("results") or []
+        if not results:
+            return None
+        return float(results[0]["latitude"]), float(results[0]["longitude"])
+
+    async def _get_json(self, url: str, params: dict[str, str]) -> dict:
+        try:
+            async with self._session_factory().get(
+                url, params=params, timeout=self._timeout
+            ) as resp:
+                resp.raise_for_status()
+                return await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise WeatherError(str(e)) from e
+
+
+class CachedWeatherBackend:
+    """Caches another backend per location.
+
+    Readings are served from a bounded LRU for `ttl` seconds, then served stale
+    for up to `stale_ttl` more seconds while they are refreshed in the
+    background. Concurrent misses for the same location share one request.
+    """
+
+    def __init__(
+        self,
+        backend: WeatherBackend,
+        *,
+        ttl: float = 600.0,
+        stale_ttl: float = 1800.0,
+        max_entries: int = 1024,
+    ) -> None:
+        self._backend = backend
+        self._cache: AsyncTTLCache[str, Weather | None] = AsyncTTLCache(
+            backend.current, ttl=ttl, stale_ttl=stale_ttl, max_entries=max_entries
+        )
+
+    @property
+    def cache(self) -> AsyncTTLCache[str, Weather | None]:
+        return self._cache
+
+    async def current(self, location: str) -> Weather | None:
+        return await self._cache.get(_normalize_location(location))
@@ -95,44 +95,20 @@ async def test_directory_lookup_found_and_wait_time() -> None:
                 user_input="I have a meeting with Sarah Collins at 10:00 AM."
             )
 
-        # 1️⃣ Agent checks directory
+        # 1️⃣ Agent looks up, checks availability and wait time in one call
         await (
             result.expect.next_event()
-            .is_function_call(name="lookup_directory")
+            .is_function_call(name="prepare_visit")
             .judge(
                 llm,
                 intent="""
-                Looks up Sarah Collins in the building directory.
+                Looks up Sarah Collins in the building directory, with the
+                10:00 AM meeting time.
                 """,
             )
         )
 
-        # 2️⃣ Agent checks availability
-        await (
-            result.expect.next_event()
-            .is_function_call(name="check_available")
-            .judge(
-                llm,
-                intent="""
-                Checks whether Sarah Collins is currently in the building.
-                """,
-            )
-        )
-
-        # 3️⃣ Agent calculates wait time
-        await (
-            result.expect.next_event()
-            .is_function_call(name="get_wait_time")
-            .judge(
-                llm,
-                intent="""
-                Calculates how long the visitor will need to wait
-                based on the current time and meeting time.
-                """,
-            )
-        )
-
-        # 4️⃣ Agent explains everything clearly to the visitor
+        # 2️⃣ Agent explains everything clearly to the visitor
         await (
             result.expect.next_event()
             .is_message(role="assistant")
@@ -165,7 +141,7 @@ async def test_directory_lookup_not_found() -> None:
 
         await (
             result.expect.next_event()
-            .is_function_call(name="lookup_directory")
+            .is_function_call(name="prepare_visit")
         )
 
         await (
@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+from livekit import rtc
+from livekit.agents.voice.room_io.types import NoiseCancellationParams
+from livekit.plugins import noise_cancellation
+
+from audio_budget import FULL, LIGHT, OFF, MachineLoad, NoiseCancellationPolicy
+
+
+def _params(kind: rtc.ParticipantKind.ValueType) -> NoiseCancellationParams:
+    return NoiseCancellationParams(participant=SimpleNamespace(kind=kind), track=None)
+
+
+def _model(options: rtc.NoiseCancellationOptions | None) -> str | None:
+    return options.options["modelPath"] if options is not None else None
+
+
+STANDARD = _params(rtc.ParticipantKind.PARTICIPANT_KIND_STANDARD)
+SIP = _params(rtc.ParticipantKind.PARTICIPANT_KIND_SIP)
+
+
+def test_policy_steps_down_as_load_rises():
+    load = [0.0]
+    policy = NoiseCancellationPolicy(lambda: load[0], downgrade_at=0.8, skip_at=1.0)
+    levels = []
+    for value in (0.2, 0.79, 0.8, 0.99, 1.0, 1.5, 0.5):
+        load[0] = value
+        levels.append(policy.level())
+    assert levels == [FULL, FULL, LIGHT, LIGHT, OFF, OFF, FULL]
+
+
+def test_policy_picks_the_callers_model():
+    load = [0.0]
+    policy = NoiseCancellationPolicy(lambda: load[0])
+    assert _model(policy(STANDARD)) == _model(noise_cancellation.BVC())
+    assert _model(policy(SIP)) == _model(noise_cancellation.BVCTelephony())
+
+    load[0] = 0.9
+    assert _model(policy(STANDARD)) == _model(noise_cancellation.NC())
+    assert _model(policy(SIP)) == _model(noise_cancellation.NC())
+
+    load[0] = 1.2
+    assert policy(STANDARD) is None
+    assert policy.chosen == {FULL: 2, LIGHT: 2, OFF: 1}
+
+
+async def test_machine_load_is_sampled_in_the_background():
+    readings = iter([0.1, *[0.9] * 100])
+    load = MachineLoad(0.5, interval=0.01, smoothing=1.0, cpu=lambda: next(readings))
+    assert load() == 0.0  # starts sampling
+    await asyncio.sleep(0.1)
+    # the last interval's use, not an average since the previous reading
+    assert load() == 0.9 / 0.5
+    await load.aclose()
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from badges import BadgeQueue
+from visitors import Visit
+
+
+class FakePrinter:
+    def __init__(self, fail: bool = False) -> None:
+        self.jobs: list[list[str]] = []
+        self.fail = fail
+
+    async def print_badges(self, visits):
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise OSError("out of paper")
+        self.jobs.append([visit.name for visit in visits])
+
+
+def _visits(*names):
+    return [Visit(name, 0.0) for name in names]
+
+
+async def test_group_is_printed_as_one_job():
+    printer = FakePrinter()
+    queue = BadgeQueue(printer, linger=0.02)
+    futures = queue.submit_many(_visits("A", "B", "C"))
+    futures.append(queue.submit(Visit("D", 0.0)))
+    await asyncio.gather(*futures)
+    assert printer.jobs == [["A", "B", "C", "D"]]
+    assert (queue.jobs, queue.printed) == (1, 4)
+    await queue.aclose()
+
+
+async def test_batches_are_capped_and_drained_on_close():
+    printer = FakePrinter()
+    queue = BadgeQueue(printer, max_batch=2, linger=0.0)
+    queue.submit_many(_visits("A", "B", "C"))
+    await queue.aclose()
+    assert printer.jobs == [["A", "B"], ["C"]]
+
+
+async def test_printer_failure_is_reported_to_waiters():
+    queue = BadgeQueue(FakePrinter(fail=True), linger=0.0)
+    future = queue.submit(Visit("A", 0.0))
+    with pytest.raises(OSError):
+        await future
+    # the worker survives a failed job
+    queue._printer = FakePrinter()
+    await queue.submit(Visit("B", 0.0))
+    await queue.aclose()
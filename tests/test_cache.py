@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from cache import AsyncTTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _counting_loader(calls: list[str], delay: float = 0.0):
+    async def load(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(delay)
+        return f"{key}-{len(calls)}"
+
+    return load
+
+
+async def test_hits_until_ttl_expires():
+    calls: list[str] = []
+    clock = FakeClock()
+    cache = AsyncTTLCache(_counting_loader(calls), ttl=10, clock=clock)
+
+    assert await cache.get("a") == "a-1"
+    clock.now = 9
+    assert await cache.get("a") == "a-1"
+    clock.now = 10
+    assert await cache.get("a") == "a-2"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+async def test_concurrent_misses_share_one_load():
+    calls: list[str] = []
+    cache = AsyncTTLCache(_counting_loader(calls, delay=0.01), ttl=10)
+
+    results = await asyncio.gather(*(cache.get("a") for _ in range(20)))
+    assert set(results) == {"a-1"}
+    assert calls == ["a"]
+    assert cache.coalesced == 19
+
+
+async def test_stale_value_served_while_revalidating():
+    calls: list[str] = []
+    clock = FakeClock()
+    cache = AsyncTTLCache(_counting_loader(calls), ttl=10, stale_ttl=5, clock=clock)
+
+    await cache.get("a")
+    clock.now = 12
+    assert await cache.get("a") == "a-1"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await cache.get("a") == "a-2"
+    assert cache.stale_hits == 1
+
+
+async def test_lru_eviction():
+    calls: list[str] = []
+    cache = AsyncTTLCache(_counting_loader(calls), ttl=10, max_entries=2)
+
+    await cache.get("a")
+    await cache.get("b")
+    await cache.get("a")
+    await cache.get("c")
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+async def test_failed_load_is_not_cached():
+    attempts = 0
+
+    async def flaky(key: str) -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("backend down")
+        return key
+
+    cache = AsyncTTLCache(flaky, ttl=10)
+    with pytest.raises(RuntimeError):
+        await cache.get("a")
+    assert await cache.get("a") == "a"
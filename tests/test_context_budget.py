@@ -0,0 +1,122 @@
+import pytest
+from livekit.agents import AgentSession, llm
+
+from agent import INSTRUCTIONS, Assistant
+from context_budget import ContextBudget, compact_instructions, estimate_tokens
+from offline import ScriptedLLM, Step
+from state import VisitState
+from timesource import TimeProvider, get_time_provider, set_time_provider
+from visitors import VisitorRegistry
+
+
+@pytest.fixture
+def local_clock():
+    previous = get_time_provider()
+    set_time_provider(TimeProvider(None))
+    yield
+    set_time_provider(previous)
+
+
+def test_compact_instructions_keeps_wording_and_paragraphs():
+    raw = INSTRUCTIONS.format("The Shard")
+    compact = compact_instructions(raw)
+    assert len(compact) < len(raw)
+    assert compact.split() == raw.split()
+    assert "\n\n" in compact
+    assert "\n\n\n" not in compact
+    assert all(line == line.strip() for line in compact.splitlines())
+
+
+def _ctx(*items: tuple[str, str]) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext()
+    for role, text in items:
+        chat_ctx.add_message(role=role, content=text)
+    return chat_ctx
+
+
+def test_trim_drops_oldest_turns_first():
+    chat_ctx = _ctx(
+        ("system", "instructions"),
+        *(("user" if i % 2 else "assistant", "x" * 200) for i in range(1, 11)),
+        ("user", "latest question"),
+    )
+    budget = ContextBudget(max_tokens=200)
+    trimmed = budget.trim(chat_ctx)
+
+    assert estimate_tokens(trimmed.items) <= 200
+    assert trimmed.items[0].text_content == "instructions"
+    assert trimmed.items[-1].text_content == "latest question"
+    assert trimmed.items[1:] == chat_ctx.items[-len(trimmed.items) + 1 :]
+    assert budget.trimmed_tokens > 0
+    assert budget.prompt_tokens == estimate_tokens(trimmed.items)
+
+
+def test_trim_never_sends_a_tool_output_without_its_call():
+    chat_ctx = _ctx(("system", "instructions"), ("user", "x" * 400))
+    call = llm.FunctionCall(call_id="1", name="check_in", arguments="{}")
+    chat_ctx.items.append(call)
+    chat_ctx.items.append(
+        llm.FunctionCallOutput(
+            call_id="1", name="check_in", output="y" * 40, is_error=False
+        )
+    )
+    chat_ctx.add_message(role="assistant", content="Welcome!")
+    chat_ctx.add_message(role="user", content="thanks")
+
+    trimmed = ContextBudget(max_tokens=60).trim(chat_ctx)
+    types = [item.type for item in trimmed.items]
+    assert types == ["message", "message", "message"]
+
+
+def test_new_visit_after_idle_gap_sends_only_summary():
+    now = 0.0
+    budget = ContextBudget(idle_gap=60, clock=lambda: now)
+    chat_ctx = _ctx(("system", "instructions"), ("user", "first guest"))
+    assert not budget.next_turn()
+
+    now = 30.0
+    assert not budget.next_turn()
+    now = 200.0
+    assert not budget.next_turn(waiting=True)
+    now = 400.0
+    assert budget.next_turn()
+
+    second = chat_ctx.add_message(role="user", content="second guest")
+    budget.start_visit("Alex came to see Sarah", at=second.created_at)
+    texts = [item.text_content for item in budget.trim(chat_ctx).items]
+    assert texts[0] == "instructions"
+    assert "Alex came to see Sarah" in texts[1]
+    assert texts[2:] == ["second guest"]
+    assert budget.visits == 2
+
+
+async def test_assistant_forgets_past_visitors(local_clock):
+    now = 0.0
+    budget = ContextBudget(clock=lambda: now)
+    prompts: list[list[str]] = []
+
+    def script(chat_ctx: llm.ChatContext) -> Step:
+        prompts.append([item.text_content or "" for item in chat_ctx.items])
+        return "Hello."
+
+    visit = VisitState()
+    async with (
+        ScriptedLLM(script) as scripted,
+        AgentSession(llm=scripted, userdata=visit) as session,
+    ):
+        await session.start(Assistant(visitors=VisitorRegistry(), budget=budget))
+        await session.run(user_input="I'm the first guest")
+        visit.visitor = VisitorRegistry().add("Alex Morgan")
+
+        # a checked-in guest still waiting in the lobby is the same visit
+        now = 600.0
+        await session.run(user_input="How much longer?")
+        assert session.userdata is visit
+        assert "I'm the first guest" in prompts[-1]
+
+        now = 3000.0
+        await session.run(user_input="I'm the second guest")
+
+    assert "I'm the first guest" not in prompts[-1]
+    assert any("Alex Morgan checked in" in text for text in prompts[-1])
+    assert session.userdata is not visit
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from directory import Directory, Person, load_directory, normalize_name
+
+
+def test_normalize_name():
+    assert normalize_name("  sarah  COLLINS.") == "sarah collins"
+
+
+def test_lookup_found_and_not_found():
+    directory = load_directory()
+    assert directory.lookup("Sarah Collins") == {
+        "found": True,
+        "company": "Shard Capital",
+        "floor": 34,
+    }
+    assert directory.lookup("sarah collins") is directory.lookup("Sarah Collins")
+    assert directory.lookup("John Doe") == {"found": False}
+
+
+def test_secondary_indexes():
+    directory = load_directory()
+    assert {p.name for p in directory.by_company("shard capital")} == {
+        "Sarah Collins",
+        "James Patel",
+        "Emily Wong",
+    }
+    assert [p.name for p in directory.on_floor(21)] == ["James Patel"]
+    assert directory.on_floor(99) == ()
+
+
+def test_duplicate_names_rejected():
+    with pytest.raises(ValueError):
+        Directory(
+            [
+                Person("Sarah Collins", "A", 1, True),
+                Person("sarah collins", "B", 2, False),
+            ]
+        )
+
+
+def test_load_from_json(tmp_path):
+    path = tmp_path / "directory.json"
+    path.write_text(
+        json.dumps([{"name": "Ada Lovelace", "company": "Engines", "floor": "7"}])
+    )
+    directory = load_directory(path)
+    assert len(directory) == 1
+    assert directory.get("ada lovelace") == Person("Ada Lovelace", "Engines", 7, False)
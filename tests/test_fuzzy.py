@@ -0,0 +1,37 @@
+from directory import load_directory
+from fuzzy import NameMatcher, phonetic_key
+
+
+def test_phonetic_key_folds_common_misspellings():
+    assert phonetic_key("Collins") == phonetic_key("Colins")
+    assert phonetic_key("Sarah") == phonetic_key("Sara")
+    assert phonetic_key("Catherine") == phonetic_key("Katherine")
+    assert phonetic_key("Philips") == phonetic_key("Fillips")
+    assert phonetic_key("Patel") != phonetic_key("Wong")
+
+
+def test_search_ranks_closest_match_first():
+    matcher = NameMatcher(["sarah collins", "sara coleman", "james patel"])
+    results = matcher.search("sara colins")
+    assert results[0][0] == 0
+    assert all(results[i][1] >= results[i + 1][1] for i in range(len(results) - 1))
+
+
+def test_search_respects_limit_and_min_score():
+    matcher = NameMatcher(["sarah collins", "sara coleman", "james patel"])
+    assert len(matcher.search("sara colins", limit=1)) == 1
+    assert matcher.search("zzzz qqqq") == []
+    assert matcher.search("") == []
+
+
+def test_directory_resolve_returns_candidates():
+    directory = load_directory()
+    result = directory.resolve("Sara Colins")
+    assert result["found"] is False
+    assert result["candidates"][0] == {
+        "name": "Sarah Collins",
+        "company": "Shard Capital",
+        "floor": 34,
+    }
+    assert directory.resolve("Sarah Collins")["found"] is True
+    assert directory.resolve("Xavier Quill") == {"found": False}
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from kiosk import AdmissionControl
+
+
+def test_admission_load_is_the_tighter_budget():
+    usage = [0.0]
+    admission = AdmissionControl(
+        max_cpu=0.5, max_lag=0.1, smoothing=1.0, cpu=lambda: usage[0]
+    )
+    assert admission.admits()
+
+    usage[0] = 0.25
+    admission.sample(0.08)
+    assert admission.load == pytest.approx(0.8)
+    assert admission.admits()
+
+    usage[0] = 0.6
+    admission.sample(0.0)
+    assert admission.load == pytest.approx(1.2)
+    assert not admission.admits()
+
+    usage[0] = 0.1
+    admission.sample(0.2)
+    assert not admission.admits()
+
+
+def test_admission_smooths_samples():
+    admission = AdmissionControl(max_lag=0.1, smoothing=0.5, cpu=lambda: 0.0)
+    admission.sample(0.15)
+    assert admission.admits()
+    admission.sample(0.15)
+    assert not admission.admits()
+
+
+async def test_admission_measures_loop_lag():
+    admission = AdmissionControl(
+        max_lag=0.05, interval=0.2, poll=0.01, smoothing=1.0, cpu=lambda: 0.0
+    )
+    admission.start()
+    try:
+        await asyncio.sleep(0.05)
+        for _ in range(20):
+            time.sleep(0.012)  # a loop busy most of the time
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.3)
+        assert admission.lag > 0
+    finally:
+        await admission.aclose()
+
+    quiet = AdmissionControl(interval=0.1, poll=0.01, cpu=lambda: 0.0)
+    quiet.start()
+    await asyncio.sleep(0.25)
+    await quiet.aclose()
+    assert quiet.admits()
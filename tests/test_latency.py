@@ -0,0 +1,108 @@
+import asyncio
+import contextlib
+import json
+import threading
+
+from livekit.agents import MetricsCollectedEvent, metrics, utils
+
+from latency import (
+    Histogram,
+    LatencyRecorder,
+    export_jsonl,
+    get_recorder,
+    timed_tool,
+)
+
+
+def test_histogram_quantiles():
+    h = Histogram()
+    for _ in range(99):
+        h.observe(0.02)
+    h.observe(4.0)
+    assert h.count == 100
+    assert 0.01 < h.quantile(0.5) <= 0.025
+    assert 2.5 < h.quantile(0.999) <= 5.0
+
+
+def test_series_are_bounded():
+    recorder = LatencyRecorder(max_series=2)
+    for room in ("a", "b", "c"):
+        recorder.observe("llm_ttft", 0.1, room=room)
+    rooms = [s["labels"]["room"] for s in recorder.snapshot()]
+    assert rooms == ["b", "c"]
+
+
+def test_prometheus_and_jsonl_export(tmp_path):
+    recorder = LatencyRecorder()
+    recorder.observe("tts_ttfb", 0.2, room='lobby "1"')
+    text = recorder.render_prometheus()
+    assert 'stage="tts_ttfb",room="lobby \\"1\\"",le="+Inf"} 1' in text
+    assert "agent_stage_latency_seconds_count" in text
+
+    path = tmp_path / "metrics.jsonl"
+    recorder.write_jsonl(path)
+    line = json.loads(path.read_text())
+    assert line["stage"] == "tts_ttfb"
+    assert line["count"] == 1
+
+
+async def test_jsonl_export_while_observing(tmp_path):
+    recorder = LatencyRecorder(max_series=16)
+    threads = []
+    snapshot = recorder.snapshot
+
+    def snapshot_on_loop():
+        # a snapshot taken off the loop races `observe` over the series
+        threads.append(threading.current_thread())
+        return snapshot()
+
+    recorder.snapshot = snapshot_on_loop
+    path = tmp_path / "metrics.jsonl"
+    export = asyncio.create_task(export_jsonl(path, interval=0, recorder=recorder))
+    for i in range(200):
+        recorder.observe("llm_ttft", 0.1, room=str(i))
+        await asyncio.sleep(0)
+    assert not export.done()
+    export.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await export
+
+    assert threads
+    assert set(threads) == {threading.current_thread()}
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines[-1]["labels"]["room"] == "199"
+
+
+def test_attach_records_pipeline_metrics():
+    recorder = LatencyRecorder()
+    session = utils.EventEmitter()
+    recorder.attach(session)
+
+    session.emit(
+        "metrics_collected",
+        MetricsCollectedEvent(
+            metrics=metrics.EOUMetrics(
+                timestamp=0,
+                end_of_utterance_delay=0.3,
+                transcription_delay=0.1,
+                on_user_turn_completed_delay=0,
+            )
+        ),
+    )
+    stages = {s["stage"]: s["count"] for s in recorder.snapshot()}
+    assert stages == {"end_of_utterance": 1, "stt_final": 1}
+
+
+async def test_timed_tool_records_duration():
+    @timed_tool
+    async def lookup(name: str) -> str:
+        return name
+
+    assert lookup.__name__ == "lookup"
+    assert await lookup("x") == "x"
+    tools = [
+        s
+        for s in get_recorder().snapshot()
+        if s["stage"] == "tool" and s["labels"].get("tool") == "lookup"
+    ]
+    assert tools and tools[0]["count"] == 1
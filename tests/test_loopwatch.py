@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+from latency import LatencyRecorder, timed_tool
+from loopwatch import LoopStallError, StallWatchdog, watch_loop
+
+
+@timed_tool
+async def blocking_tool() -> None:
+    time.sleep(0.05)
+
+
+@timed_tool
+async def polite_tool() -> None:
+    await asyncio.sleep(0.05)
+
+
+async def test_strict_mode_fails_blocking_tool():
+    with pytest.raises(LoopStallError) as exc_info:
+        async with watch_loop(threshold=0.01):
+            await asyncio.sleep(0.02)
+            await blocking_tool()
+            await asyncio.sleep(0.02)
+
+    stall = exc_info.value.stalls[0]
+    assert stall.tool == "blocking_tool"
+    assert "time.sleep(0.05)" in stall.stack[-1]
+
+
+async def test_strict_mode_allows_awaiting_tool():
+    async with watch_loop(threshold=0.01) as watchdog:
+        await asyncio.sleep(0.02)
+        await polite_tool()
+    assert watchdog.stalls == []
+
+
+async def test_stalls_are_counted_and_recorded():
+    recorder = LatencyRecorder()
+    watchdog = StallWatchdog(threshold=0.01, interval=0.01, recorder=recorder)
+    watchdog.start()
+    await asyncio.sleep(0.02)
+    await blocking_tool()
+    await asyncio.sleep(0.02)
+    await watchdog.aclose()
+
+    watchdog.check()  # not strict: never raises
+    assert watchdog.counts["blocking_tool"] == 1
+    stages = {s["stage"]: s for s in recorder.snapshot()}
+    assert stages["loop_stall"]["labels"] == {"tool": "blocking_tool"}
+    assert stages["loop_lag"]["count"] > 0
@@ -0,0 +1,68 @@
+import pytest
+from livekit.agents import AgentSession, llm
+
+from agent import Assistant
+from offline import (
+    ScriptedLLM,
+    ToolCall,
+    receptionist_script,
+    serial_receptionist_script,
+)
+from timesource import TimeProvider, get_time_provider, set_time_provider
+from visitors import VisitorRegistry
+
+
+@pytest.fixture
+def local_clock():
+    previous = get_time_provider()
+    set_time_provider(TimeProvider(None))
+    yield
+    set_time_provider(previous)
+
+
+def test_script_maps_requests_to_tools():
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content="Hi, I'm here to see Sarah Collins")
+    assert receptionist_script(chat_ctx) == [
+        ToolCall("prepare_visit", {"name": "Sarah Collins", "time": None})
+    ]
+    assert serial_receptionist_script(chat_ctx) == [
+        ToolCall("lookup_directory", {"name": "Sarah Collins"})
+    ]
+
+    chat_ctx.add_message(role="user", content="How do I get to floor 12?")
+    assert receptionist_script(chat_ctx) == [ToolCall("get_directions", {"floor": 12})]
+
+    chat_ctx.add_message(role="user", content="Hello")
+    assert isinstance(receptionist_script(chat_ctx), str)
+
+
+async def test_session_runs_offline(local_clock):
+    async with (
+        ScriptedLLM(serial_receptionist_script) as scripted,
+        AgentSession(llm=scripted) as session,
+    ):
+        await session.start(Assistant(visitors=VisitorRegistry()))
+
+        result = await session.run(
+            user_input="Hi, I'm here to see Sarah Collins at 2099-01-01T10:00:00+00:00"
+        )
+        result.expect.next_event().is_function_call(
+            name="lookup_directory", arguments={"name": "Sarah Collins"}
+        )
+        result.expect.next_event().is_function_call_output()
+        result.expect.next_event().is_function_call(
+            name="check_available", arguments={"name": "Sarah Collins"}
+        )
+        result.expect.next_event().is_function_call_output()
+        result.expect.next_event().is_function_call(name="get_wait_time")
+        result.expect.next_event().is_function_call_output()
+        result.expect.next_event().is_message(role="assistant")
+        result.expect.no_more_events()
+
+        result = await session.run(user_input="Thanks, my name is Alex Morgan")
+        result.expect.next_event().is_function_call(
+            name="check_in", arguments={"name": "Alex Morgan"}
+        )
+        result.expect.skip_next_event_if(type="function_call_output")
+        result.expect.next_event().is_message(role="assistant")
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from livekit.agents import ToolError
+
+from latency import LatencyRecorder, timed_tool
+from loopwatch import watch_loop
+from offload import Offloader, get_offloader, offload
+
+
+@timed_tool
+@offload(limit=2, timeout=1.0)
+def blocking_lookup(name: str) -> tuple[str, int]:
+    time.sleep(0.05)
+    return name.upper(), threading.get_ident()
+
+
+@offload("process")
+def cpu_bound(n: int) -> tuple[int, int]:
+    return sum(i * i for i in range(n)), os.getpid()
+
+
+async def test_sync_tool_runs_off_the_loop():
+    async with watch_loop(threshold=0.01):
+        await asyncio.sleep(0.02)
+        name, thread = await blocking_lookup("sarah")
+    assert name == "SARAH"
+    assert thread != threading.get_ident()
+
+
+async def test_concurrency_is_limited_per_tool():
+    calls = [asyncio.create_task(blocking_lookup("x")) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    assert get_offloader().stats()["blocking_lookup"]["waiting"] == 4
+    await asyncio.gather(*calls)
+    assert get_offloader().stats()["blocking_lookup"]["running"] == 0
+
+
+async def test_timeout_raises_tool_error():
+    offloader = Offloader(recorder=LatencyRecorder())
+    with pytest.raises(ToolError):
+        await offloader.run("slow", time.sleep, 0.2, timeout=0.01)
+    stats = offloader.stats()["slow"]
+    assert stats["timeouts"] == 1
+    assert stats["running"] == 1  # the work keeps its slot until it finishes
+
+    await asyncio.sleep(0.3)
+    assert offloader.stats()["slow"]["completed"] == 1
+    offloader.shutdown()
+
+
+async def test_process_pool():
+    try:
+        total, pid = await cpu_bound(1000)
+    finally:
+        get_offloader().shutdown()
+    assert total == sum(i * i for i in range(1000))
+    assert pid != os.getpid()
+
+
+def test_rejects_async_and_nested_functions():
+    async def already_async() -> None: ...
+
+    def nested() -> None: ...
+
+    with pytest.raises(TypeError):
+        offload()(already_async)
+    with pytest.raises(TypeError):
+        offload("process")(nested)
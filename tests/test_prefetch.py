@@ -0,0 +1,96 @@
+import asyncio
+
+from livekit.agents import AgentSession
+
+from agent import Assistant
+from offline import ScriptedLLM, serial_receptionist_script
+from prefetch import Prefetcher
+from timesource import TimeProvider, get_time_provider, set_time_provider
+from visitors import VisitorRegistry
+
+
+async def test_warmed_result_is_reused():
+    prefetch = Prefetcher()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    prefetch.warm("key", work)
+    prefetch.warm("key", work)
+    assert await prefetch.get("key", work) == "done"
+    assert await prefetch.get("key", work) == "done"
+    assert calls == [1]
+    assert (prefetch.hits, prefetch.misses) == (2, 0)
+
+
+async def test_failed_speculation_is_retried():
+    prefetch = Prefetcher()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("backend down")
+        return "ok"
+
+    prefetch.warm("key", flaky)
+    await asyncio.sleep(0)
+    assert await prefetch.get("key", flaky) == "ok"
+    assert len(attempts) == 2
+    assert prefetch.misses == 1
+
+
+async def test_stale_and_evicted_results_are_not_used():
+    prefetch = Prefetcher(max_age=0.0, max_entries=2)
+
+    async def value(v):
+        return v
+
+    prefetch.warm("stale", lambda: value("old"))
+    assert "stale" not in prefetch
+    assert await prefetch.get("stale", lambda: value("new")) == "new"
+
+    prefetch = Prefetcher(max_entries=2)
+    for key in ("a", "b", "c"):
+        prefetch.warm(key, lambda key=key: value(key))
+    assert len(prefetch) == 2
+    assert "a" not in prefetch
+    await prefetch.aclose()
+    assert len(prefetch) == 0
+
+
+async def test_lookup_warms_availability_and_prepare_visit_answers_in_one_round():
+    previous = get_time_provider()
+    set_time_provider(TimeProvider(None))
+    try:
+        assistant = Assistant(visitors=VisitorRegistry())
+        async with ScriptedLLM() as scripted, AgentSession(llm=scripted) as session:
+            await session.start(assistant)
+
+            result = await session.run(
+                user_input="Hi, I'm here to see Sarah Collins"
+                " at 2099-01-01T10:00:00+00:00"
+            )
+            result.expect.next_event().is_function_call(
+                name="prepare_visit",
+                arguments={
+                    "name": "Sarah Collins",
+                    "time": "2099-01-01T10:00:00+00:00",
+                },
+            )
+            output = result.expect.next_event().is_function_call_output().event()
+            assert "is currently in the building" in output.item.output
+            assert "estimated wait time" in output.item.output
+            result.expect.next_event().is_message(role="assistant")
+            result.expect.no_more_events()
+
+            # the serial chain picks up what lookup_directory warmed
+            scripted._script = serial_receptionist_script
+            result = await session.run(user_input="I'm here to see James Patel")
+            result.expect.contains_function_call(name="check_available")
+            assert assistant.prefetch.hits == 1
+    finally:
+        set_time_provider(previous)
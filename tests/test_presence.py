@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+
+import pytest
+from livekit.agents import AgentSession
+
+from agent import Assistant
+from directory import load_directory
+from offline import ScriptedLLM, ToolCall
+from presence import PresenceEvent, PresenceStore, open_feed, parse_event, tail_file
+from timesource import TimeProvider, get_time_provider, set_time_provider
+from visitors import VisitorRegistry
+
+
+def test_deltas_update_point_queries():
+    store = PresenceStore.from_directory(load_directory())
+    assert store.is_present("Sarah Collins") is True
+    assert store.is_present("james patel") is False
+    assert store.is_present("Nobody") is None
+
+    assert store.apply(PresenceEvent("James Patel", True, 100.0))
+    assert store.is_present("James Patel") is True
+    # stale and duplicate swipes are ignored
+    assert not store.apply(PresenceEvent("James Patel", False, 50.0))
+    assert not store.apply(PresenceEvent("James Patel", True, 200.0))
+    assert store.since("James Patel") == 100.0
+
+
+def test_parse_event():
+    assert parse_event('{"name": "Ada", "present": true, "at": 5}') == PresenceEvent(
+        "Ada", True, 5.0
+    )
+    assert parse_event("not json") is None
+    assert parse_event("\n") is None
+
+
+async def test_wait_for_arrival_wakes_on_swipe():
+    store = PresenceStore([PresenceEvent("Ada", False, 1.0)])
+    waiter = asyncio.create_task(store.wait_for_arrival("ada"))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    store.apply(PresenceEvent("Ada", True, 2.0))
+    assert await waiter == 2.0
+    assert await store.wait_for_arrival("Ada") == 2.0
+
+    with pytest.raises(asyncio.TimeoutError):
+        await store.wait_for_arrival("Bob", timeout=0.01)
+    assert not store._arrivals
+
+
+async def test_tail_file_follows_appends(tmp_path):
+    path = tmp_path / "swipes.jsonl"
+    path.write_text(json.dumps({"name": "Ada", "present": True, "at": 1}) + "\n")
+
+    store = PresenceStore()
+    store.start(tail_file(path, poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    assert store.is_present("Ada")
+
+    with path.open("a") as f:
+        f.write(json.dumps({"name": "Ada", "present": False, "at": 2}))
+        f.flush()
+        await asyncio.sleep(0.05)
+        # not applied until the line is complete
+        assert store.is_present("Ada")
+        f.write("\n")
+    await asyncio.sleep(0.05)
+    assert store.is_present("Ada") is False
+    await store.aclose()
+
+
+async def test_tcp_feed():
+    async def serve(reader, writer):
+        writer.write(b'{"name": "Ada", "present": true, "at": 1}\n')
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        store = PresenceStore()
+        store.start(open_feed(f"tcp://127.0.0.1:{port}"))
+        await asyncio.wait_for(store.wait_for_arrival("Ada"), 1.0)
+        await store.aclose()
+
+
+async def test_wait_time_uses_live_presence():
+    previous = get_time_provider()
+    set_time_provider(TimeProvider(None))
+    presence = PresenceStore.from_directory(load_directory())
+    assistant = Assistant(visitors=VisitorRegistry(), presence=presence)
+    try:
+        async with (
+            ScriptedLLM(
+                lambda ctx: (
+                    ctx.items[-1].output
+                    if ctx.items[-1].type == "function_call_output"
+                    else [ToolCall("prepare_visit", {"name": "James Patel"})]
+                )
+            ) as scripted,
+            AgentSession(llm=scripted) as session,
+        ):
+            await session.start(assistant)
+
+            result = await session.run(user_input="James Patel please")
+            output = result.expect[1].event().item.output
+            assert "not currently in the building" in output
+
+            presence.apply(PresenceEvent("James Patel", True, time.time()))
+            await asyncio.sleep(0.05)
+            said = [
+                item.text_content
+                for item in session.history.items
+                if item.type == "message" and item.role == "assistant"
+            ]
+            assert any("James Patel has just arrived" in text for text in said)
+
+            result = await session.run(user_input="James Patel again")
+            output = result.expect[1].event().item.output
+            assert "James Patel has just swiped in" in output
+            assert "is currently in the building" in output
+    finally:
+        set_time_provider(previous)
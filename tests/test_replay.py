@@ -0,0 +1,224 @@
+import asyncio
+
+import pytest
+from livekit import rtc
+from livekit.agents import APIConnectOptions, llm, stt, tts, utils
+
+from offline import ScriptedLLM
+from replay import (
+    RecordingLLM,
+    RecordingSTT,
+    RecordingTTS,
+    ReplayError,
+    ReplayLLM,
+    ReplaySTT,
+    ReplayTTS,
+    Tape,
+)
+
+SAMPLE_RATE = 16000
+FRAME = SAMPLE_RATE // 50
+
+
+def _frame(value: int) -> rtc.AudioFrame:
+    return rtc.AudioFrame(value.to_bytes(2, "little") * FRAME, SAMPLE_RATE, 1, FRAME)
+
+
+def _final(text: str) -> stt.SpeechEvent:
+    return stt.SpeechEvent(
+        type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+        alternatives=[stt.SpeechData(language="en", text=text)],
+    )
+
+
+class FakeSTT(stt.STT):
+    """Transcribes every `every` frames of audio, and once more at the end.
+
+    Recognizing a buffer takes 0.1 s and hears how many frames it holds.
+    """
+
+    def __init__(self, every: int = 5) -> None:
+        super().__init__(
+            capabilities=stt.STTCapabilities(streaming=True, interim_results=False)
+        )
+        self.every = every
+
+    async def _recognize_impl(self, buffer, *, language, conn_options):
+        await asyncio.sleep(0.1)
+        frames = len(buffer) if isinstance(buffer, list) else 1
+        return _final(f"heard {frames}")
+
+    def stream(self, *, language=None, conn_options=None):
+        return FakeRecognizeStream(self)
+
+
+class FakeRecognizeStream(stt.RecognizeStream):
+    def __init__(self, fake: FakeSTT) -> None:
+        super().__init__(stt=fake, conn_options=APIConnectOptions(max_retry=0))
+
+    async def _run(self) -> None:
+        fake: FakeSTT = self._stt  # type: ignore[assignment]
+        frames = 0
+        async for frame in self._input_ch:
+            if isinstance(frame, self._FlushSentinel):
+                continue
+            frames += 1
+            if frames % fake.every == 0:
+                self._event_ch.send_nowait(_final(f"after {frames}"))
+        self._event_ch.send_nowait(_final("done"))
+
+
+class FakeTTS(tts.TTS):
+    """Speaks a 20 ms frame per word, the first after `ttfb` seconds."""
+
+    def __init__(self, ttfb: float) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+
+    def synthesize(self, text, *, conn_options=None):
+        return FakeChunkedStream(self, text)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    def __init__(self, fake: FakeTTS, text: str) -> None:
+        super().__init__(
+            tts=fake, input_text=text, conn_options=APIConnectOptions(max_retry=0)
+        )
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(self._tts.ttfb)
+        for i, _ in enumerate(self.input_text.split()):
+            output_emitter.push(bytes(_frame(i + 1).data))
+        output_emitter.flush()
+
+
+async def _transcribe(model: stt.STT, frames: list[rtc.AudioFrame]) -> list[str]:
+    stream = model.stream()
+    for frame in frames:
+        stream.push_frame(frame)
+        # as a microphone would, giving the transcripts time to come back
+        await asyncio.sleep(0.005)
+    stream.end_input()
+    texts = [event.alternatives[0].text async for event in stream]
+    await stream.aclose()
+    return texts
+
+
+async def _reply(model: llm.LLM, text: str) -> tuple[float, str]:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content=text)
+    start = asyncio.get_running_loop().time()
+    ttft = None
+    content = ""
+    async with model.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if ttft is None:
+                ttft = asyncio.get_running_loop().time() - start
+            if chunk.delta is not None:
+                content += chunk.delta.content or ""
+    return ttft, content
+
+
+async def _speak(model: tts.TTS, text: str) -> tuple[float, list[bytes]]:
+    start = asyncio.get_running_loop().time()
+    ttfb = None
+    frames = []
+    async with model.synthesize(text) as stream:
+        async for audio in stream:
+            if ttfb is None:
+                ttfb = asyncio.get_running_loop().time() - start
+            frames.append(bytes(audio.frame.data))
+    return ttfb, frames
+
+
+async def test_tape_replays_what_was_recorded(tmp_path):
+    tape = Tape()
+    frames = [_frame(i) for i in range(12)]
+    recorded_texts = await _transcribe(RecordingSTT(FakeSTT(every=5), tape), frames)
+    recording_llm = RecordingLLM(ScriptedLLM(lambda _: "Hello there", ttft=0.1), tape)
+    _, recorded_reply = await _reply(recording_llm, "Hi")
+    _, recorded_audio = await _speak(RecordingTTS(FakeTTS(0.1), tape), "One two")
+    assert recorded_texts == ["after 5", "after 10", "done"]
+
+    tape.save(tmp_path / "visit.tape")
+    tape = Tape.load(tmp_path / "visit.tape")
+    assert [take.kind for take in tape.takes] == ["stt", "llm", "tts"]
+    caller = list(tape.caller_audio())
+    assert [bytes(f.data) for f in caller] == [bytes(f.data) for f in frames]
+
+    # events come out only once as much audio has been pushed as when recorded
+    replay_stt = ReplaySTT(tape)
+    stream = replay_stt.stream()
+    for frame in caller[:7]:
+        stream.push_frame(frame)
+    event = await asyncio.wait_for(stream.__anext__(), 1)
+    assert event.alternatives[0].text == "after 5"
+    for frame in caller[7:]:
+        stream.push_frame(frame)
+    stream.end_input()
+    assert [event.alternatives[0].text async for event in stream] == [
+        "after 10",
+        "done",
+    ]
+    await stream.aclose()
+
+    ttft, reply = await _reply(ReplayLLM(tape), "Hi")
+    assert reply == recorded_reply
+    assert ttft == pytest.approx(0.1, abs=0.05)
+
+    ttfb, audio = await _speak(ReplayTTS(tape), "One  two")
+    assert b"".join(audio) == b"".join(recorded_audio)
+    assert ttfb == pytest.approx(0.1, abs=0.05)
+
+
+async def test_replay_matches_takes_by_request():
+    tape = Tape()
+    recording = RecordingLLM(
+        ScriptedLLM(lambda ctx: f"re: {ctx.items[-1].text_content}"), tape
+    )
+    for text in ("first", "second"):
+        await _reply(recording, text)
+
+    replay = ReplayLLM(tape)
+    assert (await _reply(replay, "second"))[1] == "re: second"
+    assert (await _reply(replay, "unknown"))[1] == "re: first"
+    with pytest.raises(ReplayError):
+        await _reply(replay, "first")
+
+
+async def test_replay_recognizes_what_was_recorded(tmp_path):
+    tape = Tape()
+    recording = RecordingSTT(FakeSTT(), tape)
+    for count in (3, 5):
+        event = await recording.recognize([_frame(i) for i in range(count)])
+        assert event.alternatives[0].text == f"heard {count}"
+    tape.save(tmp_path / "visit.tape")
+
+    replay = ReplaySTT(Tape.load(tmp_path / "visit.tape"))
+    assert replay.capabilities.offline_recognize
+    start = asyncio.get_running_loop().time()
+    event = await replay.recognize([_frame(0)])
+    assert asyncio.get_running_loop().time() - start == pytest.approx(0.1, abs=0.05)
+    assert event.alternatives[0].text == "heard 3"
+    assert (await replay.recognize([_frame(0)])).alternatives[0].text == "heard 5"
+    with pytest.raises(ReplayError):
+        await replay.recognize([_frame(0)])
+
+    assert not ReplaySTT(Tape()).capabilities.offline_recognize
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not a tape")
+    with pytest.raises(ValueError):
+        Tape.load(path)
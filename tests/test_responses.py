@@ -0,0 +1,115 @@
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, tts, utils
+
+from responses import TAKE_A_SEAT, UNKNOWN_TOPIC, ResponseTable, SpeechCache
+from speech_store import SpeechStore
+
+
+class SilentTTS(tts.TTS):
+    """Synthesizes 100 ms of silence per word."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=16000,
+            num_channels=1,
+        )
+        self.requests: list[str] = []
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> tts.ChunkedStream:
+        self.requests.append(text)
+        return _SilentStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class _SilentStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=16000,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        output_emitter.push(b"\0\0" * 1600 * len(self.input_text.split()))
+        output_emitter.flush()
+
+
+def test_topics_match_synonyms_and_phrases():
+    table = ResponseTable()
+    bathroom = table.building_info("bathroom")
+    assert table.building_info("Toilets") == bathroom
+    assert table.building_info("loo") == bathroom
+    assert table.building_info("the ladies' restroom?") == bathroom
+    assert table.building_info("Elevator") == table.building_info("lifts")
+    assert table.building_info("cafeteria") == UNKNOWN_TOPIC
+
+
+def test_directions_for_every_floor():
+    table = ResponseTable()
+    assert "first lift bank" in table.directions(10)
+    assert "second lift bank" in table.directions(11)
+    assert "third lift bank" in table.directions(72)
+    assert "not a valid floor" in table.directions(73)
+    assert "not a valid floor" in table.directions(0)
+    assert table.directions(34) is table.directions(34)
+
+
+async def test_speech_cache_replays_synthesized_answers():
+    table = ResponseTable()
+    engine = SilentTTS()
+    cache = SpeechCache()
+    answers = table.frequent_answers([34, 34, 21])
+    assert len(answers) == 10
+
+    assert await cache.warm(engine, answers) == 10
+    assert await cache.warm(engine, answers) == 0
+    assert len(engine.requests) == 10
+
+    frames = [f async for f in cache.audio(table.directions(34))]
+    # 100 ms of silence per word, give or take the last frame's padding
+    assert sum(f.samples_per_channel for f in frames) // 1600 == 17
+    assert cache.audio(table.directions(50)) is None
+
+
+async def test_speech_cache_is_bounded():
+    cache = SpeechCache(max_bytes=3200 * 12)
+    added = await cache.warm(SilentTTS(), ["one two three", "four " * 10, "five"])
+    assert added == 2
+    assert "five" in cache
+    assert cache.size <= 3200 * 12
+
+
+def test_templates_keep_their_fixed_sentences():
+    table = ResponseTable(building="The Gherkin")
+    fixed = table.template_sentences()
+    assert TAKE_A_SEAT in fixed
+    assert "Welcome to The Gherkin!" in fixed
+    assert not any("Alex" in sentence for sentence in fixed)
+    assert table.checked_in("Alex Morgan").startswith(
+        "Welcome to The Gherkin, Alex Morgan!"
+    )
+
+
+async def test_speech_cache_synthesizes_only_the_name(tmp_path):
+    table = ResponseTable()
+    engine = SilentTTS()
+    cache = SpeechCache(store=SpeechStore(tmp_path), voice="silent")
+    await cache.warm(engine, table.template_sentences())
+    engine.requests.clear()
+
+    # nothing cached: left to the LLM and TTS as usual
+    assert cache.compose(engine, "Hello there. Who are you here to see?") is None
+
+    audio = cache.compose(engine, table.checked_in("Alex Morgan"))
+    frames = [f async for f in audio]
+    assert engine.requests == ["Welcome to The Shard, Alex Morgan!"]
+    words = len(table.checked_in("Alex Morgan").split())
+    # give or take the padding of each live sentence's last frame
+    assert sum(f.samples_per_channel for f in frames) // 1600 == words
+
+    # the store is shared with the next process
+    assert TAKE_A_SEAT in SpeechCache(store=SpeechStore(tmp_path), voice="silent")
+    assert TAKE_A_SEAT not in SpeechCache(store=SpeechStore(tmp_path), voice="other")
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from livekit.agents import AgentSession, StopResponse, llm
+
+from agent import Assistant
+from directory import Person
+from offline import ScriptedLLM
+from responses import GREETING, ResponseTable
+from router import IntentRouter, parse_number
+
+
+@pytest.mark.parametrize(
+    ("text", "intent", "topic", "floor"),
+    [
+        ("Where are the toilets?", "building_info", "bathroom", None),
+        ("is there a loo nearby", "building_info", "bathroom", None),
+        ("Where are the elevators?", "building_info", "lifts", None),
+        ("How do I get to floor 34?", "directions", None, 34),
+        ("which lift for the 21st floor", "directions", None, 21),
+        ("I'm going to the forty-second floor", "directions", None, 42),
+        ("Good morning!", "greeting", None, None),
+    ],
+)
+def test_routes_common_requests(text, intent, topic, floor):
+    route = IntentRouter().route(text)
+    assert route is not None
+    assert (route.intent, route.topic, route.floor) == (intent, topic, floor)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Hi, I'm here to see Sarah Collins",
+        "I have a meeting on floor 34 with James",
+        "What's the weather like in London?",
+        "Where is the nearest tube station?",
+        "Can you check me in please",
+        "ten",
+        "10",
+        "two",
+        "is the gents on floor 3",
+        "I need floor 3 but first the loo",
+        "where are the toilets and the lifts",
+    ],
+)
+def test_falls_back_to_the_llm(text):
+    router = IntentRouter()
+    assert router.route(text) is None
+    assert router.misses == 1
+
+
+def test_parse_number():
+    assert parse_number("floor 7") == 7
+    assert parse_number("the thirty fourth floor") == 34
+    assert parse_number("floor seventy-two") == 72
+    assert parse_number("the lobby") is None
+
+
+async def test_routed_turn_skips_the_llm():
+    async with ScriptedLLM() as scripted, AgentSession(llm=scripted) as session:
+        agent = Assistant()
+        await session.start(agent)
+
+        message = llm.ChatMessage(role="user", content=["Where are the toilets?"])
+        with pytest.raises(StopResponse):
+            await agent.on_user_turn_completed(agent.chat_ctx.copy(), message)
+        await asyncio.sleep(0.1)
+
+        assert agent.chat_ctx.items[-2].text_content == "Where are the toilets?"
+        said = session.history.items[-1]
+        assert said.role == "assistant"
+        assert said.text_content == ResponseTable().building_info("bathroom")
+
+        message = llm.ChatMessage(role="user", content=["I'm here to see Emily Wong"])
+        await agent.on_user_turn_completed(agent.chat_ctx.copy(), message)
+
+
+@pytest.mark.parametrize("text", ["ten", "two", "lobby", "morning"])
+async def test_answers_to_the_agents_questions_go_to_the_llm(text):
+    async with ScriptedLLM() as scripted, AgentSession(llm=scripted) as session:
+        agent = Assistant()
+        await session.start(agent)
+
+        chat_ctx = agent.chat_ctx.copy()
+        chat_ctx.add_message(role="assistant", content="How many of you are there?")
+        message = llm.ChatMessage(role="user", content=[text])
+        await agent.on_user_turn_completed(chat_ctx, message)
+
+        session.userdata.meet(Person("Sarah Collins", "Shard Capital", 34, True))
+        message = llm.ChatMessage(role="user", content=["Where are the toilets?"])
+        await agent.on_user_turn_completed(agent.chat_ctx.copy(), message)
+
+
+def test_greeting_is_a_known_answer():
+    assert GREETING in ResponseTable().frequent_answers()
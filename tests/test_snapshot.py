@@ -0,0 +1,109 @@
+import json
+import os
+import random
+import struct
+
+import pytest
+
+from directory import DEFAULT_PEOPLE, Directory, Person, load_directory
+from snapshot import VERSION, build_snapshot, main, open_snapshot
+from tenants import TenantStore, load_tenant
+
+FIRST = ("Sarah", "James", "Emily", "Priya", "Tomasz", "Aoife", "Kwame", "Li")
+LAST = ("Collins", "Patel", "Wong", "Nowak", "O'Brien", "Mensah", "Zhang", "Smith")
+
+
+def _people(count: int) -> list[Person]:
+    rng = random.Random(0)
+    return [
+        Person(
+            f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}",
+            f"Company {i % 13}",
+            rng.randint(1, 72),
+            rng.random() < 0.5,
+        )
+        for i in range(count)
+    ]
+
+
+def test_snapshot_answers_as_the_directory_does(tmp_path):
+    people = [*DEFAULT_PEOPLE, *_people(500)]
+    build_snapshot(people, tmp_path / "people.snap")
+    expected = Directory(people)
+    directory = load_directory(tmp_path / "people.snap")
+
+    assert len(directory) == len(expected)
+    assert list(directory) == list(expected)
+    assert directory.floors() == expected.floors()
+    for query in ("Sarah Collins", "sarah  COLLINS.", "sara colins", "Nobody"):
+        assert directory.get(query) == expected.get(query)
+        assert directory.lookup(query) == expected.lookup(query)
+        assert directory.resolve(query) == expected.resolve(query)
+    for query in ("priya nowak 12", "kwame mensa", "li zang 7"):
+        assert directory.search(query) == expected.search(query)
+    assert directory.by_company("company 3") == expected.by_company("Company 3")
+    assert directory.on_floor(34) == expected.on_floor(34)
+    assert directory.on_floor(99) == ()
+
+
+def test_snapshot_rejects_duplicates_and_other_files(tmp_path):
+    with pytest.raises(ValueError):
+        build_snapshot(
+            [
+                Person("Ada Lovelace", "A", 1, True),
+                Person("ada lovelace", "B", 2, True),
+            ],
+            tmp_path / "people.snap",
+        )
+    assert not (tmp_path / "people.snap").exists()
+
+    build_snapshot(DEFAULT_PEOPLE, tmp_path / "people.snap")
+    data = bytearray((tmp_path / "people.snap").read_bytes())
+    struct.pack_into("<I", data, 8, VERSION + 1)
+    (tmp_path / "old.snap").write_bytes(data)
+    with pytest.raises(ValueError, match="version"):
+        open_snapshot(tmp_path / "old.snap")
+    (tmp_path / "people.json").write_text("[]")
+    with pytest.raises(ValueError):
+        open_snapshot(tmp_path / "people.json")
+
+
+async def test_tenant_snapshot_reloads_in_place(tmp_path, capsys):
+    (tmp_path / "people.csv").write_text(
+        "name,company,floor,in_building\nAda Lovelace,Engines,3,yes\n"
+    )
+    (tmp_path / "tower.json").write_text(
+        json.dumps(
+            {
+                "building": "One Tower",
+                "lift_banks": [[20, "east"]],
+                "floors": 20,
+                "directory": "people.csv",
+            }
+        )
+    )
+    main([str(tmp_path / "tower.json"), str(tmp_path / "tower.snap")])
+    assert "wrote 1 people" in capsys.readouterr().out
+
+    store = TenantStore(lambda tenant_id: load_tenant(tenant_id, tmp_path))
+    tenant = await store.load("tower")
+    assert tenant.building == "One Tower"
+    assert tenant.directory.get("Ada Lovelace") == Person(
+        "Ada Lovelace", "Engines", 3, True
+    )
+    assert await store.refresh() == 0
+
+    (tmp_path / "people.csv").write_text(
+        "name,company,floor\nAda Lovelace,Engines,3\nGrace Hopper,Navy,9\n"
+    )
+    main([str(tmp_path / "tower.json"), str(tmp_path / "tower.snap")])
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+    assert await store.refresh(["elsewhere"]) == 0
+    assert await store.refresh(["tower"]) == 1
+    reloaded = await store.load("tower")
+    assert "Grace Hopper" in reloaded.directory
+    assert not reloaded.directory.get("Ada Lovelace").in_building
+    # a session still holding the old tenant keeps reading the old snapshot
+    assert "Grace Hopper" not in tenant.directory
+    assert tenant.directory.get("Ada Lovelace").in_building
+    assert await store.refresh() == 0
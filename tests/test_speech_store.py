@@ -0,0 +1,77 @@
+import os
+
+from livekit import rtc
+
+from speech_store import SpeechStore, normalize_text
+
+
+def _frames(seconds: float, value: int = 1) -> list[rtc.AudioFrame]:
+    samples = 1600
+    data = value.to_bytes(2, "little") * samples
+    return [rtc.AudioFrame(data, 16000, 1, samples)] * round(seconds * 10)
+
+
+async def _read(audio) -> bytes:
+    return b"".join([bytes(frame.data) async for frame in audio])
+
+
+def test_text_is_normalized():
+    assert normalize_text("  Welcome to\n the  Shard!") == "Welcome to the Shard!"
+    assert normalize_text("ﬁrst lift bank") == "first lift bank"
+
+
+async def test_store_round_trips_audio(tmp_path):
+    store = SpeechStore(tmp_path)
+    assert store.get("voice", "Hello") is None
+    assert store.put("voice", "Hello  there", _frames(0.5, 7))
+
+    assert store.has("voice", "Hello there")
+    assert not store.has("other voice", "Hello there")
+    audio = store.get("voice", " Hello there ")
+    frames = [frame async for frame in audio]
+    assert [frame.samples_per_channel for frame in frames] == [1600] * 5
+    assert bytes(frames[0].data) == bytes(_frames(0.1, 7)[0].data)
+    assert (store.hits, store.misses) == (1, 1)
+
+
+async def test_store_evicts_least_recently_played(tmp_path):
+    entry = 3200 * 10 + 16
+    store = SpeechStore(tmp_path, max_bytes=entry * 2)
+    store.put("v", "one", _frames(1))
+    store.put("v", "two", _frames(1))
+    # played last, so kept over "two"
+    await _read(store.get("v", "one"))
+    store.put("v", "three", _frames(1))
+    assert store.has("v", "one")
+    assert not store.has("v", "two")
+    assert store.size == entry * 2
+    assert len(os.listdir(tmp_path)) == 2
+    assert not store.put("v", "too long", _frames(3))
+
+    # the next process finds the same entries, in the same order
+    for name, mtime in (("one", 1), ("three", 2)):
+        path = tmp_path / f"{store._key('v', name)}.pcm"
+        os.utime(path, (mtime, mtime))
+    reopened = SpeechStore(tmp_path, max_bytes=entry)
+    assert len(reopened) == 1
+    assert reopened.has("v", "three")
+
+
+async def test_store_writes_off_the_loop(tmp_path):
+    entry = 3200 * 10 + 16
+    store = SpeechStore(tmp_path, max_bytes=entry)
+    assert await store.aput("v", "one", _frames(1))
+    assert await store.aput("v", "two", _frames(1, 2))
+    assert not await store.aput("v", "too long", _frames(3))
+    assert not store.has("v", "one")
+    assert os.listdir(tmp_path) == [f"{store._key('v', 'two')}.pcm"]
+    assert await _read(store.get("v", "two")) == bytes(_frames(1, 2)[0].data) * 10
+
+
+async def test_store_forgets_entries_deleted_elsewhere(tmp_path):
+    store = SpeechStore(tmp_path)
+    store.put("v", "one", _frames(1))
+    SpeechStore(tmp_path, max_bytes=0)
+    assert store.get("v", "one") is None
+    assert len(store) == 0
+    assert store.size == 0
@@ -0,0 +1,29 @@
+import sys
+
+import startup
+
+
+def test_lazy_import_defers_execution(monkeypatch):
+    monkeypatch.setattr(startup, "LAZY_IMPORTS", True)
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+
+    module = startup.lazy_import("colorsys")
+    assert sys.modules["colorsys"] is module
+    assert module.rgb_to_hsv(0.0, 0.0, 0.0) == (0.0, 0.0, 0.0)
+
+
+def test_eager_import_when_disabled(monkeypatch):
+    monkeypatch.setattr(startup, "LAZY_IMPORTS", False)
+    assert startup.lazy_import("json") is sys.modules["json"]
+
+
+def test_shared_resources_load_once(monkeypatch):
+    calls = []
+    monkeypatch.setitem(
+        startup.SHARED_RESOURCES, "answer", lambda: calls.append(1) or 42
+    )
+    monkeypatch.setattr(startup, "_shared", {})
+
+    assert startup.shared("answer") == 42
+    assert startup.shared("answer") == 42
+    assert calls == [1]
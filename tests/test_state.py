@@ -0,0 +1,96 @@
+import ast
+
+import pytest
+from livekit.agents import AgentSession, llm
+
+from agent import Assistant
+from context_budget import ContextBudget
+from directory import DEFAULT_PEOPLE
+from offline import ScriptedLLM, Step, ToolCall
+from state import VisitState
+from timesource import TimeProvider, get_time_provider, set_time_provider
+from visitors import VisitorRegistry
+
+
+@pytest.fixture
+def local_clock():
+    previous = get_time_provider()
+    set_time_provider(TimeProvider(None))
+    yield
+    set_time_provider(previous)
+
+
+def test_visit_state_remembers_contact():
+    visit = VisitState()
+    assert not visit.is_contact(None)
+    sarah = DEFAULT_PEOPLE[0]
+    visit.meet(sarah)
+    assert visit.floor == sarah.floor
+    assert visit.is_contact(None)
+    assert visit.is_contact("sarah collins")
+    assert not visit.is_contact("James Patel")
+    assert "Sarah Collins" in repr(visit)
+    with pytest.raises(AttributeError):
+        visit.notes = "no"
+
+
+def _calls(chat_ctx: llm.ChatContext) -> Step:
+    last = chat_ctx.items[-1]
+    if last.type == "function_call_output":
+        return last.output or "Anything else?"
+    name, _, args = (last.text_content or "").partition(" ")
+    return [ToolCall(name, ast.literal_eval(args or "{}"))]
+
+
+async def test_tools_reuse_what_earlier_tools_resolved(local_clock):
+    visit = VisitState()
+    async with (
+        ScriptedLLM(_calls) as scripted,
+        AgentSession(llm=scripted, userdata=visit) as session,
+    ):
+        await session.start(Assistant(visitors=VisitorRegistry()))
+
+        async def output(text: str) -> str:
+            result = await session.run(user_input=text)
+            return result.expect[1].event().item.output
+
+        assert "I don't know which floor" in await output("get_directions")
+
+        await output("lookup_directory {'name': 'Sarah Collins'}")
+        assert visit.contact.name == "Sarah Collins"
+        assert "Sarah Collins is currently" in await output("check_available")
+        assert "floor 34" in await output("get_directions")
+        assert "wait time is" in await output(
+            "get_wait_time {'time': '2099-01-01T10:00:00+00:00'}"
+        )
+        assert visit.meeting_time == "2099-01-01T10:00:00+00:00"
+        assert "wait time is" in await output("get_wait_time")
+
+        await output("check_in {'name': 'Alex Morgan'}")
+        assert visit.visitor.name == "Alex Morgan"
+
+        assert "James Patel is not" in await output(
+            "check_available {'name': 'James Patel'}"
+        )
+        assert visit.floor == 21
+
+
+async def test_group_check_in_keeps_the_visit_while_waiting(local_clock):
+    now = 0.0
+    visit = VisitState()
+    async with (
+        ScriptedLLM(_calls) as scripted,
+        AgentSession(llm=scripted, userdata=visit) as session,
+    ):
+        budget = ContextBudget(clock=lambda: now)
+        await session.start(Assistant(visitors=VisitorRegistry(), budget=budget))
+        names = ["Alex Morgan", "Priya Shah", "Li Wong"]
+        await session.run(user_input=f"check_in_group {{'names': {names}}}")
+        assert visit.in_progress
+        assert visit.summary() == "Alex Morgan and 2 others checked in"
+
+        # the group is still waiting in the lobby ten minutes later
+        now = 600.0
+        await session.run(user_input="get_directions")
+        assert session.userdata is visit
+        assert budget.visits == 1
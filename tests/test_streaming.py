@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from livekit.agents import Agent, AgentSession, RunContext, function_tool, llm
+
+from offline import ScriptedLLM, Step, ToolCall
+from streaming import streaming_tool
+
+
+def _script(chat_ctx: llm.ChatContext) -> Step:
+    last = chat_ctx.items[-1]
+    if last.type == "function_call_output":
+        return last.output or "Anything else?"
+    return [ToolCall(last.text_content or "", {})]
+
+
+class _Agent(Agent):
+    def __init__(self) -> None:
+        super().__init__(instructions="test")
+
+    @function_tool
+    @streaming_tool(grace=0.05)
+    async def fast(self, context: RunContext):
+        """Answers right away."""
+        yield "Let me check."
+        yield "Done."
+
+    @function_tool
+    @streaming_tool(grace=0.05)
+    async def slow(self, context: RunContext):
+        """Takes a while."""
+        yield "Let me check."
+        await asyncio.sleep(0.2)
+        yield "Done."
+
+    @function_tool
+    @streaming_tool(grace=0.05)
+    async def slow_to_finish(self, context: RunContext):
+        """Takes a while after its answer."""
+        yield "Done."
+        await asyncio.sleep(0.2)
+
+
+async def _said(tool: str) -> tuple[list[str], str]:
+    async with (
+        ScriptedLLM(_script) as scripted,
+        AgentSession(llm=scripted) as session,
+    ):
+        await session.start(_Agent())
+        result = await session.run(user_input=tool)
+        await asyncio.sleep(0.05)
+        output = next(
+            ev.item.output for ev in result.events if ev.type == "function_call_output"
+        )
+        said = [
+            item.text_content
+            for item in session.history.items
+            if item.type == "message" and item.role == "assistant"
+        ]
+        return said, output
+
+
+async def test_fast_tool_does_not_speak_provisional_answer():
+    said, output = await _said("fast")
+    assert output == "Done."
+    assert "Let me check." not in said
+
+
+async def test_slow_tool_speaks_provisional_answer():
+    said, output = await _said("slow")
+    assert output == "Done."
+    assert said[0] == "Let me check."
+
+
+async def test_spoken_final_answer_is_not_returned():
+    said, output = await _said("slow_to_finish")
+    assert output == ""
+    assert said == ["Done."]
+
+
+def test_requires_async_generator():
+    async def not_a_generator() -> str:
+        return "x"
+
+    with pytest.raises(TypeError):
+        streaming_tool()(not_a_generator)
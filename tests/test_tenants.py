@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+
+from directory import DEFAULT_PEOPLE, Directory, Person
+from responses import GREETING, ResponseTable
+from tenants import (
+    DEFAULT_TENANT,
+    PERSON_BYTES,
+    TenantStore,
+    UnknownTenantError,
+    build_tenant,
+    load_tenant,
+    tenant_from_metadata,
+)
+
+
+def test_tenant_from_room_metadata():
+    assert tenant_from_metadata(None) == DEFAULT_TENANT
+    assert tenant_from_metadata("") == DEFAULT_TENANT
+    assert tenant_from_metadata('{"tenant": "canary-wharf"}') == "canary-wharf"
+    assert tenant_from_metadata('{"tenant": "../etc/passwd"}') == DEFAULT_TENANT
+    assert tenant_from_metadata("not json") == DEFAULT_TENANT
+    assert tenant_from_metadata("[1, 2]") == DEFAULT_TENANT
+
+
+def test_default_tenant_is_the_shard(monkeypatch):
+    monkeypatch.delenv("TENANTS_PATH", raising=False)
+    tenant = load_tenant(DEFAULT_TENANT)
+    assert tenant.building == "The Shard"
+    assert tenant.responses.greeting == GREETING
+    assert tenant.size > 0
+    with pytest.raises(UnknownTenantError):
+        load_tenant("elsewhere")
+
+
+def test_load_tenant_from_config(tmp_path):
+    (tmp_path / "people.json").write_text(
+        json.dumps([{"name": "Ada Lovelace", "company": "Engines", "floor": 3}])
+    )
+    (tmp_path / "tower.json").write_text(
+        json.dumps(
+            {
+                "building": "One Tower",
+                "timezone": "America/New_York",
+                "floors": 20,
+                "lift_banks": [[20, "east"], [8, "west"]],
+                "directory": "people.json",
+            }
+        )
+    )
+
+    tenant = load_tenant("tower", tmp_path)
+    assert tenant.building == "One Tower"
+    assert tenant.timezone == "America/New_York"
+    assert "Ada Lovelace" in tenant.directory
+    assert "west lift bank" in tenant.responses.directions(8)
+    assert "east lift bank" in tenant.responses.directions(9)
+    assert "not a valid floor in One Tower" in tenant.responses.directions(21)
+    assert tenant.responses.greeting.startswith("Hello, welcome to One Tower!")
+
+
+def test_lift_banks_default_to_the_shard_layout():
+    table = ResponseTable()
+    assert "first lift bank" in table.directions(10)
+    assert "second lift bank" in table.directions(11)
+    assert "third lift bank" in table.directions(72)
+
+
+def _loader(calls):
+    def load(tenant_id):
+        if tenant_id == "missing":
+            raise UnknownTenantError(tenant_id)
+        calls.append(tenant_id)
+        return build_tenant(
+            tenant_id, Directory(DEFAULT_PEOPLE), building=tenant_id.title()
+        )
+
+    return load
+
+
+async def test_store_loads_lazily_and_coalesces():
+    calls = []
+    store = TenantStore(_loader(calls))
+    first, second = await asyncio.gather(store.load("north"), store.load("north"))
+    assert first is second
+    assert calls == ["north"]
+    assert store.get("north") is first
+    assert await store.load("north") is first
+    assert (store.hits, store.misses) == (1, 2)
+    with pytest.raises(UnknownTenantError):
+        await store.load("missing")
+    assert "missing" not in store
+
+
+async def test_store_evicts_least_recently_used():
+    calls = []
+    store = TenantStore(_loader(calls), max_tenants=2)
+    await store.load("a")
+    await store.load("b")
+    store.get("a")
+    await store.load("c")
+    assert "b" not in store
+    assert {"a", "c"} <= set(calls)
+    assert len(store) == 2
+    assert store.evictions == 1
+
+    one = build_tenant("one", Directory(DEFAULT_PEOPLE))
+    store = TenantStore(_loader(calls), max_bytes=one.size + one.size // 2)
+    store.put(one)
+    store.put(build_tenant("two", Directory(DEFAULT_PEOPLE)))
+    assert "one" not in store
+    assert store.size == store.get("two").size
+
+
+async def test_store_keeps_pinned_tenants():
+    calls = []
+    store = TenantStore(_loader(calls), max_tenants=2)
+    store.put(build_tenant(DEFAULT_TENANT, Directory(DEFAULT_PEOPLE)), pin=True)
+    for tenant_id in ("a", "b", "c"):
+        await store.load(tenant_id)
+    assert DEFAULT_TENANT in store
+    assert "c" in store
+    assert len(store) == 2
+
+    # a tenant over the byte budget on its own is still served
+    store = TenantStore(_loader(calls), max_bytes=1)
+    store.put(build_tenant(DEFAULT_TENANT, Directory(DEFAULT_PEOPLE)), pin=True)
+    tenant = await store.load("big")
+    assert store.get("big") is tenant
+    assert DEFAULT_TENANT in store
+
+
+def test_tenant_size_grows_with_the_directory():
+    small = build_tenant("small", Directory(DEFAULT_PEOPLE))
+    people = [Person(f"Person {i}", "Company", 1 + i % 72, True) for i in range(1000)]
+    large = build_tenant("large", Directory(people))
+    assert large.size - small.size == (1000 - len(DEFAULT_PEOPLE)) * PERSON_BYTES
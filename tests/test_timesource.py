@@ -0,0 +1,66 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from http_pool import close_http_session
+from timesource import TimeProvider
+
+
+@pytest.fixture
+async def time_api():
+    state = {"requests": 0, "skew": 3600.0, "status": 200}
+
+    async def handler(request: web.Request) -> web.Response:
+        state["requests"] += 1
+        if state["status"] != 200:
+            return web.Response(status=state["status"])
+        return web.json_response({"unixtime": time.time() + state["skew"]})
+
+    app = web.Application()
+    app.router.add_get("/api/timezone/{tz:.+}", handler)
+    async with TestServer(app) as server:
+        state["url"] = str(server.make_url("/api/timezone"))
+        yield state
+    await close_http_session()
+
+
+async def test_warm_then_answers_from_cache(time_api):
+    provider = TimeProvider(time_api["url"])
+    await provider.warm("Europe/London")
+    assert time_api["requests"] == 1
+
+    for _ in range(5):
+        now = await provider.now("Europe/London")
+    assert time_api["requests"] == 1
+
+    expected = datetime.now(timezone.utc).timestamp() + time_api["skew"]
+    assert abs(now.timestamp() - expected) < 1
+    assert now.tzinfo is not None
+
+
+async def test_cold_call_does_not_wait_for_network(time_api):
+    provider = TimeProvider(time_api["url"])
+    now = await provider.now("Europe/London")
+    assert abs(now.timestamp() - time.time()) < 1
+    await provider.warm("Europe/London")
+    assert time_api["requests"] == 1
+
+
+async def test_falls_back_to_local_clock(time_api):
+    time_api["status"] = 500
+    provider = TimeProvider(time_api["url"])
+    assert await provider.sync("Europe/London") is False
+    now = await provider.now("Europe/London")
+    assert abs(now.timestamp() - time.time()) < 1
+    assert time_api["requests"] == 1
+
+
+async def test_local_only_provider_never_syncs():
+    provider = TimeProvider(None)
+    await provider.warm("Europe/London")
+    assert await provider.sync("Europe/London") is False
+    now = await provider.now("Europe/London")
+    assert abs(now.timestamp() - time.time()) < 1
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from turns import TurnDetectionService, _BatchedEOURunner
+
+
+class FakeRunner:
+    def __init__(self) -> None:
+        self.running = 0
+        self.overlapped = False
+        self.threads: set[str] = set()
+        self._lock = threading.Lock()
+
+    def run(self, data: bytes) -> bytes | None:
+        with self._lock:
+            self.running += 1
+            self.overlapped |= self.running > 1
+        self.threads.add(threading.current_thread().name)
+        threading.Event().wait(0.005)
+        if data == b"boom":
+            raise RuntimeError("inference failed")
+        with self._lock:
+            self.running -= 1
+        return data.upper()
+
+
+async def test_sessions_share_one_serial_runner():
+    runner = FakeRunner()
+    loaded = []
+
+    def factory(method: str) -> FakeRunner:
+        loaded.append(method)
+        return runner
+
+    service = TurnDetectionService(factory)
+    try:
+        results = await asyncio.gather(
+            *(service.do_inference("eou", f"turn {i}".encode()) for i in range(8))
+        )
+    finally:
+        await service.aclose()
+
+    assert results == [f"TURN {i}".encode() for i in range(8)]
+    assert loaded == ["eou"]
+    assert not runner.overlapped
+    assert len(runner.threads) == 1
+    assert threading.current_thread().name not in runner.threads
+    assert service.requests == 8
+
+
+async def test_failed_inference_reaches_only_its_caller():
+    runner = FakeRunner()
+    service = TurnDetectionService(lambda _: runner)
+    try:
+        with pytest.raises(RuntimeError):
+            await service.do_inference("eou", b"boom")
+        runner.running = 0
+        assert await service.do_inference("eou", b"ok") == b"OK"
+    finally:
+        await service.aclose()
+
+
+class BatchingRunner(FakeRunner):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[int] = []
+
+    def run_batch(self, batch: list[bytes]) -> list[bytes | None]:
+        self.batches.append(len(batch))
+        if b"boom" in batch:
+            raise RuntimeError("batch failed")
+        return [data.upper() for data in batch]
+
+
+async def test_requests_waiting_together_run_as_one_batch():
+    runner = BatchingRunner()
+    service = TurnDetectionService(lambda _: runner, max_batch=4, max_wait=0.05)
+    try:
+        results = await asyncio.gather(
+            *(service.do_inference("eou", f"turn {i}".encode()) for i in range(6))
+        )
+    finally:
+        await service.aclose()
+
+    assert results == [f"TURN {i}".encode() for i in range(6)]
+    assert runner.batches == [4, 2]
+    assert service.batches == 2
+    assert service.requests == 6
+
+
+async def test_failed_batch_falls_back_to_one_at_a_time():
+    runner = BatchingRunner()
+    service = TurnDetectionService(lambda _: runner, max_batch=4, max_wait=0.05)
+    try:
+        results = await asyncio.gather(
+            service.do_inference("eou", b"ok"),
+            service.do_inference("eou", b"boom"),
+            return_exceptions=True,
+        )
+        assert results[0] == b"OK"
+        assert isinstance(results[1], RuntimeError)
+
+        # a runner that failed to batch isn't asked to again
+        await asyncio.gather(*(service.do_inference("eou", b"ok") for _ in range(3)))
+    finally:
+        await service.aclose()
+    assert runner.batches == [2]
+
+
+class CausalSession:
+    """Stands in for the ONNX session: each position sees only the tokens up to it."""
+
+    def run(self, _: object, feeds: dict[str, np.ndarray]) -> list[np.ndarray]:
+        ids = feeds["input_ids"]
+        return [np.cumsum(ids, axis=1, dtype=np.float64) / 1000]
+
+
+class FakeTokenizer:
+    pad_token_id = 7
+
+    def __call__(self, text: str, **_: object) -> dict[str, np.ndarray]:
+        return {"input_ids": np.array([[len(word) for word in text.split()]])}
+
+
+def test_batched_eou_runner_matches_single_runs():
+    base = SimpleNamespace(
+        _tokenizer=FakeTokenizer(),
+        _session=CausalSession(),
+        _format_chat_ctx=lambda chat_ctx: " ".join(m["content"] for m in chat_ctx),
+    )
+
+    def single(data: bytes) -> float:
+        ids = FakeTokenizer()(base._format_chat_ctx(json.loads(data)["chat_ctx"]))
+        return float(CausalSession().run(None, ids)[0].flatten()[-1])
+
+    batch = [
+        json.dumps({"chat_ctx": [{"role": "user", "content": text}]}).encode()
+        for text in ("hi", "I'm here to see Sarah Collins", "where are the lifts")
+    ]
+    results = _BatchedEOURunner(base).run_batch(batch)
+    assert [json.loads(r)["eou_probability"] for r in results] == [
+        single(data) for data in batch
+    ]
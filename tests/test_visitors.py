@@ -0,0 +1,92 @@
+import asyncio
+
+from visitors import Visit, VisitorRegistry
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_registry_lookup_and_expiry():
+    clock = FakeClock()
+    registry = VisitorRegistry(ttl=60, clock=clock)
+    registry.add("Ada Lovelace")
+
+    assert registry.get("ada  lovelace") == Visit("Ada Lovelace", 1000.0)
+    assert "Ada Lovelace" in registry
+    clock.now += 61
+    assert registry.get("Ada Lovelace") is None
+    assert len(registry) == 0
+
+
+def test_memory_cap_evicts_oldest():
+    registry = VisitorRegistry(max_entries=2)
+    for name in ("A", "B", "C"):
+        registry.add(name)
+    assert "A" not in registry
+    assert "B" in registry and "C" in registry
+
+
+def test_batched_writes_shared_between_processes(tmp_path):
+    path = tmp_path / "visitors.db"
+    writer = VisitorRegistry(path, batch_size=3)
+    reader = VisitorRegistry(path)
+
+    writer.add("A")
+    writer.add("B")
+    assert reader.get("A") is None
+    writer.add("C")
+    assert reader.get("A") is not None
+    assert reader.get("C") is not None
+
+
+def test_checkins_survive_restart(tmp_path):
+    path = tmp_path / "visitors.db"
+    registry = VisitorRegistry(path)
+    registry.add("Ada Lovelace")
+    assert registry.flush() == 1
+    assert registry.flush() == 0
+
+    restarted = VisitorRegistry(path)
+    assert restarted.get("ada lovelace").name == "Ada Lovelace"
+
+
+def test_prune_deletes_expired_rows(tmp_path):
+    clock = FakeClock()
+    registry = VisitorRegistry(tmp_path / "visitors.db", ttl=60, clock=clock)
+    registry.add("A")
+    registry.flush()
+    clock.now += 61
+    registry.add("B")
+    registry.flush()
+    assert registry.prune() == 1
+
+
+async def test_background_flush(tmp_path):
+    path = tmp_path / "visitors.db"
+    registry = VisitorRegistry(path, flush_interval=0.01)
+    registry.start()
+    registry.add("Ada Lovelace")
+    await asyncio.sleep(0.05)
+    assert VisitorRegistry(path).get("Ada Lovelace") is not None
+
+    registry.add("Grace Hopper")
+    await registry.aclose()
+    assert VisitorRegistry(path).get("Grace Hopper") is not None
+
+
+def test_group_check_in_is_one_write(tmp_path):
+    clock = FakeClock()
+    registry = VisitorRegistry(tmp_path / "visitors.db", clock=clock)
+    visits = registry.add_many(["Ada", "Grace", "Alan"])
+    assert visits == [Visit(name, 1000.0) for name in ("Ada", "Grace", "Alan")]
+    assert all(name in registry for name in ("ada", "grace", "alan"))
+    assert registry.flush() == 3
+
+    restarted = VisitorRegistry(tmp_path / "visitors.db", clock=clock)
+    assert restarted.get("Grace") == Visit("Grace", 1000.0)
+    assert registry.add_many([]) == []
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from http_pool import close_http_session
+from weather import (
+    CachedWeatherBackend,
+    OpenMeteoBackend,
+    StaticWeatherBackend,
+    Weather,
+    WeatherError,
+    describe_weather_code,
+)
+
+
+@pytest.fixture
+async def open_meteo():
+    state = {"geocode": 0, "forecast": 0, "fail": False}
+
+    async def geocode(request: web.Request) -> web.Response:
+        state["geocode"] += 1
+        if request.query["name"] != "paris":
+            return web.json_response({})
+        return web.json_response({"results": [{"latitude": 48.85, "longitude": 2.35}]})
+
+    async def forecast(request: web.Request) -> web.Response:
+        state["forecast"] += 1
+        if state["fail"]:
+            return web.Response(status=503)
+        await asyncio.sleep(0.01)
+        return web.json_response(
+            {"current": {"temperature_2m": 64.4, "weather_code": 61}}
+        )
+
+    app = web.Application()
+    app.router.add_get("/v1/search", geocode)
+    app.router.add_get("/v1/forecast", forecast)
+    async with TestServer(app) as server:
+        state["backend"] = OpenMeteoBackend(
+            geocoding_url=str(server.make_url("/v1/search")),
+            forecast_url=str(server.make_url("/v1/forecast")),
+        )
+        yield state
+    await close_http_session()
+
+
+def test_describe_weather_code():
+    assert describe_weather_code(0) == "clear"
+    assert describe_weather_code(63) == "rainy"
+    assert describe_weather_code(120) == "unsettled"
+
+
+async def test_static_backend():
+    backend = StaticWeatherBackend()
+    assert await backend.current(" london ") == Weather("sunny", 60.0)
+    assert await backend.current("Paris") is None
+
+
+async def test_open_meteo_backend(open_meteo):
+    backend = open_meteo["backend"]
+    assert await backend.current("Paris") == Weather("rainy", 64.4)
+    assert await backend.current("Atlantis") is None
+
+    open_meteo["fail"] = True
+    with pytest.raises(WeatherError):
+        await backend.current("Paris")
+    assert open_meteo["geocode"] == 2
+
+
+async def test_cached_backend_coalesces_requests(open_meteo):
+    backend = CachedWeatherBackend(open_meteo["backend"])
+    results = await asyncio.gather(
+        *(backend.current(city) for city in ["Paris", "paris", "PARIS "] * 10)
+    )
+    assert set(results) == {Weather("rainy", 64.4)}
+    assert open_meteo["forecast"] == 1
+    assert open_meteo["geocode"] == 1